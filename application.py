@@ -1,21 +1,31 @@
 import asyncio
+import importlib
 import logging
 import os
+import time
 import uuid
 from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Literal
 
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 
-from backend.graph import Graph
-from backend.services.mongodb import MongoDBService
+from backend.classes.profiles import DEFAULT_PROFILE, ProfileName, get_profile
+from backend.services import metrics
 from backend.services.pdf_service import PDFService
+from backend.services.rate_limiter import get_rate_limiter
+from backend.services.report_cache import ReportCache, report_key
+from backend.services.resilience import breaker_states
+from backend.services.search_cache import SearchCache, use_search_cache
+from backend.services.snapshots import SnapshotStore, build_snapshot
+from backend.services.tracing import Trace, span, use_trace
 from backend.services.websocket_manager import WebSocketManager
 
 # Load environment variables from .env file at startup
@@ -29,7 +39,44 @@ logger.setLevel(logging.INFO)
 console_handler = logging.StreamHandler()
 logger.addHandler(console_handler)
 
-app = FastAPI(title="Tavily Company Research API")
+def preload_backend():
+    """Import the research graph and provider SDKs ahead of the first job."""
+    try:
+        for module in ("backend.graph", "backend.utils.utils", "tavily", "openai", "google.generativeai"):
+            importlib.import_module(module)
+        logger.info("Preloaded research backend")
+    except Exception as e:
+        logger.warning(f"Failed to preload research backend: {e}")
+
+# The checkpointer is opened on first use (it imports LangGraph) and closed on shutdown
+checkpointer_stack = AsyncExitStack()
+checkpointer_lock = asyncio.Lock()
+checkpointer = None
+checkpointer_opened = False
+
+async def get_checkpointer():
+    """Open the configured checkpointer once and return it, or None if disabled."""
+    global checkpointer, checkpointer_opened
+    async with checkpointer_lock:
+        if not checkpointer_opened:
+            from backend.services.checkpointer import open_checkpointer
+            try:
+                checkpointer = await checkpointer_stack.enter_async_context(open_checkpointer(mongodb))
+            except Exception as e:
+                logger.warning(f"Failed to open checkpointer: {e}. Jobs will not be resumable.")
+            checkpointer_opened = True
+    return checkpointer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy SDKs are imported lazily so the server can answer health checks
+    # right away; warm them in a worker thread once it is up.
+    if os.getenv("PRELOAD_BACKEND", "true").lower() in ("1", "true", "yes"):
+        asyncio.create_task(asyncio.to_thread(preload_backend))
+    yield
+    await checkpointer_stack.aclose()
+
+app = FastAPI(title="Tavily Company Research API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,10 +84,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 manager = WebSocketManager()
-pdf_service = PDFService({"pdf_output_dir": "pdfs"})
+pdf_service = PDFService({
+    "pdf_output_dir": "pdfs",
+    "pdf_cache_max_bytes": int(os.getenv("PDF_CACHE_MAX_BYTES", 200 * 1024 * 1024)),
+    "pdf_cache_max_entries": int(os.getenv("PDF_CACHE_MAX_ENTRIES", 500))
+})
 
 job_status = defaultdict(lambda: {
     "status": "pending",
@@ -52,19 +104,79 @@ job_status = defaultdict(lambda: {
     "last_update": datetime.now().isoformat()
 })
 
+# Render the PDF as soon as a report lands, since it is nearly always downloaded next.
+prerender_pdfs = os.getenv("PDF_PRERENDER", "true").lower() in ("1", "true", "yes")
+
+# Checkpoints of completed jobs are deleted unless they are kept for inspection
+keep_completed_checkpoints = os.getenv("CHECKPOINT_KEEP_COMPLETED", "false").lower() in ("1", "true", "yes")
+
+# Jobs currently executing in this process, so a job is never resumed twice at once
+running_jobs = set()
+
+# Expired checkpoints of jobs never resumed are pruned after a job ends, at most hourly
+checkpoint_prune_interval = 3600
+last_checkpoint_prune = None
+
+# Jobs of every research batch share one concurrency budget
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", 8))
+batch_max_companies = int(os.getenv("BATCH_MAX_COMPANIES", 1000))
+batch_slots = asyncio.Semaphore(batch_concurrency)
+batches = {}
+
+# Identical requests made while a job is running attach to it instead of starting another
+coalesce_requests = os.getenv("COALESCE_REQUESTS", "true").lower() in ("1", "true", "yes")
+# Running job IDs by the normalized request that started them
+in_flight_jobs = {}
+
+metrics.REGISTRY.gauge(
+    "research_active_jobs", "Research jobs currently running.",
+    callback=lambda: len(running_jobs)
+)
+metrics.REGISTRY.gauge(
+    "websocket_connections", "Open WebSocket connections.",
+    callback=lambda: sum(len(connections) for connections in manager.active_connections.values())
+)
+metrics.REGISTRY.gauge(
+    "rate_limiter_queue_depth", "Provider calls waiting for the shared rate limiter.", ["provider"],
+    callback=lambda: {(key,): stats["queued"] for key, stats in get_rate_limiter().stats().items()}
+)
+metrics.REGISTRY.gauge(
+    "provider_circuit_open", "Whether a provider's circuit breaker is open (1) or half open (0.5).", ["provider"],
+    callback=lambda: {
+        (key,): {"closed": 0, "half_open": 0.5, "open": 1}[breaker["state"]]
+        for key, breaker in breaker_states().items()
+    }
+)
+
 mongodb = None
 if mongo_uri := os.getenv("MONGODB_URI"):
     try:
+        from backend.services.mongodb import MongoDBService
         mongodb = MongoDBService(mongo_uri)
         logger.info("MongoDB integration enabled")
     except Exception as e:
         logger.warning(f"Failed to initialize MongoDB: {e}. Continuing without persistence.")
 
+# Recent reports by company and profile, and the requests waiting on a background refresh of one
+report_cache = ReportCache(mongodb)
+refresh_waiters = defaultdict(set)
+# The research behind each company's latest report, which delta refreshes start from
+snapshot_store = SnapshotStore(mongodb)
+
 class ResearchRequest(BaseModel):
     company: str
     company_url: str | None = None
     industry: str | None = None
     hq_location: str | None = None
+    # fast: templated queries and one editor pass; deep: more queries and advanced search
+    profile: ProfileName = DEFAULT_PROFILE
+    # Answer from a recent report on the same company and profile if there is one
+    use_cache: bool = True
+    # delta: refresh the last report on the company, searching only for news since it
+    mode: Literal["full", "delta"] = "full"
+
+class BatchRequest(BaseModel):
+    companies: list[ResearchRequest]
 
 class PDFGenerationRequest(BaseModel):
     report_content: str
@@ -78,19 +190,50 @@ async def preflight():
     response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
     return response
 
+def request_key(data: ResearchRequest) -> str:
+    """Normalize a request's inputs so that trivially different spellings match."""
+    return report_key(data.company, data.company_url, data.industry, data.hq_location, data.profile)
+
+def attach_to_job(job_id: str, execution_id: str, data: ResearchRequest):
+    """Give a new job ID the WebSocket stream, status and report of a job already running."""
+    manager.attach(job_id, execution_id)
+    # Both IDs share one status entry, so either sees the report and pre-rendered PDF
+    job_status[job_id] = job_status[execution_id]
+    if mongodb:
+        try:
+            mongodb.create_job(job_id, {**data.dict(), "attached_to": execution_id})
+        except Exception as e:
+            logger.warning(f"Failed to record attached job {job_id}: {e}")
+
 @app.post("/research")
 async def research(data: ResearchRequest):
     try:
         logger.info(f"Received research request for {data.company}")
         job_id = str(uuid.uuid4())
-        asyncio.create_task(process_research(job_id, data))
+        key = request_key(data)
+        content = {"status": "accepted", "job_id": job_id, "websocket_url": f"/research/ws/{job_id}"}
+        if data.use_cache and data.mode == "full" and (cached := report_cache.get(key)):
+            refreshing = serve_cached_report(job_id, key, cached, data)
+            metrics.RESEARCH_REQUESTS.inc(outcome="cached")
+            content.update(
+                status="completed",
+                message="Served a recent report" + (", refreshing it in the background" if refreshing else ""),
+                report=cached["report"],
+                cached=True,
+                report_age_seconds=round(cached["age_seconds"]),
+                refreshing=refreshing
+            )
+        elif coalesce_requests and (execution_id := in_flight_jobs.get(key)):
+            attach_to_job(job_id, execution_id, data)
+            metrics.RESEARCH_REQUESTS.inc(outcome="coalesced")
+            content["message"] = "Identical research is already running; attached to it. Connect to WebSocket for updates."
+        else:
+            in_flight_jobs[key] = job_id
+            asyncio.create_task(process_research(job_id, data))
+            metrics.RESEARCH_REQUESTS.inc(outcome="started")
+            content["message"] = "Research started. Connect to WebSocket for updates."
 
-        response = JSONResponse(content={
-            "status": "accepted",
-            "job_id": job_id,
-            "message": "Research started. Connect to WebSocket for updates.",
-            "websocket_url": f"/research/ws/{job_id}"
-        })
+        response = JSONResponse(content=content)
         response.headers["Access-Control-Allow-Origin"] = "*"
         response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
         response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
@@ -100,26 +243,99 @@ async def research(data: ResearchRequest):
         logger.error(f"Error initiating research: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_research(job_id: str, data: ResearchRequest):
+def serve_cached_report(job_id: str, key: str, cached: dict, data: ResearchRequest) -> bool:
+    """Complete a job with a cached report, refreshing the report if it is stale.
+
+    Returns whether a refresh is running; its report is pushed to the job when it lands.
+    """
+    result = {
+        "report": cached["report"],
+        "company": data.company,
+        "cached": True,
+        "report_age_seconds": round(cached["age_seconds"])
+    }
+    job_status[job_id].update({
+        "status": "completed",
+        "report": cached["report"],
+        "company": data.company,
+        "result": result,
+        "last_update": datetime.now().isoformat()
+    })
+    source = job_status.get(cached["job_id"], {})
+    job_status[job_id].update({field: source[field] for field in ("pdf_url", "pdf_filename", "pdf_etag") if field in source})
+    if mongodb:
+        try:
+            mongodb.create_job(job_id, {**data.dict(), "cached_from": cached["job_id"]})
+            mongodb.update_job(job_id=job_id, status="completed")
+            mongodb.store_report(job_id=job_id, report_data={"report": cached["report"], "company": data.company})
+        except Exception as e:
+            logger.warning(f"Failed to record cached job {job_id}: {e}")
+    logger.info(f"Served job {job_id} from the report of job {cached['job_id']} ({cached['age_seconds']:.0f}s old)")
+
+    if not cached["stale"]:
+        return False
+    if not (execution_id := in_flight_jobs.get(key)):
+        execution_id = str(uuid.uuid4())
+        in_flight_jobs[key] = execution_id
+        asyncio.create_task(process_research(execution_id, data.model_copy(update={"mode": "delta"})))
+        logger.info(f"Refreshing the report for {data.company} in job {execution_id}")
+    refresh_waiters[execution_id].add(job_id)
+    return True
+
+async def process_research(job_id: str, data: ResearchRequest, resume: bool = False, connect_wait: float = 1):
+    running_jobs.add(job_id)
+    key = request_key(data)
+    trace = Trace(job_id)
+    report_stored = False
+    report_content = None
+    error_message = None
     try:
         if mongodb:
-            mongodb.create_job(job_id, data.dict())
-        await asyncio.sleep(1)  # Allow WebSocket connection
+            if resume:
+                mongodb.update_job(job_id=job_id, status="processing")
+            else:
+                mongodb.create_job(job_id, data.dict())
+        await asyncio.sleep(connect_wait)  # Allow WebSocket connection
+
+        await manager.send_status_update(
+            job_id,
+            status="processing",
+            message="Resuming research from the last completed step" if resume else "Starting research"
+        )
+
+        from backend.graph import Graph
+        from backend.services.checkpointer import create_document_store, delete_checkpoints
 
-        await manager.send_status_update(job_id, status="processing", message="Starting research")
+        baseline = None
+        if data.mode == "delta" and not resume:
+            if baseline := snapshot_store.get(key):
+                logger.info(f"Delta refresh of {data.company} from research completed at {baseline['completed_at']}")
+            else:
+                logger.info(f"No earlier research on {data.company} to refresh; running full research")
 
+        saver = await get_checkpointer()
         graph = Graph(
             company=data.company,
             url=data.company_url,
             industry=data.industry,
             hq_location=data.hq_location,
             websocket_manager=manager,
-            job_id=job_id
+            job_id=job_id,
+            checkpointer=saver,
+            doc_store=create_document_store(job_id, saver, mongodb),
+            trace=trace,
+            profile=data.profile,
+            baseline=baseline
         )
 
         state = {}
-        async for s in graph.run(thread={}):
-            state.update(s)
+        # Every node's updates merged in order, for the research snapshot
+        values = {}
+        with use_trace(trace), span("research", company=data.company, resume=resume, delta=bool(baseline)):
+            async for s in graph.run(thread={}, resume=resume):
+                state.update(s)
+                for update in s.values():
+                    values.update(update or {})
         
         # Look for the compiled report in either location.
         report_content = state.get('report') or (state.get('editor') or {}).get('report')
@@ -131,9 +347,23 @@ async def process_research(job_id: str, data: ResearchRequest):
                 "company": data.company,
                 "last_update": datetime.now().isoformat()
             })
+            report_cache.set(key, job_id, data.company, report_content)
+            if not resume:
+                # A resumed run only saw the nodes after its checkpoint
+                store_snapshot(key, values, graph.doc_store, data.profile)
             if mongodb:
                 mongodb.update_job(job_id=job_id, status="completed")
-                mongodb.store_report(job_id=job_id, report_data={"report": report_content})
+                mongodb.store_report(job_id=job_id, report_data={
+                    "report": report_content,
+                    "company": data.company,
+                    "cache_key": key
+                })
+                report_stored = True
+            if prerender_pdfs:
+                asyncio.create_task(prerender_pdf(job_id, report_content, data.company))
+            metrics.JOBS.inc(status="completed")
+            if saver and not keep_completed_checkpoints:
+                asyncio.create_task(delete_checkpoints(saver, graph.doc_store, job_id))
             await manager.send_status_update(
                 job_id=job_id,
                 status="completed",
@@ -152,6 +382,8 @@ async def process_research(job_id: str, data: ResearchRequest):
             if error := state.get('error'):
                 error_message = f"Error: {error}"
             
+            metrics.JOBS.inc(status="failed")
+            job_status[job_id].update(status="failed", error=error_message, last_update=datetime.now().isoformat())
             await manager.send_status_update(
                 job_id=job_id,
                 status="failed",
@@ -161,6 +393,9 @@ async def process_research(job_id: str, data: ResearchRequest):
 
     except Exception as e:
         logger.error(f"Research failed: {str(e)}")
+        error_message = str(e)
+        metrics.JOBS.inc(status="failed")
+        job_status[job_id].update(status="failed", error=error_message, last_update=datetime.now().isoformat())
         await manager.send_status_update(
             job_id=job_id,
             status="failed",
@@ -169,16 +404,315 @@ async def process_research(job_id: str, data: ResearchRequest):
         )
         if mongodb:
             mongodb.update_job(job_id=job_id, status="failed", error=str(e))
+    finally:
+        running_jobs.discard(job_id)
+        if in_flight_jobs.get(key) == job_id:
+            del in_flight_jobs[key]
+        await publish_trace(job_id, trace, report_stored)
+        settle_attached_jobs(job_id, report_content, error_message)
+        await deliver_refreshed_report(job_id, report_content, data.company)
+        asyncio.create_task(prune_expired_checkpoints())
+
+async def prune_expired_checkpoints():
+    """Delete the checkpoints and documents of failed jobs whose checkpoints have expired."""
+    global last_checkpoint_prune
+    now = time.monotonic()
+    if last_checkpoint_prune is not None and now - last_checkpoint_prune < checkpoint_prune_interval:
+        return
+    last_checkpoint_prune = now
+    try:
+        from backend.services.checkpointer import prune_checkpoints
+        await prune_checkpoints(await get_checkpointer(), active=running_jobs)
+    except Exception as e:
+        logger.warning(f"Failed to prune expired checkpoints: {e}")
+
+async def deliver_refreshed_report(job_id: str, report_content: str | None, company: str):
+    """Push a background refresh's report to the jobs that were served the stale one."""
+    waiting = refresh_waiters.pop(job_id, set())
+    if not report_content:
+        # They keep the stale report
+        return
+    for waiting_id in waiting:
+        try:
+            result = {"report": report_content, "company": company, "cached": False}
+            status = job_status[waiting_id]
+            status.update(report=report_content, result=result, last_update=datetime.now().isoformat())
+            # The stale report's PDF no longer matches
+            for field in ("pdf_url", "pdf_filename", "pdf_etag"):
+                status.pop(field, None)
+            if mongodb:
+                mongodb.update_report(waiting_id, {"report_content": report_content})
+            await manager.send_status_update(
+                job_id=waiting_id,
+                status="report_refreshed",
+                message="A newer report is available",
+                result=result
+            )
+        except Exception as e:
+            logger.warning(f"Failed to deliver refreshed report to job {waiting_id}: {e}")
+
+def store_snapshot(key: str, values: dict, doc_store, profile: str):
+    """Keep the research behind a finished report for the next delta refresh."""
+    try:
+        snapshot_store.set(key, build_snapshot(values, doc_store, get_profile(profile).max_doc_length))
+    except Exception as e:
+        logger.warning(f"Failed to snapshot research: {e}")
+
+def settle_attached_jobs(job_id: str, report_content: str | None, error_message: str | None):
+    """Record the outcome of a job for the requests that attached to it."""
+    attached = manager.detach(job_id)
+    if not attached:
+        return
+    logger.info(f"Job {job_id} served {len(attached)} attached request(s)")
+    if not mongodb:
+        return
+    for attached_id in attached:
+        try:
+            if report_content:
+                mongodb.update_job(job_id=attached_id, status="completed")
+                mongodb.store_report(job_id=attached_id, report_data={"report": report_content})
+            else:
+                mongodb.update_job(job_id=attached_id, status="failed", error=error_message or "No report found")
+        except Exception as e:
+            logger.warning(f"Failed to record outcome of attached job {attached_id}: {e}")
+
+async def publish_trace(job_id: str, trace: Trace, report_stored: bool):
+    """Send the job's timing waterfall as the final WebSocket event and keep it for later diagnosis."""
+    try:
+        trace_data = trace.to_dict()
+        job_status[job_id]["trace"] = trace_data
+        await manager.broadcast_to_job(job_id, {"type": "trace", "data": trace_data})
+        if mongodb:
+            if report_stored:
+                mongodb.update_report(job_id, {"trace": trace_data})
+            else:
+                mongodb.update_job(job_id=job_id, result={"trace": trace_data})
+        logger.info(f"Job {job_id} trace: {len(trace_data['spans'])} spans over {trace_data['duration_ms']:.0f}ms")
+    except Exception as e:
+        logger.warning(f"Failed to publish trace for job {job_id}: {e}")
+
+async def prerender_pdf(job_id: str, report_content: str, company: str):
+    """Render a completed report's PDF in a worker thread and record where to fetch it."""
+    try:
+        success, result = await asyncio.to_thread(pdf_service.generate_pdf_file, report_content, company)
+        if not success:
+            logger.warning(f"PDF pre-render failed for job {job_id}: {result}")
+            return
+
+        pdf_path, filename, etag = result
+        pdf_info = {
+            "pdf_url": f"/research/pdf/{os.path.basename(pdf_path)}",
+            "pdf_filename": filename,
+            "pdf_etag": etag
+        }
+        job_status[job_id].update(pdf_info)
+        if mongodb:
+            mongodb.update_report(job_id, pdf_info)
+        logger.info(f"Pre-rendered PDF for job {job_id} at {pdf_info['pdf_url']}")
+    except Exception as e:
+        logger.warning(f"PDF pre-render failed for job {job_id}: {e}")
+
+@app.post("/research/{job_id}/resume")
+async def resume_research(job_id: str):
+    """Continue a failed or interrupted job from its last checkpointed node."""
+    saver = await get_checkpointer()
+    if not saver:
+        raise HTTPException(status_code=501, detail="Checkpointing not configured")
+    if job_id in running_jobs:
+        raise HTTPException(status_code=409, detail="Research job is already running")
+    # Claim the job before the first await, so a concurrent resume sees it as running
+    running_jobs.add(job_id)
+
+    try:
+        from backend.graph import Graph
+        from backend.services.checkpointer import create_document_store
+
+        graph = Graph(job_id=job_id, checkpointer=saver, doc_store=create_document_store(job_id, saver, mongodb))
+        checkpoint = await graph.get_checkpoint_state()
+        if not checkpoint:
+            raise HTTPException(status_code=404, detail="No checkpoint found for research job")
+        if checkpoint.get("report"):
+            raise HTTPException(status_code=409, detail="Research job already completed")
+
+        # The job's inputs are part of the checkpointed state
+        data = ResearchRequest(
+            company=checkpoint["company"],
+            company_url=checkpoint.get("company_url"),
+            industry=checkpoint.get("industry"),
+            hq_location=checkpoint.get("hq_location"),
+            profile=checkpoint.get("profile") or DEFAULT_PROFILE
+        )
+    except BaseException:
+        running_jobs.discard(job_id)
+        raise
+    logger.info(f"Resuming research job {job_id} for {data.company}")
+    asyncio.create_task(process_research(job_id, data, resume=True))
+
+    return {
+        "status": "accepted",
+        "job_id": job_id,
+        "message": "Research resumed. Connect to WebSocket for updates.",
+        "websocket_url": f"/research/ws/{job_id}"
+    }
+
+@app.post("/research/batch")
+async def research_batch(data: BatchRequest):
+    """Research a list of companies as one batch.
+
+    Member jobs run under the shared BATCH_CONCURRENCY budget and share search and
+    extract results. The batch's WebSocket receives aggregate progress and each
+    report as it completes.
+    """
+    if not data.companies:
+        raise HTTPException(status_code=400, detail="No companies to research")
+    if len(data.companies) > batch_max_companies:
+        raise HTTPException(status_code=400, detail=f"A batch can research at most {batch_max_companies} companies")
+
+    batch_id = str(uuid.uuid4())
+    members = {}
+    for member in data.companies:
+        # A company listed twice is researched once
+        members.setdefault(request_key(member), member)
+
+    batch = {
+        "batch_id": batch_id,
+        "status": "processing",
+        "duplicates": len(data.companies) - len(members),
+        "jobs": [
+            {"job_id": str(uuid.uuid4()), "company": member.company, "status": "queued"}
+            for member in members.values()
+        ],
+        "created_at": datetime.now().isoformat()
+    }
+    batches[batch_id] = batch
+    logger.info(f"Received research batch {batch_id} of {len(members)} companies")
+    asyncio.create_task(run_batch(batch, list(members.values())))
+
+    return {
+        "status": "accepted",
+        "batch_id": batch_id,
+        "jobs": batch["jobs"],
+        "duplicates": batch["duplicates"],
+        "message": "Batch started. Connect to WebSocket for progress and reports.",
+        "websocket_url": f"/research/ws/{batch_id}"
+    }
+
+def batch_summary(batch: dict) -> dict:
+    """A batch's status and member job counts by status."""
+    counts = defaultdict(int)
+    for entry in batch["jobs"]:
+        counts[entry["status"]] += 1
+    return {
+        "batch_id": batch["batch_id"],
+        "status": batch["status"],
+        "total": len(batch["jobs"]),
+        **{status: counts[status] for status in ("queued", "running", "completed", "failed")},
+        "cached": sum(1 for entry in batch["jobs"] if entry.get("cached"))
+    }
+
+async def publish_batch_progress(batch: dict):
+    await manager.broadcast_to_job(batch["batch_id"], {"type": "batch_progress", "data": batch_summary(batch)})
+
+async def run_batch(batch: dict, members: list[ResearchRequest]):
+    """Run a batch's member jobs with one search cache between them."""
+    search_cache = SearchCache()
+    start = datetime.now()
+    # Tasks created in this block inherit the cache
+    with use_search_cache(search_cache):
+        await asyncio.gather(*[
+            run_batch_member(batch, entry, member) for entry, member in zip(batch["jobs"], members)
+        ])
+    batch["status"] = "completed"
+    batch["search_cache"] = search_cache.stats()
+    summary = batch_summary(batch)
+    logger.info(
+        f"Batch {batch['batch_id']}: {summary['completed']}/{summary['total']} completed "
+        f"in {(datetime.now() - start).total_seconds():.0f}s, search cache {batch['search_cache']}"
+    )
+    await manager.broadcast_to_job(batch["batch_id"], {"type": "batch_complete", "data": summary})
+
+async def run_batch_member(batch: dict, entry: dict, member: ResearchRequest):
+    job_id = entry["job_id"]
+    try:
+        key = request_key(member)
+        if member.use_cache and member.mode == "full" and (cached := report_cache.get(key)):
+            serve_cached_report(job_id, key, cached, member)
+            entry["cached"] = True
+            metrics.RESEARCH_REQUESTS.inc(outcome="cached")
+        else:
+            async with batch_slots:
+                entry["status"] = "running"
+                await publish_batch_progress(batch)
+                metrics.RESEARCH_REQUESTS.inc(outcome="batch")
+                # Nobody connects to a member job's WebSocket, so it starts right away
+                await process_research(job_id, member, connect_wait=0)
+    except Exception as e:
+        logger.error(f"Batch job {job_id} for {member.company} failed: {e}")
+
+    status = job_status[job_id]
+    entry["status"] = "completed" if status.get("report") else "failed"
+    await manager.broadcast_to_job(batch["batch_id"], {
+        "type": "batch_report",
+        "data": {
+            "job_id": job_id,
+            "company": member.company,
+            "status": entry["status"],
+            "report": status.get("report"),
+            "error": status.get("error"),
+            "cached": entry.get("cached", False)
+        }
+    })
+    await publish_batch_progress(batch)
+
+@app.get("/research/batch/{batch_id}")
+async def get_research_batch(batch_id: str):
+    if not (batch := batches.get(batch_id)):
+        raise HTTPException(status_code=404, detail="Research batch not found")
+    return {**batch_summary(batch), "jobs": batch["jobs"], "search_cache": batch.get("search_cache")}
+
 @app.get("/")
 async def ping():
     return {"message": "Alive"}
 
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check an If-None-Match request header against a response ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def pdf_response(request: Request, pdf_path: str, filename: str, etag: str) -> Response:
+    """Serve a PDF with its ETag, or a 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(pdf_path, media_type='application/pdf', filename=filename, headers=headers)
+
 @app.get("/research/pdf/{filename}")
-async def get_pdf(filename: str):
-    pdf_path = os.path.join("pdfs", filename)
+async def get_pdf(filename: str, request: Request):
+    filename = os.path.basename(filename)
+    pdf_path = os.path.join(pdf_service.output_dir, filename)
     if not os.path.exists(pdf_path):
         raise HTTPException(status_code=404, detail="PDF not found")
-    return FileResponse(pdf_path, media_type='application/pdf', filename=filename)
+
+    key = os.path.splitext(filename)[0]
+    if pdf_service.get_cached_pdf(key):
+        etag = f'"{key}"'
+    else:
+        stat = os.stat(pdf_path)
+        etag = f'"{int(stat.st_mtime)}-{stat.st_size}"'
+    return pdf_response(request, pdf_path, filename, etag)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Node, provider, job and WebSocket metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/rate-limits")
+async def rate_limits():
+    """Provider rate limits and how long calls have waited for them."""
+    return get_rate_limiter().stats()
 
 @app.websocket("/research/ws/{job_id}")
 async def websocket_endpoint(websocket: WebSocket, job_id: str):
@@ -186,7 +720,9 @@ async def websocket_endpoint(websocket: WebSocket, job_id: str):
         await websocket.accept()
         await manager.connect(websocket, job_id)
 
-        if job_id in job_status:
+        if batch := batches.get(job_id):
+            await manager.broadcast_to_job(job_id, {"type": "batch_progress", "data": batch_summary(batch)})
+        elif job_id in job_status:
             status = job_status[job_id]
             await manager.send_status_update(
                 job_id,
@@ -222,30 +758,42 @@ async def get_research_report(job_id: str):
         if job_id in job_status:
             result = job_status[job_id]
             if report := result.get("report"):
-                return {"report": report}
+                response = {"report": report}
+                if pdf_url := result.get("pdf_url"):
+                    response.update(pdf_url=pdf_url, pdf_filename=result.get("pdf_filename"))
+                return response
         raise HTTPException(status_code=404, detail="Report not found")
     
     report = mongodb.get_report(job_id)
     if not report:
         raise HTTPException(status_code=404, detail="Research report not found")
+    if "pdf_url" not in report and (pdf_url := job_status.get(job_id, {}).get("pdf_url")):
+        report["pdf_url"] = pdf_url
     return report
 
 @app.post("/generate-pdf")
-async def generate_pdf(data: PDFGenerationRequest):
-    """Generate a PDF from markdown content and stream it to the client."""
+async def generate_pdf(data: PDFGenerationRequest, request: Request):
+    """Generate a PDF from markdown content and send it to the client.
+
+    Renders are cached by content hash, so repeat downloads of the same report
+    are served from disk, or answered with a 304 when the client sends a matching
+    If-None-Match header.
+    """
     try:
-        success, result = pdf_service.generate_pdf_stream(data.report_content, data.company_name)
+        etag = f'"{pdf_service.cache_key(data.report_content)}"'
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        success, result = await asyncio.to_thread(
+            pdf_service.generate_pdf_file, data.report_content, data.company_name
+        )
         if success:
-            pdf_buffer, filename = result
-            return StreamingResponse(
-                pdf_buffer,
-                media_type='application/pdf',
-                headers={
-                    'Content-Disposition': f'attachment; filename="{filename}"'
-                }
-            )
+            pdf_path, filename, etag = result
+            return pdf_response(request, pdf_path, filename, etag)
         else:
             raise HTTPException(status_code=500, detail=result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
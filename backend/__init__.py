@@ -27,6 +27,12 @@ if not os.getenv("OPENAI_API_KEY"):
 if not os.getenv("GEMINI_API_KEY"):
     logger.warning("GEMINI_API_KEY environment variable is not set.")
 
-from .graph import Graph
-
 __all__ = ["Graph"]
+
+
+def __getattr__(name):
+    # Import the graph (LangGraph, LangChain) on first use to keep startup fast
+    if name == "Graph":
+        from .graph import Graph
+        return Graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,4 @@
+from .profiles import PROFILES, ResearchProfile, get_profile
 from .state import InputState, ResearchState
 
-__all__ = ["InputState", "ResearchState"] 
\ No newline at end of file
+__all__ = ["InputState", "ResearchState", "ResearchProfile", "PROFILES", "get_profile"] 
\ No newline at end of file
@@ -0,0 +1,56 @@
+from typing import Dict, Literal, Optional
+
+ProfileName = Literal["fast", "balanced", "deep"]
+
+
+class ResearchProfile:
+    """How much searching and generation a research job does.
+
+    The profile name is part of the job's input state, and each node looks up
+    its settings with get_profile(state.get("profile")).
+    """
+
+    def __init__(self, name: str, query_generation: str, queries_per_analyst: int, search_depth: str,
+                 max_results: int, extract_depth: str, max_doc_length: int, editor_passes: int,
+                 site_pages: int = 0):
+        self.name = name
+        # "llm" plans queries with the QueryPlanner; "template" fills in each analyst's query templates
+        self.query_generation = query_generation
+        self.queries_per_analyst = queries_per_analyst
+        self.search_depth = search_depth
+        self.max_results = max_results
+        self.extract_depth = extract_depth
+        # Characters of each document passed to a briefing
+        self.max_doc_length = max_doc_length
+        # 1 compiles the report only; 2 adds the editor's cleanup and formatting sweep
+        self.editor_passes = editor_passes
+        # Company website pages grounding crawls beyond the homepage; 0 extracts the homepage only.
+        # Analysts skip queries answered by pages crawled before they search, so which
+        # searches run depends on timing and can differ between runs of the same company.
+        self.site_pages = site_pages
+
+
+PROFILES: Dict[str, ResearchProfile] = {
+    # Screening many companies: no query LLM call, fewer results, one editor pass
+    "fast": ResearchProfile(
+        "fast", query_generation="template", queries_per_analyst=3, search_depth="basic",
+        max_results=3, extract_depth="basic", max_doc_length=4000, editor_passes=1
+    ),
+    "balanced": ResearchProfile(
+        "balanced", query_generation="llm", queries_per_analyst=4, search_depth="basic",
+        max_results=5, extract_depth="basic", max_doc_length=8000, editor_passes=2
+    ),
+    # Thorough research: more queries, advanced search and extraction, longer documents,
+    # and a crawl of the company website's key pages
+    "deep": ResearchProfile(
+        "deep", query_generation="llm", queries_per_analyst=6, search_depth="advanced",
+        max_results=8, extract_depth="advanced", max_doc_length=12000, editor_passes=2, site_pages=5
+    ),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: Optional[str] = None) -> ResearchProfile:
+    """Settings for a profile name, falling back to the balanced profile."""
+    return PROFILES.get(name or DEFAULT_PROFILE, PROFILES[DEFAULT_PROFILE])
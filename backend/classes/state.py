@@ -1,5 +1,8 @@
-from typing import TypedDict, NotRequired, Required, Dict, List, Any
-from backend.services.websocket_manager import WebSocketManager
+import operator
+from typing import Annotated, Any, Dict, List, NotRequired, Required, TypedDict
+
+# Runtime services (the WebSocket manager and the per-job DocumentStore) are not
+# part of the state; Graph.run passes them to nodes through config["configurable"].
 
 #Define the input state
 class InputState(TypedDict, total=False):
@@ -7,12 +10,21 @@ class InputState(TypedDict, total=False):
     company_url: NotRequired[str]
     hq_location: NotRequired[str]
     industry: NotRequired[str]
-    websocket_manager: NotRequired[WebSocketManager]
     job_id: NotRequired[str]
+    # Research profile name: "fast", "balanced" (default) or "deep"; see profiles.py
+    profile: NotRequired[str]
+    # Previous research on the company for a delta refresh, from services/snapshots.py:
+    # completed_at, analyst_queries, curated documents by field and URL, and briefings
+    baseline: NotRequired[Dict[str, Any]]
 
 class ResearchState(InputState):
+    # Nodes return only the keys they change; messages are appended, not copied
     site_scrape: Dict[str, Any]
-    messages: List[Any]
+    # Other company website pages grounding crawled, by URL, each with its page_type
+    site_pages: Dict[str, Any]
+    # Search queries per research category ("company", "news", ...), from the QueryPlanner
+    analyst_queries: Dict[str, List[str]]
+    messages: Annotated[List[Any], operator.add]
     financial_data: Dict[str, Any]
     news_data: Dict[str, Any]
     industry_data: Dict[str, Any]
@@ -26,5 +38,8 @@ class ResearchState(InputState):
     industry_briefing: str
     company_briefing: str
     references: List[str]
+    reference_titles: Dict[str, str]
+    reference_info: Dict[str, Dict[str, Any]]
     briefings: Dict[str, Any]
-    report: str
\ No newline at end of file
+    report: str
+    error: str
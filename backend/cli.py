@@ -0,0 +1,241 @@
+"""Research a list of companies from the command line, without the web server.
+
+Reads companies from a CSV file with a header row, or from a JSONL file. Each row
+has `company` and, optionally, `company_url` (or `url`), `industry`, `hq_location`
+and `profile`. The research graph runs for each company with bounded concurrency
+under the usual provider rate limits, and writes <name>.md, <name>.pdf and
+<name>.trace.json for each company to the output directory. Companies in one run
+share search and extract results, as in a batch from POST /research/batch.
+
+Each finished company is appended to manifest.jsonl in the output directory. A
+rerun skips the companies it lists as completed, so an interrupted run continues
+where it stopped and failed companies are retried.
+
+Usage:
+    python -m backend.cli companies.csv --out reports [--concurrency 4] [--profile fast]
+        [--rate-limits "openai.gpt-4.1=rpm:500,tpm:30000"] [--no-pdf]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from .classes.profiles import DEFAULT_PROFILE, PROFILES
+from .services.report_cache import report_key
+from .services.search_cache import SearchCache, use_search_cache
+from .services.tracing import Trace
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.jsonl"
+
+
+def _jsonl_rows(lines) -> List[Any]:
+    """Values of a JSONL file's non-blank lines, with None for lines that are not valid JSON."""
+    rows = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError:
+            rows.append(None)
+    return rows
+
+
+def read_companies(path: str) -> List[Dict[str, Any]]:
+    """Rows of a CSV or JSONL file, with `url` accepted for `company_url`.
+
+    Values are read as text, so a JSONL row may hold numbers or nulls; rows that are
+    not objects or have no company are skipped with a warning.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = _jsonl_rows(f)
+        else:
+            rows = list(csv.DictReader(f))
+    companies = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            logger.warning(f"Skipping row {number}: {'not valid JSON' if row is None else 'not an object'}")
+            continue
+        row = {
+            key.strip().lower(): "" if value is None else str(value).strip()
+            for key, value in row.items() if key
+        }
+        if not row.get("company"):
+            logger.warning(f"Skipping row {number}: no company")
+            continue
+        row.setdefault("company_url", row.pop("url", ""))
+        companies.append(row)
+    return companies
+
+
+def output_name(row: Dict[str, Any], key: str) -> str:
+    """File name stem for a company, made unique by its research key."""
+    slug = re.sub(r"[^a-z0-9]+", "-", row["company"].lower()).strip("-")[:60] or "company"
+    return f"{slug}-{key[:8]}"
+
+
+def completed_keys(out_dir: Path) -> set:
+    """Keys of the companies a previous run finished, from the manifest."""
+    done = set()
+    manifest = out_dir / MANIFEST
+    if manifest.exists():
+        for line in manifest.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut off by an interruption
+                continue
+            if entry.get("status") == "completed" and (out_dir / f"{entry['name']}.md").exists():
+                done.add(entry["key"])
+    return done
+
+
+async def research_company(row: Dict[str, Any], key: str, out_dir: Path, pdf: bool) -> Dict[str, Any]:
+    from .graph import Graph
+
+    name = output_name(row, key)
+    trace = Trace(name)
+    start = time.perf_counter()
+    state: Dict[str, Any] = {}
+    error = None
+    try:
+        graph = Graph(
+            company=row["company"],
+            url=row.get("company_url") or None,
+            industry=row.get("industry") or None,
+            hq_location=row.get("hq_location") or None,
+            job_id=name,
+            trace=trace,
+            profile=row["profile"]
+        )
+        async for update in graph.run(thread={}):
+            state.update(update)
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Research failed for {row['company']}: {e}")
+    seconds = time.perf_counter() - start
+
+    report = (state.get("editor") or {}).get("report")
+    files = []
+    try:
+        (out_dir / f"{name}.trace.json").write_text(json.dumps(trace.to_dict(), indent=2), encoding="utf-8")
+        files.append(f"{name}.trace.json")
+        if report:
+            (out_dir / f"{name}.md").write_text(report, encoding="utf-8")
+            files.append(f"{name}.md")
+    except Exception as e:
+        # The row is recorded as failed, so the next run researches the company again
+        report, error = None, f"Could not write output: {e}"
+        logger.error(f"Writing output failed for {row['company']}: {e}")
+    if report and pdf:
+        from .utils.utils import generate_pdf_from_md
+        try:
+            await asyncio.to_thread(generate_pdf_from_md, report, str(out_dir / f"{name}.pdf"))
+            files.append(f"{name}.pdf")
+        except Exception as e:
+            logger.error(f"PDF rendering failed for {row['company']}: {e}")
+
+    return {
+        "key": key,
+        "name": name,
+        "company": row["company"],
+        "profile": row["profile"],
+        "status": "completed" if report else "failed",
+        "error": None if report else error or "No report generated",
+        "seconds": round(seconds, 2),
+        "files": files,
+    }
+
+
+async def run(companies: List[Dict[str, Any]], out_dir: Path, concurrency: int, pdf: bool) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict[str, Any]] = []
+    manifest = open(out_dir / MANIFEST, "a", encoding="utf-8")
+
+    async def research(row: Dict[str, Any], key: str) -> None:
+        async with semaphore:
+            result = await research_company(row, key, out_dir, pdf)
+        results.append(result)
+        manifest.write(json.dumps(result) + "\n")
+        manifest.flush()
+        print(f"[{len(results)}/{len(companies)}] {result['company']}: {result['status']} "
+              f"in {result['seconds']:.1f}s", flush=True)
+
+    try:
+        # Companies in one run share identical searches and extracts
+        with use_search_cache(SearchCache()):
+            await asyncio.gather(*[research(row, row["key"]) for row in companies])
+    finally:
+        manifest.close()
+    return results
+
+
+def summarize(results: List[Dict[str, Any]], skipped: int, elapsed: float) -> None:
+    completed = [r for r in results if r["status"] == "completed"]
+    print(f"\n{len(completed)} completed, {len(results) - len(completed)} failed, "
+          f"{skipped} skipped as done or repeated, in {elapsed / 60:.1f} min")
+    if not results:
+        return
+    times = sorted(r["seconds"] for r in results)
+    p95 = times[max(0, math.ceil(len(times) * 0.95) - 1)]
+    print(f"throughput     {len(completed) / elapsed * 60:.1f} companies/min")
+    print(f"job time       p50 {statistics.median(times):.1f}s  p95 {p95:.1f}s  max {times[-1]:.1f}s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or JSONL file of companies")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--concurrency", type=int, default=4, help="companies researched at once (default: 4)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="research profile for rows that do not set one")
+    parser.add_argument("--rate-limits", help="provider rate limits, in the RATE_LIMITS format")
+    parser.add_argument("--no-pdf", action="store_true", help="skip PDF rendering")
+    parser.add_argument("--verbose", action="store_true", help="show the graph's logs")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent.parent / ".env")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.rate_limits:
+        os.environ["RATE_LIMITS"] = args.rate_limits
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    companies = read_companies(args.input)
+    done = completed_keys(out_dir)
+    pending, seen = [], set()
+    for row in companies:
+        row["profile"] = row.get("profile") if row.get("profile") in PROFILES else args.profile
+        row["key"] = report_key(row["company"], row.get("company_url"), row.get("industry"),
+                                row.get("hq_location"), row["profile"])
+        # Rows finished by an earlier run, and repeats within this one, are skipped
+        if row["key"] not in done and row["key"] not in seen:
+            pending.append(row)
+            seen.add(row["key"])
+    skipped = len(companies) - len(pending)
+
+    print(f"Researching {len(pending)} of {len(companies)} companies, {args.concurrency} at a time, "
+          f"into {out_dir}/", flush=True)
+    start = time.perf_counter()
+    results = asyncio.run(run(pending, out_dir, args.concurrency, not args.no_pdf))
+    summarize(results, skipped, time.perf_counter() - start)
+    return 0 if all(r["status"] == "completed" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,65 @@
+import asyncio
 import logging
-from typing import Any, AsyncIterator, Dict
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
 
-from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 
-from .classes.state import InputState
+from .classes.profiles import DEFAULT_PROFILE
+from .classes.state import InputState, ResearchState
 from .nodes import GroundingNode
 from .nodes.briefing import Briefing
 from .nodes.collector import Collector
 from .nodes.curator import Curator
 from .nodes.editor import Editor
 from .nodes.enricher import Enricher
+from .nodes.query_planner import QueryPlanner
 from .nodes.researchers import (
     CompanyAnalyzer,
     FinancialAnalyst,
     IndustryAnalyzer,
     NewsScanner,
 )
+from .services.document_store import DocumentStore
+from .services.snapshots import restore_snapshot
+from .services.metrics import NODE_DURATION, NODE_ERRORS
+from .services.prefetch import ExtractPrefetcher
+from .services.tracing import Trace, span, use_trace
 
 logger = logging.getLogger(__name__)
 
+def timed_node(name: str, run: Callable[..., Awaitable[Dict[str, Any]]]):
+    """Wrap a node's run method to record its duration and failures, in metrics and the job trace,
+    and write the documents it stored."""
+    async def node(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        start = time.perf_counter()
+        configurable = config.get("configurable", {})
+        trace = configurable.get("trace")
+        try:
+            with use_trace(trace), span(name, type="node"):
+                update = await run(state, config)
+                # Documents the node stored are written before its checkpoint refers to them
+                if (doc_store := configurable.get("doc_store")) is not None:
+                    await doc_store.flush()
+                return update
+        except Exception:
+            NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            NODE_DURATION.observe(time.perf_counter() - start, node=name)
+    return node
+
 class Graph:
     def __init__(self, company=None, url=None, hq_location=None, industry=None,
-                 websocket_manager=None, job_id=None):
+                 websocket_manager=None, job_id=None, checkpointer=None, doc_store=None, trace=None,
+                 profile=None, baseline=None):
         self.websocket_manager = websocket_manager
         self.job_id = job_id
+        # Timing spans for every node and provider call in this run
+        self.trace = trace if trace is not None else Trace(job_id)
+        # Persists each node's output under the job ID so a failed run can resume
+        self.checkpointer = checkpointer
         
         # Initialize InputState
         self.input_state = InputState(
@@ -32,20 +67,39 @@ class Graph:
             company_url=url,
             hq_location=hq_location,
             industry=industry,
-            websocket_manager=websocket_manager,
             job_id=job_id,
-            messages=[
-                SystemMessage(content="Expert researcher starting investigation")
-            ]
+            profile=profile or DEFAULT_PROFILE
         )
 
+        # Large document bodies live here for the duration of the job
+        self.doc_store = doc_store if doc_store is not None else DocumentStore()
+
+        # Work a node starts for a later node to pick up, e.g. the website extraction
+        # grounding starts and the collector waits for
+        self.background_tasks: Dict[str, asyncio.Task] = {}
+        # Company website pages beyond the homepage by URL, filled in as grounding crawls them
+        # so analysts can skip the searches they answer
+        self.site_pages: Dict[str, Dict[str, Any]] = {}
+
+        # A delta refresh starts from the snapshot of the company's last report
+        if baseline:
+            self.input_state["baseline"] = restore_snapshot(baseline, self.doc_store)
+
         # Initialize nodes with WebSocket manager and job ID
         self._init_nodes()
         self._build_workflow()
 
+        # Extractions of search results likely to pass curation, started as the analysts'
+        # searches return and picked up by the enricher
+        self.prefetcher = ExtractPrefetcher(
+            lambda url, category, extract_depth: self.enricher.extract(url, job_id, category, extract_depth),
+            self.curator.relevance_threshold
+        )
+
     def _init_nodes(self):
         """Initialize all workflow nodes"""
         self.ground = GroundingNode()
+        self.query_planner = QueryPlanner()
         self.financial_analyst = FinancialAnalyst()
         self.news_scanner = NewsScanner()
         self.industry_analyst = IndustryAnalyzer()
@@ -58,19 +112,24 @@ class Graph:
 
     def _build_workflow(self):
         """Configure the state graph workflow"""
-        self.workflow = StateGraph(InputState)
+        self.workflow = StateGraph(ResearchState, input=InputState)
         
-        # Add nodes with their respective processing functions
-        self.workflow.add_node("grounding", self.ground.run)
-        self.workflow.add_node("financial_analyst", self.financial_analyst.run)
-        self.workflow.add_node("news_scanner", self.news_scanner.run)
-        self.workflow.add_node("industry_analyst", self.industry_analyst.run)
-        self.workflow.add_node("company_analyst", self.company_analyst.run)
-        self.workflow.add_node("collector", self.collector.run)
-        self.workflow.add_node("curator", self.curator.run)
-        self.workflow.add_node("enricher", self.enricher.run)
-        self.workflow.add_node("briefing", self.briefing.run)
-        self.workflow.add_node("editor", self.editor.run)
+        # Add nodes with their respective processing functions, timed for /metrics
+        nodes = {
+            "grounding": self.ground.run,
+            "query_planner": self.query_planner.run,
+            "financial_analyst": self.financial_analyst.run,
+            "news_scanner": self.news_scanner.run,
+            "industry_analyst": self.industry_analyst.run,
+            "company_analyst": self.company_analyst.run,
+            "collector": self.collector.run,
+            "curator": self.curator.run,
+            "enricher": self.enricher.run,
+            "briefing": self.briefing.run,
+            "editor": self.editor.run,
+        }
+        for name, run in nodes.items():
+            self.workflow.add_node(name, timed_node(name, run))
 
         # Configure workflow edges
         self.workflow.set_entry_point("grounding")
@@ -83,9 +142,10 @@ class Graph:
             "company_analyst"
         ]
 
-        # Connect grounding to all research nodes
+        # Plan every analyst's queries in one call, then fan out to the research nodes
+        self.workflow.add_edge("grounding", "query_planner")
         for node in research_nodes:
-            self.workflow.add_edge("grounding", node)
+            self.workflow.add_edge("query_planner", node)
             self.workflow.add_edge(node, "collector")
 
         # Connect remaining nodes
@@ -94,17 +154,93 @@ class Graph:
         self.workflow.add_edge("enricher", "briefing")
         self.workflow.add_edge("briefing", "editor")
 
-    async def run(self, thread: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
-        """Execute the research workflow"""
-        compiled_graph = self.workflow.compile()
-        
-        async for state in compiled_graph.astream(
-            self.input_state,
-            thread
-        ):
-            if self.websocket_manager and self.job_id:
-                await self._handle_ws_update(state)
-            yield state
+    def runtime_config(self, thread: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the job's runtime services to the run config rather than the state."""
+        configurable = {
+            **thread.get("configurable", {}),
+            "websocket_manager": self.websocket_manager,
+            "doc_store": self.doc_store,
+            "trace": self.trace,
+            "background_tasks": self.background_tasks,
+            "site_pages": self.site_pages,
+            "prefetcher": self.prefetcher
+        }
+        if self.checkpointer and self.job_id:
+            configurable.setdefault("thread_id", self.job_id)
+        return {**thread, "configurable": configurable}
+
+    async def run(self, thread: Dict[str, Any], resume: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Execute the research workflow, or continue it from its last checkpoint."""
+        compiled_graph = self.workflow.compile(checkpointer=self.checkpointer)
+        config = self.runtime_config(thread)
+
+        graph_input = self.input_state
+        if resume:
+            graph_input = None
+            config = await self._resume_config(compiled_graph, config)
+            await self._restart_site_scrape(compiled_graph, config)
+
+        try:
+            async for state in compiled_graph.astream(graph_input, config):
+                if self.websocket_manager and self.job_id:
+                    await self._handle_ws_update(state)
+                yield state
+        finally:
+            # A run that stopped early leaves no one waiting for its background work
+            for task in self.background_tasks.values():
+                task.cancel()
+            self.background_tasks.clear()
+            self.prefetcher.cancel_all()
+
+    async def get_checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """Latest checkpointed state values for this job, or None if there are none."""
+        if not self.checkpointer:
+            return None
+        compiled_graph = self.workflow.compile(checkpointer=self.checkpointer)
+        snapshot = await compiled_graph.aget_state(self.runtime_config({}))
+        return snapshot.values or None
+
+    async def _resume_config(self, compiled_graph, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Pick the checkpoint to continue from.
+
+        An interrupted or failed run still has pending nodes, which continue from the
+        latest checkpoint. A run that reached the end without a report (the editor
+        swallows its own errors) is rewound to just before the editor.
+        """
+        if not self.checkpointer:
+            raise ValueError("Cannot resume a research job without a checkpointer")
+
+        snapshot = await compiled_graph.aget_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for job {self.job_id}")
+        if snapshot.next or snapshot.values.get("report"):
+            return config
+
+        async for past in compiled_graph.aget_state_history(config):
+            if past.next == ("editor",):
+                logger.info(f"Resuming job {self.job_id} from checkpoint before the editor")
+                return {
+                    **config,
+                    "configurable": {**config["configurable"], **past.config["configurable"]}
+                }
+        return config
+
+    async def _restart_site_scrape(self, compiled_graph, config: Dict[str, Any]) -> None:
+        """Extract the company website again for a run resumed before the collector.
+
+        Grounding extracts it in a background task for the collector to wait for; the
+        task does not survive the run, so a checkpoint taken in between has no website.
+        """
+        snapshot = await compiled_graph.aget_state(config)
+        values = snapshot.values
+        before_collector = {"query_planner", "financial_analyst", "news_scanner", "industry_analyst",
+                            "company_analyst", "collector"}
+        if (set(snapshot.next) & before_collector and values.get('company_url')
+                and not values.get('baseline') and not values.get('site_scrape')):
+            logger.info(f"Extracting the company website again for resumed job {self.job_id}")
+            self.background_tasks["site_scrape"] = asyncio.create_task(
+                self.ground.scrape_site(values, self.websocket_manager, self.doc_store, self.site_pages)
+            )
 
     async def _handle_ws_update(self, state: Dict[str, Any]):
         """Handle WebSocket updates based on state changes"""
@@ -122,5 +258,5 @@ class Graph:
         )
     
     def compile(self):
-        graph = self.workflow.compile()
+        graph = self.workflow.compile(checkpointer=self.checkpointer)
         return graph
\ No newline at end of file
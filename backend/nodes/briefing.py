@@ -3,9 +3,15 @@ import logging
 import os
 from typing import Any, Dict, List, Union
 
-import google.generativeai as genai
+from langchain_core.runnables import RunnableConfig
 
-from ..classes import ResearchState
+from ..classes import ResearchState, get_profile
+from ..services.clients import get_gemini_model
+from ..services.document_store import get_content
+from ..services.industry_cache import get_industry_cache, industry_key, market_sections
+from ..services.rate_limiter import estimate_tokens
+from ..services.resilience import call_provider
+from ..services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +25,12 @@ class Briefing:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
         
         # Configure Gemini
-        genai.configure(api_key=self.gemini_key)
-        self.gemini_model = genai.GenerativeModel('gemini-2.0-flash')
+        self.gemini_model = get_gemini_model(self.gemini_key, 'gemini-2.0-flash')
 
+    @traced("briefing")
     async def generate_category_briefing(
         self, docs: Union[Dict[str, Any], List[Dict[str, Any]]], 
-        category: str, context: Dict[str, Any]
+        category: str, context: Dict[str, Any], background: str = ""
     ) -> Dict[str, Any]:
         company = context.get('company', 'Unknown')
         industry = context.get('industry', 'Unknown')
@@ -156,13 +162,14 @@ Key requirements:
             reverse=True
         )
         
+        max_doc_length = context.get('max_doc_length', self.max_doc_length)
         doc_texts = []
         total_length = 0
         for _ , doc in sorted_items:
             title = doc.get('title', '')
-            content = doc.get('raw_content') or doc.get('content', '')
-            if len(content) > self.max_doc_length:
-                content = content[:self.max_doc_length] + "... [content truncated]"
+            content = get_content(doc, context.get('doc_store')) or doc.get('content', '')
+            if len(content) > max_doc_length:
+                content = content[:max_doc_length] + "... [content truncated]"
             doc_entry = f"Title: {title}\n\nContent: {content}"
             if total_length + len(doc_entry) < 120000:  # Keep under limit
                 doc_texts.append(doc_entry)
@@ -171,9 +178,16 @@ Key requirements:
                 break
         
         separator = "\n" + "-" * 40 + "\n"
+        if background:
+            # Market research shared with earlier companies in the industry stands in for its documents
+            background = f"""Market research already done for the {industry} industry. Use it for market size, growth, trends and challenges, and the documents below for {company} itself:
+
+{background}
+
+"""
         prompt = f"""{prompts.get(category, 'Create a focused, informative and insightful research briefing on the company: {company} in the {industry} industry based on the provided documents.')}
 
-Analyze the following documents and extract key information. Provide only the briefing, no explanations or commentary:
+{background}Analyze the following documents and extract key information. Provide only the briefing, no explanations or commentary:
 
 {separator}{separator.join(doc_texts)}{separator}
 
@@ -181,7 +195,14 @@ Analyze the following documents and extract key information. Provide only the br
         
         try:
             logger.info("Sending prompt to LLM")
-            response = self.gemini_model.generate_content(prompt)
+            # Briefings are sampled at Gemini's default temperature, so they are not cached
+            response = await call_provider(
+                "gemini.gemini-2.0-flash",
+                lambda: self.gemini_model.generate_content_async(prompt),
+                job_id=context.get('job_id'),
+                tokens=estimate_tokens([prompt]),
+                trace_attrs={"category": category, "documents": len(doc_texts)}
+            )
             content = response.text.strip()
             if not content:
                 logger.error(f"Empty response from LLM for {category} briefing")
@@ -205,10 +226,9 @@ Analyze the following documents and extract key information. Provide only the br
             logger.error(f"Error generating {category} briefing: {e}")
             return {'content': ''}
 
-    async def create_briefings(self, state: ResearchState) -> ResearchState:
+    async def create_briefings(self, state: ResearchState, websocket_manager=None, doc_store=None) -> Dict[str, Any]:
         """Create briefings for all categories in parallel."""
         company = state.get('company', 'Unknown Company')
-        websocket_manager = state.get('websocket_manager')
         job_id = state.get('job_id')
         
         # Send initial briefing status
@@ -225,7 +245,9 @@ Analyze the following documents and extract key information. Provide only the br
             "industry": state.get('industry', 'Unknown'),
             "hq_location": state.get('hq_location', 'Unknown'),
             "websocket_manager": websocket_manager,
-            "job_id": job_id
+            "job_id": job_id,
+            "doc_store": doc_store,
+            "max_doc_length": get_profile(state.get('profile')).max_doc_length
         }
         logger.info(f"Creating section briefings for {company}")
         
@@ -238,14 +260,38 @@ Analyze the following documents and extract key information. Provide only the br
         }
         
         briefings = {}
+        updates = {}
+
+        # A delta refresh keeps the last report's briefing for categories whose documents are unchanged
+        baseline = state.get('baseline') or {}
+
+        # Companies in the same industry share market research: its documents and the market
+        # sections of the briefing written from them
+        industry_cache = get_industry_cache()
+        industry_cache_key = industry_key(state.get('industry'), state.get('hq_location'), state.get('profile'))
+        shared_industry = industry_cache.get(industry_cache_key, count=False)
 
         # Create tasks for parallel processing
         briefing_tasks = []
         for data_field, (cat, briefing_key) in categories.items():
             curated_key = f'curated_{data_field}'
             curated_data = state.get(curated_key, {})
+            previous_docs = baseline.get('curated', {}).get(data_field)
             
-            if curated_data:
+            if previous_docs is not None and set(curated_data) == set(previous_docs) and baseline['briefings'].get(cat):
+                logger.info(f"Reusing the last report's {cat} briefing; its {len(curated_data)} documents are unchanged")
+                briefings[cat] = updates[briefing_key] = baseline['briefings'][cat]
+            elif cat == 'industry' and shared_industry and curated_data:
+                company_docs = {url: doc for url, doc in curated_data.items() if not doc.get('market_level')}
+                logger.info(f"Processing {data_field} with {len(company_docs)} documents and shared market research")
+                briefing_tasks.append({
+                    'category': cat,
+                    'briefing_key': briefing_key,
+                    'data_field': data_field,
+                    'curated_data': company_docs,
+                    'background': shared_industry['briefing']
+                })
+            elif curated_data:
                 logger.info(f"Processing {data_field} with {len(curated_data)} documents")
                 
                 # Create task for this category
@@ -257,35 +303,43 @@ Analyze the following documents and extract key information. Provide only the br
                 })
             else:
                 logger.info(f"No data available for {data_field}")
-                state[briefing_key] = ""
+                updates[briefing_key] = ""
 
-        # Process briefings in parallel with rate limiting
+        # Process briefings in parallel; Gemini calls are paced by the shared rate limiter
         if briefing_tasks:
-            # Rate limiting semaphore for LLM API
-            briefing_semaphore = asyncio.Semaphore(2)  # Limit to 2 concurrent briefings
-            
+            if doc_store is not None:
+                # A resumed job's bodies may only be in persistent storage
+                await doc_store.preload(
+                    doc['raw_content_id']
+                    for task in briefing_tasks
+                    for doc in task['curated_data'].values()
+                    if doc.get('raw_content_id')
+                )
+
             async def process_briefing(task: Dict[str, Any]) -> Dict[str, Any]:
-                """Process a single briefing with rate limiting."""
-                async with briefing_semaphore:
-                    result = await self.generate_category_briefing(
-                        task['curated_data'],
-                        task['category'],
-                        context
-                    )
-                    
-                    if result['content']:
-                        briefings[task['category']] = result['content']
-                        state[task['briefing_key']] = result['content']
-                        logger.info(f"Completed {task['data_field']} briefing ({len(result['content'])} characters)")
-                    else:
-                        logger.error(f"Failed to generate briefing for {task['data_field']}")
-                        state[task['briefing_key']] = ""
-                    
-                    return {
-                        'category': task['category'],
-                        'success': bool(result['content']),
-                        'length': len(result['content']) if result['content'] else 0
-                    }
+                """Process a single briefing."""
+                result = await self.generate_category_briefing(
+                    task['curated_data'],
+                    task['category'],
+                    context,
+                    task.get('background', "")
+                )
+                
+                if result['content']:
+                    briefings[task['category']] = result['content']
+                    updates[task['briefing_key']] = result['content']
+                    logger.info(f"Completed {task['data_field']} briefing ({len(result['content'])} characters)")
+                    if task['category'] == 'industry' and 'background' not in task:
+                        self.share_industry_research(state, task['curated_data'], result['content'], context)
+                else:
+                    logger.error(f"Failed to generate briefing for {task['data_field']}")
+                    updates[task['briefing_key']] = ""
+                
+                return {
+                    'category': task['category'],
+                    'success': bool(result['content']),
+                    'length': len(result['content']) if result['content'] else 0
+                }
 
             # Process all briefings in parallel
             results = await asyncio.gather(*[
@@ -298,8 +352,31 @@ Analyze the following documents and extract key information. Provide only the br
             total_length = sum(r['length'] for r in results)
             logger.info(f"Generated {successful_briefings}/{len(briefing_tasks)} briefings with total length {total_length}")
 
-        state['briefings'] = briefings
-        return state
+        updates['briefings'] = briefings
+        return updates
+
+    def share_industry_research(self, state: ResearchState, curated_data: Dict[str, Any],
+                                briefing: str, context: Dict[str, Any]) -> None:
+        """Keep this job's market documents and market briefing for other companies in the industry."""
+        documents = {}
+        for url, doc in curated_data.items():
+            if not doc.get('market_level'):
+                continue
+            shared = {key: value for key, value in doc.items() if key not in ('raw_content', 'raw_content_id')}
+            if content := get_content(doc, context.get('doc_store')):
+                shared['raw_content'] = content[:context['max_doc_length']]
+            documents[url] = shared
+        get_industry_cache().set(
+            industry_key(state.get('industry'), state.get('hq_location'), state.get('profile')),
+            state.get('industry', ''),
+            documents,
+            market_sections(briefing)
+        )
 
-    async def run(self, state: ResearchState) -> ResearchState:
-        return await self.create_briefings(state)
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        return await self.create_briefings(
+            state,
+            configurable.get("websocket_manager"),
+            configurable.get("doc_store")
+        )
\ No newline at end of file
@@ -1,17 +1,46 @@
+import logging
+from typing import Any, Dict
+
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ..classes import ResearchState
+from ..services.site_crawl import PAGE_TYPES
+
+logger = logging.getLogger(__name__)
+
+# The query each category files the company website under
+SITE_SCRAPE_QUERIES = {
+    'financial_data': 'Financial information on {company}',
+    'news_data': 'News and announcements about {company}',
+    'industry_data': 'Industry analysis on {company}',
+    'company_data': 'Company overview and information about {company}'
+}
 
 
 class Collector:
     """Collects and organizes all research data before curation."""
 
-    async def collect(self, state: ResearchState) -> ResearchState:
+    async def collect(self, state: ResearchState, websocket_manager=None, background_tasks=None) -> Dict[str, Any]:
         """Collect and verify all research data is present."""
         company = state.get('company', 'Unknown Company')
         msg = [f"📦 Collecting research data for {company}:"]
+        updates = {}
+
+        # Grounding extracts the company website while the analysts search; wait for it here
+        site_scrape = state.get('site_scrape')
+        site_pages = state.get('site_pages') or {}
+        if task := (background_tasks or {}).pop("site_scrape", None):
+            scraped = await task
+            msg.append(scraped["msg"].strip())
+            site_scrape = updates['site_scrape'] = scraped["site_scrape"]
+            site_pages = updates['site_pages'] = scraped["site_pages"]
+            if scraped.get("error"):
+                updates['error'] = scraped["error"]
+        elif state.get('company_url') and not state.get('baseline') and not site_scrape:
+            logger.warning(f"No website content for {company}; its extraction did not carry over to this run")
 
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -28,19 +57,32 @@ class Collector:
             'company_data': '🏢 Company'
         }
         
+        # The website joins each category's documents; a search result for the same URL takes precedence
+        if site_scrape:
+            msg.append("📊 Including site scrape data in each category")
+            company_url = state.get('company_url', 'company-website')
+            for data_field, query in SITE_SCRAPE_QUERIES.items():
+                site_doc = {**site_scrape, 'title': company, 'query': query.format(company=company)}
+                updates[data_field] = {company_url: site_doc, **state.get(data_field, {})}
+
+        # Crawled pages join the categories they serve. They stand in for the searches they
+        # answered, so they are scored to be kept by curation.
+        for page_url, page in site_pages.items():
+            for data_field in PAGE_TYPES[page['page_type']]['categories']:
+                data = updates.setdefault(data_field, dict(state.get(data_field, {})))
+                data.setdefault(page_url, {**page, 'url': page_url, 'score': 1.0,
+                                           'query': f"{company} {page['page_type']}"})
+
         for data_field, label in research_types.items():
-            data = state.get(data_field, {})
+            data = updates.get(data_field, state.get(data_field, {}))
             if data:
                 msg.append(f"• {label}: {len(data)} documents collected")
             else:
                 msg.append(f"• {label}: No data found")
         
-        # Update state with collection message
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        
-        return state
+        # Return the collection message, with the website added to each category's data
+        return {**updates, 'messages': [AIMessage(content="\n".join(msg))]}
 
-    async def run(self, state: ResearchState) -> ResearchState:
-        return await self.collect(state)
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        return await self.collect(state, configurable.get("websocket_manager"), configurable.get("background_tasks"))
\ No newline at end of file
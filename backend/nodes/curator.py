@@ -1,10 +1,13 @@
 import logging
-from typing import Dict
+from typing import Any, Dict, Optional
 from urllib.parse import urljoin, urlparse
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ..classes import ResearchState
+from ..services.document_store import has_content
+from ..services.prefetch import ExtractPrefetcher
 from ..utils.references import process_references_from_search_results
 
 logger = logging.getLogger(__name__)
@@ -14,9 +17,9 @@ class Curator:
         self.relevance_threshold = 0.4  # Fixed initialization of class attribute
         logger.info("Curator initialized with relevance threshold: {relevance_threshhold}")
 
-    async def evaluate_documents(self, state: ResearchState, docs: list, context: Dict[str, str]) -> list:
+    async def evaluate_documents(self, state: ResearchState, docs: list, context: Dict[str, str], websocket_manager=None) -> list:
         """Evaluate documents based on Tavily's scoring."""
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 logger.info(f"Sending initial curation status update for job {job_id}")
                 await websocket_manager.send_status_update(
@@ -55,7 +58,7 @@ class Curator:
                         evaluated_docs.append(evaluated_doc)
                         
                         # Send incremental update for kept document
-                        if websocket_manager := state.get('websocket_manager'):
+                        if websocket_manager:
                             if job_id := state.get('job_id'):
                                 await websocket_manager.send_status_update(
                                     job_id=job_id,
@@ -84,13 +87,14 @@ class Curator:
         
         return evaluated_docs
 
-    async def curate_data(self, state: ResearchState) -> ResearchState:
+    async def curate_data(self, state: ResearchState, websocket_manager=None,
+                          prefetcher: Optional[ExtractPrefetcher] = None) -> Dict[str, Any]:
         """Curate all collected data based on Tavily scores."""
         company = state.get('company', 'Unknown Company')
         logger.info(f"Starting curation for company: {company}")
         
         # Send initial status update through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 logger.info(f"Sending initial curation status update for job {job_id}")
                 await websocket_manager.send_status_update(
@@ -151,11 +155,12 @@ class Curator:
 
         # Track document counts for each type
         doc_counts = {}
+        curated = {}
 
         for data_field, emoji, doc_type, urls, docs in curation_tasks:
             msg.append(f"\n{emoji}: Found {len(docs)} documents")
 
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -168,7 +173,7 @@ class Curator:
                         }
                     )
 
-            evaluated_docs = await self.evaluate_documents(state, docs, context)
+            evaluated_docs = await self.evaluate_documents(state, docs, context, websocket_manager)
 
             if not evaluated_docs:
                 msg.append("  ⚠️ No relevant documents found")
@@ -176,7 +181,7 @@ class Curator:
                 continue
 
             # Filter and sort by Tavily score
-            relevant_docs = {url: doc for url, doc in zip(urls, evaluated_docs)}
+            relevant_docs = {doc['url']: doc for doc in evaluated_docs}
             sorted_items = sorted(relevant_docs.items(), key=lambda item: item[1]['evaluation']['overall_score'], reverse=True)
             
             # Limit to top 30 documents per category
@@ -197,22 +202,25 @@ class Curator:
                 logger.info(f"No documents met relevance threshold for {doc_type}")
 
             # Store curated documents in state
-            state[f'curated_{data_field}'] = relevant_docs
+            curated[f'curated_{data_field}'] = relevant_docs
             
+        # A delta refresh adds the documents it found to those of the last report
+        if baseline := state.get('baseline'):
+            for data_field, previous_docs in baseline.get('curated', {}).items():
+                merged = {**previous_docs, **curated.get(f'curated_{data_field}', {})}
+                sorted_items = sorted(merged.items(), key=lambda item: float(item[1]['evaluation']['overall_score']), reverse=True)
+                curated[f'curated_{data_field}'] = dict(sorted_items[:30])
+
+        # Only the extractions of documents the enricher will fetch are still needed
+        if prefetcher:
+            prefetcher.retain(url for docs in curated.values() for url, doc in docs.items() if not has_content(doc))
+
         # Process references using the references module
-        top_reference_urls, reference_titles, reference_info = process_references_from_search_results(state)
+        top_reference_urls, reference_titles, reference_info = process_references_from_search_results(curated)
         logger.info(f"Selected top {len(top_reference_urls)} references for the report")
-        
-        # Update state with references and their titles
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['references'] = top_reference_urls
-        state['reference_titles'] = reference_titles
-        state['reference_info'] = reference_info
 
         # Send final curation stats
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -229,7 +237,15 @@ class Curator:
                     }
                 )
 
-        return state
+        # Return curated documents with references and their titles
+        return {
+            **curated,
+            'messages': [AIMessage(content="\n".join(msg))],
+            'references': top_reference_urls,
+            'reference_titles': reference_titles,
+            'reference_info': reference_info
+        }
 
-    async def run(self, state: ResearchState) -> ResearchState:
-        return await self.curate_data(state)
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        return await self.curate_data(state, configurable.get("websocket_manager"), configurable.get("prefetcher"))
@@ -3,9 +3,14 @@ import os
 from typing import Any, Dict
 
 from langchain_core.messages import AIMessage
-from openai import AsyncOpenAI
-
-from ..classes import ResearchState
+from langchain_core.runnables import RunnableConfig
+
+from ..classes import ResearchState, get_profile
+from ..services.clients import get_openai_client
+from ..services.completion_cache import cached_completion, cached_stream, completion_key
+from ..services.rate_limiter import estimate_tokens
+from ..services.resilience import call_provider
+from ..services.tracing import traced
 from ..utils.references import format_references_section
 
 logger = logging.getLogger(__name__)
@@ -22,7 +27,7 @@ class Editor:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
         # Configure OpenAI
-        self.openai_client = AsyncOpenAI(api_key=self.openai_key)
+        self.openai_client = get_openai_client(self.openai_key)
         
         # Initialize context dictionary for use across methods
         self.context = {
@@ -31,7 +36,7 @@ class Editor:
             "hq_location": "Unknown"
         }
 
-    async def compile_briefings(self, state: ResearchState) -> ResearchState:
+    async def compile_briefings(self, state: ResearchState, websocket_manager=None) -> Dict[str, Any]:
         """Compile individual briefing categories from state into a final report."""
         company = state.get('company', 'Unknown Company')
         
@@ -43,7 +48,7 @@ class Editor:
         }
         
         # Send initial compilation status
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -72,7 +77,7 @@ class Editor:
         }
 
         # Send briefing collection status
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -93,28 +98,30 @@ class Editor:
                 msg.append(f"No {category} briefing available")
                 logger.error(f"Missing state key: {key}")
         
+        updates = {}
         if not individual_briefings:
             msg.append("\n⚠️ No briefing sections available to compile")
             logger.error("No briefings found in state")
         else:
             try:
-                compiled_report = await self.edit_report(state, individual_briefings, context)
+                compiled_report = await self.edit_report(state, individual_briefings, context, websocket_manager)
                 if not compiled_report or not compiled_report.strip():
                     logger.error("Compiled report is empty!")
                 else:
                     logger.info(f"Successfully compiled report with {len(compiled_report)} characters")
+                    updates['report'] = compiled_report
             except Exception as e:
                 logger.error(f"Error during report compilation: {e}")
-        state.setdefault('messages', []).append(AIMessage(content="\n".join(msg)))
-        return state
+        updates['messages'] = [AIMessage(content="\n".join(msg))]
+        return updates
     
-    async def edit_report(self, state: ResearchState, briefings: Dict[str, str], context: Dict[str, Any]) -> str:
+    async def edit_report(self, state: ResearchState, briefings: Dict[str, str], context: Dict[str, Any], websocket_manager=None) -> str:
         """Compile section briefings into a final report and update the state."""
         try:
             company = self.context["company"]
             
             # Step 1: Initial Compilation
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -131,32 +138,36 @@ class Editor:
                 logger.error("Initial compilation failed")
                 return ""
 
-            # Step 2: Deduplication and Cleanup
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Cleaning up and organizing report",
-                        result={
-                            "step": "Editor",
-                            "substep": "cleanup"
-                        }
-                    )
-
-            # Step 3: Formatting Final Report
-            if websocket_manager := state.get('websocket_manager'):
-                if job_id := state.get('job_id'):
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="processing",
-                        message="Formatting final report",
-                        result={
-                            "step": "Editor",
-                            "substep": "format"
-                        }
-                    )
-            final_report = await self.content_sweep(state, edited_report, company)
+            # Single-pass profiles use the compiled report as is
+            if get_profile(state.get('profile')).editor_passes < 2:
+                final_report = edited_report
+            else:
+                # Step 2: Deduplication and Cleanup
+                if websocket_manager:
+                    if job_id := state.get('job_id'):
+                        await websocket_manager.send_status_update(
+                            job_id=job_id,
+                            status="processing",
+                            message="Cleaning up and organizing report",
+                            result={
+                                "step": "Editor",
+                                "substep": "cleanup"
+                            }
+                        )
+
+                # Step 3: Formatting Final Report
+                if websocket_manager:
+                    if job_id := state.get('job_id'):
+                        await websocket_manager.send_status_update(
+                            job_id=job_id,
+                            status="processing",
+                            message="Formatting final report",
+                            result={
+                                "step": "Editor",
+                                "substep": "format"
+                            }
+                        )
+                final_report = await self.content_sweep(state, edited_report, company, websocket_manager)
             
             final_report = final_report or ""
             
@@ -168,15 +179,7 @@ class Editor:
             logger.info("Final report preview:")
             logger.info(final_report[:500])
             
-            # Update state with the final report in two locations
-            state['report'] = final_report
-            state['status'] = "editor_complete"
-            if 'editor' not in state or not isinstance(state['editor'], dict):
-                state['editor'] = {}
-            state['editor']['report'] = final_report
-            logger.info(f"Report length in state: {len(state.get('report', ''))}")
-            
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -196,6 +199,7 @@ class Editor:
             logger.error(f"Error in edit_report: {e}")
             return ""
     
+    @traced("editor_compile")
     async def compile_content(self, state: ResearchState, briefings: Dict[str, str], company: str) -> str:
         """Initial compilation of research sections."""
         combined_content = "\n\n".join(content for content in briefings.values())
@@ -252,22 +256,33 @@ Strictly enforce this EXACT document structure:
 Return the report in clean markdown format. No explanations or commentary."""
         
         try:
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert report editor that compiles research briefings into comprehensive company reports."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0,
-                stream=False
-            )
-            initial_report = response.choices[0].message.content.strip()
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are an expert report editor that compiles research briefings into comprehensive company reports."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+            async def compile_report() -> str:
+                # No max_tokens is set, so budget for a report about as long as the prompt
+                response = await call_provider(
+                    "openai.gpt-4.1",
+                    lambda: self.openai_client.chat.completions.create(
+                        model="gpt-4.1",
+                        messages=messages,
+                        temperature=0,
+                        stream=False
+                    ),
+                    job_id=state.get('job_id'),
+                    tokens=2 * estimate_tokens(messages)
+                )
+                return response.choices[0].message.content
+
+            key = completion_key("openai.gpt-4.1", messages, temperature=0)
+            initial_report = (await cached_completion(key, compile_report)).strip()
             
             # Append the references section after LLM processing
             if reference_text:
@@ -278,7 +293,8 @@ Return the report in clean markdown format. No explanations or commentary."""
             logger.error(f"Error in initial compilation: {e}")
             return (combined_content or "").strip()
         
-    async def content_sweep(self, state: ResearchState, content: str, company: str) -> str:
+    @traced("editor_sweep")
+    async def content_sweep(self, state: ResearchState, content: str, company: str, websocket_manager=None) -> str:
         """Sweep the content for any redundant information."""
         # Use values from centralized context
         company = self.context["company"]
@@ -334,20 +350,29 @@ Return the polished report in flawless markdown format. No explanation.
 Return the cleaned report in flawless markdown format. No explanations or commentary."""
         
         try:
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini", 
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert markdown formatter that ensures consistent document structure."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0,
-                stream=True
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are an expert markdown formatter that ensures consistent document structure."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+            response = await cached_stream(
+                completion_key("openai.gpt-4.1-mini", messages, temperature=0),
+                lambda: call_provider(
+                    "openai.gpt-4.1-mini",
+                    lambda: self.openai_client.chat.completions.create(
+                        model="gpt-4.1-mini",
+                        messages=messages,
+                        temperature=0,
+                        stream=True
+                    ),
+                    job_id=state.get('job_id'),
+                    tokens=2 * estimate_tokens(messages)
+                )
             )
             
             accumulated_text = ""
@@ -355,7 +380,6 @@ Return the cleaned report in flawless markdown format. No explanations or commen
             
             async for chunk in response:
                 if chunk.choices[0].finish_reason == "stop":
-                    websocket_manager = state.get('websocket_manager')
                     if websocket_manager and buffer:
                         job_id = state.get('job_id')
                         if job_id:
@@ -376,7 +400,7 @@ Return the cleaned report in flawless markdown format. No explanations or commen
                     buffer += chunk_text
                     
                     if any(char in buffer for char in ['.', '!', '?', '\n']) and len(buffer) > 10:
-                        if websocket_manager := state.get('websocket_manager'):
+                        if websocket_manager:
                             if job_id := state.get('job_id'):
                                 await websocket_manager.send_status_update(
                                     job_id=job_id,
@@ -394,11 +418,7 @@ Return the cleaned report in flawless markdown format. No explanations or commen
             logger.error(f"Error in formatting: {e}")
             return (content or "").strip()
 
-    async def run(self, state: ResearchState) -> ResearchState:
-        state = await self.compile_briefings(state)
-        # Ensure the Editor node's output is stored both top-level and under "editor"
-        if 'report' in state:
-            if 'editor' not in state or not isinstance(state['editor'], dict):
-                state['editor'] = {}
-            state['editor']['report'] = state['report']
-        return state
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        # The streamed update for this node ({"editor": {"report": ...}}) carries the report
+        websocket_manager = config.get("configurable", {}).get("websocket_manager")
+        return await self.compile_briefings(state, websocket_manager)
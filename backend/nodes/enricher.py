@@ -1,11 +1,16 @@
 import asyncio
 import os
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 from langchain_core.messages import AIMessage
-from tavily import AsyncTavilyClient
+from langchain_core.runnables import RunnableConfig
 
-from ..classes import ResearchState
+from ..classes import ResearchState, get_profile
+from ..services.clients import get_tavily_client
+from ..services.document_store import attach_content, has_content
+from ..services.prefetch import ExtractPrefetcher
+from ..services.resilience import call_provider
+from ..services.search_cache import search_cache_key, shared_call
 
 
 class Enricher:
@@ -15,11 +20,26 @@ class Enricher:
         tavily_key = os.getenv("TAVILY_API_KEY")
         if not tavily_key:
             raise ValueError("TAVILY_API_KEY environment variable is not set")
-        self.tavily_client = AsyncTavilyClient(api_key=tavily_key)
+        self.tavily_client = get_tavily_client(tavily_key)
         self.batch_size = 20
 
-    async def fetch_single_content(self, url: str, websocket_manager=None, job_id=None, category=None) -> Dict[str, str]:
-        """Fetch raw content for a single URL."""
+    async def extract(self, url: str, job_id=None, category=None, extract_depth: str = "basic") -> Dict[str, Any]:
+        """Tavily extract response for a URL; jobs in a batch share identical extractions."""
+        return await shared_call(
+            search_cache_key("tavily.extract", url, extract_depth=extract_depth),
+            lambda: call_provider(
+                "tavily.extract",
+                lambda: self.tavily_client.extract(url, extract_depth=extract_depth),
+                job_id=job_id,
+                hedge=True,
+                trace_attrs={"url": url, "category": category}
+            )
+        )
+
+    async def fetch_single_content(self, url: str, websocket_manager=None, job_id=None, category=None,
+                                   extract_depth: str = "basic",
+                                   prefetcher: Optional[ExtractPrefetcher] = None) -> Dict[str, str]:
+        """Fetch raw content for a single URL, from its speculative extraction if one was started."""
         try:
             if websocket_manager and job_id:
                 await websocket_manager.send_status_update(
@@ -33,7 +53,11 @@ class Enricher:
                     }
                 )
 
-            result = await self.tavily_client.extract(url)
+            prefetched = prefetcher.get(url) if prefetcher else None
+            if prefetched is not None:
+                result = await prefetched
+            else:
+                result = await self.extract(url, job_id, category, extract_depth)
             if result and result.get('results'):
                 if websocket_manager and job_id:
                     await websocket_manager.send_status_update(
@@ -67,7 +91,9 @@ class Enricher:
             return {url: '', "error": error_msg}
         return {url: ''}
 
-    async def fetch_raw_content(self, urls: List[str], websocket_manager=None, job_id=None, category=None) -> Dict[str, str]:
+    async def fetch_raw_content(self, urls: List[str], websocket_manager=None, job_id=None, category=None,
+                                extract_depth: str = "basic",
+                                prefetcher: Optional[ExtractPrefetcher] = None) -> Dict[str, str]:
         """Fetch raw content for multiple URLs in parallel."""
         raw_contents = {}
         total_batches = (len(urls) + self.batch_size - 1) // self.batch_size
@@ -75,34 +101,34 @@ class Enricher:
         # Create batches
         batches = [urls[i:i + self.batch_size] for i in range(0, len(urls), self.batch_size)]
         
-        # Process batches in parallel with rate limiting
-        semaphore = asyncio.Semaphore(3)  # Limit concurrent batches to 3
-        
+        # Process batches in parallel; extracts are paced by the shared rate limiter
         async def process_batch(batch_num: int, batch_urls: List[str]) -> Dict[str, str]:
-            async with semaphore:
-                if websocket_manager and job_id:
-                    await websocket_manager.send_status_update(
-                        job_id=job_id,
-                        status="batch_start",
-                        message=f"Processing batch {batch_num + 1}/{total_batches}",
-                        result={
-                            "step": "Enriching",
-                            "batch": batch_num + 1,
-                            "total_batches": total_batches,
-                            "category": category
-                        }
-                    )
+            if websocket_manager and job_id:
+                await websocket_manager.send_status_update(
+                    job_id=job_id,
+                    status="batch_start",
+                    message=f"Processing batch {batch_num + 1}/{total_batches}",
+                    result={
+                        "step": "Enriching",
+                        "batch": batch_num + 1,
+                        "total_batches": total_batches,
+                        "category": category
+                    }
+                )
 
-                # Process URLs in batch concurrently
-                tasks = [self.fetch_single_content(url, websocket_manager, job_id, category) for url in batch_urls]
-                results = await asyncio.gather(*tasks)
-                
-                # Combine results from batch
-                batch_contents = {}
-                for result in results:
-                    batch_contents.update(result)
-                
-                return batch_contents
+            # Process URLs in batch concurrently
+            tasks = [
+                self.fetch_single_content(url, websocket_manager, job_id, category, extract_depth, prefetcher)
+                for url in batch_urls
+            ]
+            results = await asyncio.gather(*tasks)
+            
+            # Combine results from batch
+            batch_contents = {}
+            for result in results:
+                batch_contents.update(result)
+            
+            return batch_contents
 
         # Process all batches
         batch_results = await asyncio.gather(*[
@@ -116,10 +142,10 @@ class Enricher:
 
         return raw_contents
 
-    async def enrich_data(self, state: ResearchState) -> ResearchState:
-        """Enrich curated documents with raw content."""
+    async def enrich_data(self, state: ResearchState, websocket_manager=None, doc_store=None,
+                          prefetcher: Optional[ExtractPrefetcher] = None) -> Dict[str, Any]:
+        """Enrich curated documents with raw content, stored by reference in the job's DocumentStore."""
         company = state.get('company', 'Unknown Company')
-        websocket_manager = state.get('websocket_manager')
         job_id = state.get('job_id')
 
         if websocket_manager and job_id:
@@ -155,7 +181,7 @@ class Enricher:
 
             # Find documents needing enrichment
             docs_needing_content = {url: doc for url, doc in curated_docs.items() 
-                                  if not doc.get('raw_content')}
+                                  if not has_content(doc)}
             
             if not docs_needing_content:
                 msg.append(f"\n• All {label} documents already have raw content")
@@ -184,6 +210,9 @@ class Enricher:
                 'curated_docs': curated_docs
             })
 
+        # Only the enriched curated fields are returned as state updates
+        updates = {}
+
         # Process all categories in parallel
         if enrichment_tasks:
             async def process_category(task):
@@ -192,23 +221,29 @@ class Enricher:
                         list(task['docs'].keys()),
                         websocket_manager,
                         job_id,
-                        task['category']
+                        task['category'],
+                        get_profile(state.get('profile')).extract_depth,
+                        prefetcher
                     )
                     
                     enriched_count = 0
                     error_count = 0
+                    enriched_docs = dict(task['curated_docs'])
                     
                     for url, content_or_error in raw_contents.items():
+                        if url not in task['docs']:
+                            continue
                         if isinstance(content_or_error, dict) and content_or_error.get('error'):
                             # This is an error result - just skip it
                             error_count += 1
                         elif content_or_error:
                             # This is a successful content
-                            task['curated_docs'][url]['raw_content'] = content_or_error
+                            enriched_docs[url] = {**enriched_docs[url]}
+                            attach_content(enriched_docs[url], content_or_error, doc_store)
                             enriched_count += 1
 
                     # Update state with enriched documents
-                    state[task['field']] = task['curated_docs']
+                    updates[task['field']] = enriched_docs
                     
                     if websocket_manager and job_id:
                         await websocket_manager.send_status_update(
@@ -265,18 +300,21 @@ class Enricher:
                     }
                 )
 
-        # Update state with enrichment message
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        
-        return state
+        # Return enriched documents with the enrichment message
+        updates['messages'] = [AIMessage(content="\n".join(msg))]
+        return updates
 
-    async def run(self, state: ResearchState) -> ResearchState:
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
         try:
-            return await self.enrich_data(state)
+            return await self.enrich_data(
+                state,
+                configurable.get("websocket_manager"),
+                configurable.get("doc_store"),
+                configurable.get("prefetcher")
+            )
         except Exception as e:
             # Log the error but don't fail the research process
             print(f"Error in enrichment process: {e}")
-            # Return the original state without any enrichment
-            return state 
\ No newline at end of file
+            # Leave the state unchanged without any enrichment
+            return {} 
\ No newline at end of file
@@ -1,10 +1,25 @@
+import asyncio
 import logging
 import os
+import time
+from typing import Any, Dict, Optional
 
 from langchain_core.messages import AIMessage
-from tavily import AsyncTavilyClient
+from langchain_core.runnables import RunnableConfig
 
-from ..classes import InputState, ResearchState
+from ..classes import InputState, get_profile
+from ..services.clients import get_tavily_client
+from ..services.document_store import attach_content
+from ..services.resilience import call_provider
+from ..services.site_crawl import (
+    MIN_PAGE_CHARS,
+    SITE_CRAWL_SECONDS,
+    choose_pages,
+    dedupe_page,
+    discover_links,
+    is_error_page,
+)
+from ..services.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +27,149 @@ class GroundingNode:
     """Gathers initial grounding data about the company."""
     
     def __init__(self) -> None:
-        self.tavily_client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        self.tavily_client = get_tavily_client(os.getenv("TAVILY_API_KEY"))
 
-    async def initial_search(self, state: InputState) -> ResearchState:
+    @traced("site_scrape")
+    async def scrape_site(self, state: InputState, websocket_manager=None, doc_store=None,
+                          site_pages: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Extract the company website, returning the site_scrape document, any crawled
+        pages by URL, a message and any error."""
+        company = state.get('company', 'Unknown Company')
+        url = state['company_url']
+        site_scrape = {}
+        site_pages = {} if site_pages is None else site_pages
+        msg = ""
+        error_str = None
+        try:
+            logger.info("Initiating Tavily extraction")
+            site_extraction = await call_provider(
+                "tavily.extract",
+                lambda: self.tavily_client.extract(
+                    url, extract_depth=get_profile(state.get('profile')).extract_depth
+                ),
+                job_id=state.get('job_id'),
+                trace_attrs={"url": url}
+            )
+
+            raw_contents = []
+            for item in site_extraction.get("results", []):
+                if content := item.get("raw_content"):
+                    raw_contents.append(content)
+
+            if raw_contents:
+                site_scrape = {'title': company}
+                attach_content(site_scrape, "\n\n".join(raw_contents), doc_store)
+                logger.info(f"Successfully extracted {len(raw_contents)} content sections")
+                msg += "\n✅ Successfully extracted content from website"
+                if websocket_manager:
+                    if job_id := state.get('job_id'):
+                        await websocket_manager.send_status_update(
+                            job_id=job_id,
+                            status="processing",
+                            message="Successfully extracted content from website",
+                            result={"step": "Initial Site Scrape"}
+                        )
+
+                if get_profile(state.get('profile')).site_pages:
+                    await self.crawl_site(state, url, "\n\n".join(raw_contents), site_pages,
+                                          websocket_manager, doc_store)
+                    if site_pages:
+                        msg += f"\n✅ Crawled {len(site_pages)} more pages: {', '.join(site_pages)}"
+            else:
+                logger.warning("No content found in extraction results")
+                msg += "\n⚠️ No content found in website extraction"
+                if websocket_manager:
+                    if job_id := state.get('job_id'):
+                        await websocket_manager.send_status_update(
+                            job_id=job_id,
+                            status="processing",
+                            message="⚠️ No content found in provided URL",
+                            result={"step": "Initial Site Scrape"}
+                        )
+        except Exception as e:
+            error_str = str(e)
+            logger.error(f"Website extraction error: {error_str}", exc_info=True)
+            error_msg = f"⚠️ Error extracting website content: {error_str}"
+            print(error_msg)
+            msg += f"\n{error_msg}"
+            if websocket_manager:
+                if job_id := state.get('job_id'):
+                    await websocket_manager.send_status_update(
+                        job_id=job_id,
+                        status="website_error",
+                        message=error_msg,
+                        result={
+                            "step": "Initial Site Scrape", 
+                            "error": error_str,
+                            "continue_research": True  # Continue with research even if website extraction fails
+                        }
+                    )
+
+        return {"site_scrape": site_scrape, "site_pages": site_pages, "msg": msg, "error": error_str}
+
+    @traced("site_crawl")
+    async def crawl_site(self, state: InputState, url: str, homepage: str, site_pages: Dict[str, Any],
+                         websocket_manager=None, doc_store=None) -> None:
+        """Fetch the site's most valuable pages beyond the homepage, concurrently and within the
+        crawl's time budget, adding each to `site_pages` as it arrives."""
+        company = state.get('company', 'Unknown Company')
+        job_id = state.get('job_id')
+        profile = get_profile(state.get('profile'))
+        chosen = choose_pages(url, discover_links(url, homepage), profile.site_pages)
+        if not chosen:
+            return
+        logger.info(f"Crawling {len(chosen)} pages of {url}: {[page_url for page_url, _ in chosen]}")
+
+        async def fetch(page_url: str) -> str:
+            extraction = await call_provider(
+                "tavily.extract",
+                lambda: self.tavily_client.extract(page_url, extract_depth=profile.extract_depth),
+                job_id=job_id,
+                trace_attrs={"url": page_url}
+            )
+            return "\n\n".join(item.get("raw_content") or "" for item in extraction.get("results", []))
+
+        # Lines shared with the homepage or an earlier page (navigation, footers) are dropped
+        seen = set()
+        dedupe_page(homepage, seen)
+        tasks = {asyncio.create_task(fetch(page_url)): (page_url, kind) for page_url, kind in chosen}
+        deadline = time.monotonic() + SITE_CRAWL_SECONDS
+        pending = set(tasks)
+        try:
+            while pending and (remaining := deadline - time.monotonic()) > 0:
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page_url, kind = tasks[task]
+                    if task.exception():
+                        logger.warning(f"Could not crawl {page_url}: {task.exception()}")
+                        continue
+                    content = task.result()
+                    if is_error_page(content):
+                        continue
+                    content = dedupe_page(content, seen)
+                    if len(content) < MIN_PAGE_CHARS:
+                        continue
+                    page = {'title': f"{company} {kind} page", 'page_type': kind}
+                    attach_content(page, content, doc_store)
+                    site_pages[page_url] = page
+        finally:
+            if pending:
+                logger.info(f"Site crawl budget spent; skipping {len(pending)} pages")
+            for task in pending:
+                task.cancel()
+
+        if websocket_manager and job_id and site_pages:
+            await websocket_manager.send_status_update(
+                job_id=job_id,
+                status="processing",
+                message=f"Crawled {len(site_pages)} more pages of the company website",
+                result={"step": "Initial Site Scrape", "pages": list(site_pages)}
+            )
+
+    async def initial_search(self, state: InputState, websocket_manager=None, doc_store=None,
+                             background_tasks=None, site_pages=None) -> Dict[str, Any]:
         # Add debug logging at the start to check websocket manager
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             logger.info("Websocket manager found in state")
         else:
             logger.warning("No websocket manager found in state")
@@ -24,7 +177,7 @@ class GroundingNode:
         company = state.get('company', 'Unknown Company')
         msg = f"🎯 Initiating research for {company}...\n"
         
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -34,14 +187,18 @@ class GroundingNode:
                 )
 
         site_scrape = {}
+        crawled_pages = {}
+        error_str = None
 
-        # Only attempt extraction if we have a URL
-        if url := state.get('company_url'):
+        # Only attempt extraction if we have a URL; a delta refresh reuses the last report's company research
+        if state.get('baseline'):
+            msg += "\n♻️ Refreshing the last report: searching only for news since it"
+        elif url := state.get('company_url'):
             msg += f"\n🌐 Analyzing company website: {url}"
             logger.info(f"Starting website analysis for {url}")
             
             # Send initial briefing status
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -50,62 +207,20 @@ class GroundingNode:
                         result={"step": "Initial Site Scrape"}
                     )
 
-            try:
-                logger.info("Initiating Tavily extraction")
-                site_extraction = await self.tavily_client.extract(url, extract_depth="basic")
-                
-                raw_contents = []
-                for item in site_extraction.get("results", []):
-                    if content := item.get("raw_content"):
-                        raw_contents.append(content)
-                
-                if raw_contents:
-                    site_scrape = {
-                        'title': company,
-                        'raw_content': "\n\n".join(raw_contents)
-                    }
-                    logger.info(f"Successfully extracted {len(raw_contents)} content sections")
-                    msg += "\n✅ Successfully extracted content from website"
-                    if websocket_manager := state.get('websocket_manager'):
-                        if job_id := state.get('job_id'):
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
-                                status="processing",
-                                message="Successfully extracted content from website",
-                                result={"step": "Initial Site Scrape"}
-                            )
-                else:
-                    logger.warning("No content found in extraction results")
-                    msg += "\n⚠️ No content found in website extraction"
-                    if websocket_manager := state.get('websocket_manager'):
-                        if job_id := state.get('job_id'):
-                            await websocket_manager.send_status_update(
-                                job_id=job_id,
-                                status="processing",
-                                message="⚠️ No content found in provided URL",
-                                result={"step": "Initial Site Scrape"}
-                            )
-            except Exception as e:
-                error_str = str(e)
-                logger.error(f"Website extraction error: {error_str}", exc_info=True)
-                error_msg = f"⚠️ Error extracting website content: {error_str}"
-                print(error_msg)
-                msg += f"\n{error_msg}"
-                if websocket_manager := state.get('websocket_manager'):
-                    if job_id := state.get('job_id'):
-                        await websocket_manager.send_status_update(
-                            job_id=job_id,
-                            status="website_error",
-                            message=error_msg,
-                            result={
-                                "step": "Initial Site Scrape", 
-                                "error": error_str,
-                                "continue_research": True  # Continue with research even if website extraction fails
-                            }
-                        )
+            # Query planning and searching use only the company, industry and HQ, so they run
+            # while the website is extracted; the collector merges the content in
+            scrape = self.scrape_site(state, websocket_manager, doc_store, site_pages)
+            if background_tasks is not None:
+                background_tasks["site_scrape"] = asyncio.create_task(scrape)
+            else:
+                scraped = await scrape
+                msg += scraped["msg"]
+                site_scrape = scraped["site_scrape"]
+                crawled_pages = scraped["site_pages"]
+                error_str = scraped.get("error")
         else:
             msg += "\n⏩ No company URL provided, proceeding directly to research phase"
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -122,26 +237,25 @@ class GroundingNode:
             msg += f"\n🏭 Industry: {industry}"
             context_data["industry"] = industry
         
-        # Initialize ResearchState with input information
+        # Input fields are already in the state; return only the research fields
         research_state = {
-            # Copy input fields
-            "company": state.get('company'),
-            "company_url": state.get('company_url'),
-            "hq_location": state.get('hq_location'),
-            "industry": state.get('industry'),
-            # Initialize research fields
             "messages": [AIMessage(content=msg)],
             "site_scrape": site_scrape,
-            # Pass through websocket info
-            "websocket_manager": state.get('websocket_manager'),
-            "job_id": state.get('job_id')
+            "site_pages": crawled_pages
         }
 
         # If there was an error in the initial extraction, store it in the state
-        if "⚠️ Error extracting website content:" in msg:
+        if error_str:
             research_state["error"] = error_str
 
         return research_state
 
-    async def run(self, state: InputState) -> ResearchState:
-        return await self.initial_search(state)
+    async def run(self, state: InputState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        return await self.initial_search(
+            state,
+            configurable.get("websocket_manager"),
+            configurable.get("doc_store"),
+            configurable.get("background_tasks"),
+            configurable.get("site_pages")
+        )
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+
+from ..classes import ResearchState, get_profile
+from ..services.clients import get_openai_client
+from ..services.completion_cache import cached_completion, completion_key
+from ..services.rate_limiter import estimate_tokens
+from ..services.resilience import call_provider
+from ..services.tracing import traced
+from .researchers import CompanyAnalyzer, FinancialAnalyst, IndustryAnalyzer, NewsScanner
+
+logger = logging.getLogger(__name__)
+
+ANALYSTS = (FinancialAnalyst, NewsScanner, IndustryAnalyzer, CompanyAnalyzer)
+
+
+class QueryPlanner:
+    """Plans every analyst's search queries in a single structured LLM call.
+
+    The analysts share nearly all of their query-generation context, so one call
+    returning {"financial": [...], "news": [...], ...} replaces four. An analyst
+    whose category is missing from the plan generates its own queries as before.
+    Profiles that use templated queries skip planning, and a delta refresh reuses
+    the queries of the report it refreshes.
+    """
+
+    def __init__(self) -> None:
+        self.openai_key = os.getenv("OPENAI_API_KEY")
+        if not self.openai_key:
+            raise ValueError("OPENAI_API_KEY environment variable is not set")
+        self.openai_client = get_openai_client(self.openai_key)
+
+    def build_messages(self, company: str, industry: str, hq: str, count: int) -> List[Dict[str, str]]:
+        categories = "\n\n".join(
+            f'"{analyst.category}":{analyst.query_prompt.format(company=company, industry=industry).rstrip()}'
+            for analyst in ANALYSTS
+        )
+        example = json.dumps({analyst.category: ["..."] for analyst in ANALYSTS})
+        return [
+            {
+                "role": "system",
+                "content": f"You are researching {company}, a company in the {industry} industry."
+            },
+            {
+                "role": "user",
+                "content": f"""Researching {company} (headquartered in {hq}) on {datetime.now().strftime("%B %d, %Y")}.
+Plan web search queries for each of these research categories:
+
+{categories}
+
+Important Guidelines:
+- Focus ONLY on {company}-specific information
+- Make queries very brief and to the point
+- Provide exactly {count} search queries per category, with no hyphens or dashes
+- DO NOT make assumptions about the industry - use only the provided industry information
+
+Respond with a JSON object with one list of queries per category, like {example}"""
+            }
+        ]
+
+    @staticmethod
+    def parse_plan(content: str, count: int) -> Dict[str, List[str]]:
+        """Keep each known category's non-empty queries from the model's JSON answer."""
+        plan = json.loads(content)
+        if not isinstance(plan, dict):
+            raise ValueError("Query plan is not a JSON object")
+        queries = {}
+        for analyst in ANALYSTS:
+            category_queries = plan.get(analyst.category)
+            if isinstance(category_queries, list):
+                cleaned = [str(q).strip() for q in category_queries if str(q).strip()]
+                if cleaned:
+                    queries[analyst.category] = cleaned[:count]
+        return queries
+
+    @traced("query_planning")
+    async def plan_queries(self, state: ResearchState, websocket_manager=None) -> Dict[str, List[str]]:
+        company = state.get("company", "Unknown Company")
+        industry = state.get("industry", "Unknown Industry")
+        hq = state.get("hq_location", "Unknown HQ")
+        job_id = state.get("job_id")
+        profile = get_profile(state.get("profile"))
+
+        if websocket_manager and job_id:
+            await websocket_manager.send_status_update(
+                job_id=job_id,
+                status="processing",
+                message="Planning research queries",
+                result={"step": "Query Planning"}
+            )
+
+        count = profile.queries_per_analyst
+        messages = self.build_messages(company, industry, hq, count)
+
+        async def complete() -> str:
+            response = await call_provider(
+                "openai.gpt-4.1-mini",
+                lambda: self.openai_client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=4096,
+                    response_format={"type": "json_object"}
+                ),
+                job_id=job_id,
+                tokens=estimate_tokens(messages, max_tokens=4096)
+            )
+            content = response.choices[0].message.content
+            # Only a usable plan is cached
+            self.parse_plan(content, count)
+            return content
+
+        key = completion_key("openai.gpt-4.1-mini", messages, temperature=0, max_tokens=4096,
+                             response_format="json_object")
+        try:
+            return self.parse_plan(await cached_completion(key, complete), count)
+        except Exception as e:
+            # The analysts fall back to generating their own queries
+            logger.error(f"Query planning failed for {company}: {e}")
+            return {}
+
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        websocket_manager = config.get("configurable", {}).get("websocket_manager")
+        if baseline := state.get("baseline"):
+            return {
+                "messages": [AIMessage(content="🗺️ Reusing the last report's search queries")],
+                "analyst_queries": baseline.get("analyst_queries") or {}
+            }
+        if get_profile(state.get("profile")).query_generation != "llm":
+            return {"messages": [AIMessage(content="🗺️ Using templated search queries")]}
+        queries = await self.plan_queries(state, websocket_manager)
+        planned = ", ".join(f"{len(q)} {category}" for category, q in queries.items()) or "none"
+        return {
+            "messages": [AIMessage(content=f"🗺️ Planned search queries: {planned}")],
+            "analyst_queries": queries
+        }
@@ -2,17 +2,33 @@ import asyncio
 import logging
 import os
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, List, Optional
 
-from openai import AsyncOpenAI
-from tavily import AsyncTavilyClient
+from langchain_core.messages import AIMessage
 
-from ...classes import ResearchState
+from ...classes import ResearchState, get_profile
+from ...services.clients import get_openai_client, get_tavily_client
+from ...services.completion_cache import cached_stream, completion_key
+from ...services.rate_limiter import estimate_tokens
+from ...services.prefetch import ExtractPrefetcher
+from ...services.resilience import call_provider
+from ...services.search_cache import search_cache_key, shared_call
+from ...services.site_crawl import answering_page
+from ...services.tracing import traced
 from ...utils.references import clean_title
 
 logger = logging.getLogger(__name__)
 
 class BaseResearcher:
+    # Research category and query guidance, set by each analyst; the QueryPlanner
+    # plans every category's queries in one call from these
+    category = ""
+    query_prompt = ""
+    # Queries used without an LLM call by the fast profile, formatted with company, industry and year
+    query_templates: List[str] = []
+    # Whether a delta refresh searches this category again; the others reuse the last report's documents
+    refreshed_by_delta = False
+
     def __init__(self):
         tavily_key = os.getenv("TAVILY_API_KEY")
         openai_key = os.getenv("OPENAI_API_KEY")
@@ -20,10 +36,16 @@ class BaseResearcher:
         if not tavily_key or not openai_key:
             raise ValueError("Missing API keys")
             
-        self.tavily_client = AsyncTavilyClient(api_key=tavily_key)
-        self.openai_client = AsyncOpenAI(api_key=openai_key)
+        self.tavily_client = get_tavily_client(tavily_key)
+        self.openai_client = get_openai_client(openai_key)
         self.analyst_type = "base_researcher"  # Default type
 
+    def reuse_baseline(self, state: ResearchState) -> Optional[Dict[str, Any]]:
+        """The update of a delta refresh that skips this analyst, or None to research as usual."""
+        if not state.get("baseline") or self.refreshed_by_delta:
+            return None
+        return {"messages": [AIMessage(content=f"♻️ Reusing {self.category} research from the last report")]}
+
     @property
     def analyst_type(self) -> str:
         if not hasattr(self, '_analyst_type'):
@@ -34,33 +56,52 @@ class BaseResearcher:
     def analyst_type(self, value: str):
         self._analyst_type = value
 
-    async def generate_queries(self, state: Dict, prompt: str) -> List[str]:
+    @traced("query_generation")
+    async def generate_queries(self, state: Dict, prompt: str, websocket_manager=None) -> List[str]:
         company = state.get("company", "Unknown Company")
         industry = state.get("industry", "Unknown Industry")
         hq = state.get("hq", "Unknown HQ")
         current_year = datetime.now().year
-        websocket_manager = state.get('websocket_manager')
         job_id = state.get('job_id')
+        profile = get_profile(state.get("profile"))
+
+        if profile.query_generation == "template":
+            queries = self._fallback_queries(company, current_year, state.get("industry"))
+            return await self.use_queries(queries[:profile.queries_per_analyst], job_id, websocket_manager)
+
+        # Use the queries planned for this category, if the planner produced any
+        if planned := (state.get("analyst_queries") or {}).get(self.category):
+            return await self.use_queries(planned[:profile.queries_per_analyst], job_id, websocket_manager)
         
         try:
             logger.info(f"Generating queries for {company} as {self.analyst_type}")
             
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"You are researching {company}, a company in the {industry} industry."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"""Researching {company} on {datetime.now().strftime("%B %d, %Y")}.
-{self._format_query_prompt(prompt, company, hq, current_year)}"""
-                    }
-                ],
-                temperature=0,
-                max_tokens=4096,
-                stream=True
+            messages = [
+                {
+                    "role": "system",
+                    "content": f"You are researching {company}, a company in the {industry} industry."
+                },
+                {
+                    "role": "user",
+                    "content": f"""Researching {company} on {datetime.now().strftime("%B %d, %Y")}.
+{self._format_query_prompt(prompt, company, hq, current_year, profile.queries_per_analyst)}"""
+                }
+            ]
+            response = await cached_stream(
+                completion_key("openai.gpt-4.1-mini", messages, temperature=0, max_tokens=4096),
+                lambda: call_provider(
+                    "openai.gpt-4.1-mini",
+                    lambda: self.openai_client.chat.completions.create(
+                        model="gpt-4.1-mini",
+                        messages=messages,
+                        temperature=0,
+                        max_tokens=4096,
+                        stream=True
+                    ),
+                    job_id=job_id,
+                    tokens=estimate_tokens(messages, max_tokens=4096),
+                    trace_attrs={"analyst": self.analyst_type}
+                )
             )
             
             queries = []
@@ -135,8 +176,8 @@ class BaseResearcher:
             if not queries:
                 raise ValueError(f"No queries generated for {company}")
 
-            # Limit to at most 4 queries.
-            queries = queries[:4]
+            # Limit to the profile's number of queries
+            queries = queries[:profile.queries_per_analyst]
             logger.info(f"Final queries for {self.analyst_type}: {queries}")
             
             return queries
@@ -152,16 +193,38 @@ class BaseResearcher:
                 )
             return []
 
-    def _format_query_prompt(self, prompt, company, hq, year):
+    async def use_queries(self, queries: List[str], job_id=None, websocket_manager=None) -> List[str]:
+        """Report planned or templated queries as generated, as a live generation would."""
+        if websocket_manager and job_id:
+            for number, query in enumerate(queries, 1):
+                await websocket_manager.send_status_update(
+                    job_id=job_id,
+                    status="query_generated",
+                    message="Generated new research query",
+                    result={
+                        "query": query,
+                        "query_number": number,
+                        "category": self.analyst_type,
+                        "is_complete": True
+                    }
+                )
+        logger.info(f"Using prepared queries for {self.analyst_type}: {queries}")
+        return queries
+
+    def _format_query_prompt(self, prompt, company, hq, year, count=4):
         return f"""{prompt}
 
         Important Guidelines:
         - Focus ONLY on {company}-specific information
         - Make queries very brief and to the point
-        - Provide exactly 4 search queries (one per line), with no hyphens or dashes
+        - Provide exactly {count} search queries (one per line), with no hyphens or dashes
         - DO NOT make assumptions about the industry - use only the provided industry information"""
 
-    def _fallback_queries(self, company, year):
+    def _fallback_queries(self, company, year, industry=None):
+        if self.query_templates:
+            # Without a known industry, industry queries are about the company's market instead
+            return [t.format(company=company, industry=industry or company, year=year)
+                    for t in self.query_templates]
         return [
             f"{company} overview {year}",
             f"{company} recent news {year}",
@@ -169,7 +232,7 @@ class BaseResearcher:
             f"{company} industry analysis {year}"
         ]
 
-    async def search_single_query(self, query: str, websocket_manager=None, job_id=None) -> Dict[str, Any]:
+    async def search_single_query(self, query: str, websocket_manager=None, job_id=None, profile=None) -> Dict[str, Any]:
         """Execute a single search query with proper error handling."""
         if not query or len(query.split()) < 3:
             return {}
@@ -187,10 +250,11 @@ class BaseResearcher:
                 )
 
             # Add news topic for news analysts
+            profile = profile or get_profile()
             search_params = {
-                "search_depth": "basic",
+                "search_depth": profile.search_depth,
                 "include_raw_content": False,
-                "max_results": 5
+                "max_results": profile.max_results
             }
             
             if self.analyst_type == "news_analyst":
@@ -198,9 +262,15 @@ class BaseResearcher:
             elif self.analyst_type == "financial_analyst":
                 search_params["topic"] = "finance"
 
-            results = await self.tavily_client.search(
-                query,
-                **search_params
+            results = await shared_call(
+                search_cache_key("tavily.search", query, **search_params),
+                lambda: call_provider(
+                    "tavily.search",
+                    lambda: self.tavily_client.search(query, **search_params),
+                    job_id=job_id,
+                    hedge=True,
+                    trace_attrs={"query": query}
+                )
             )
             
             docs = {}
@@ -258,13 +328,33 @@ class BaseResearcher:
                 )
             return {}
 
-    async def search_documents(self, state: ResearchState, queries: List[str]) -> Dict[str, Any]:
+    async def search_documents(self, state: ResearchState, queries: List[str], websocket_manager=None,
+                               days: Optional[int] = None,
+                               site_pages: Optional[Dict[str, Any]] = None,
+                               prefetcher: Optional[ExtractPrefetcher] = None,
+                               seen: Collection[str] = ()) -> Dict[str, Any]:
         """
         Execute all Tavily searches in parallel at maximum speed
+
+        With `days`, search only news published in that many past days. Queries answered by
+        a company website page crawled so far (`site_pages`, filled in as grounding fetches
+        them) are skipped; the collector adds those pages instead. With a `prefetcher`, results
+        scored to pass curation start extracting as soon as they arrive, except those at
+        `seen` URLs, which the analyst drops.
         """
-        websocket_manager = state.get('websocket_manager')
         job_id = state.get('job_id')
 
+        if site_pages:
+            unanswered = []
+            for query in queries:
+                if page := answering_page(query, site_pages, f"{self.category}_data"):
+                    logger.info(f"Skipping '{query}'; the company website answers it at {page}")
+                else:
+                    unanswered.append(query)
+            if queries and not unanswered:
+                return {}
+            queries = unanswered
+
         if not queries:
             logger.error("No valid queries to search")
             return {}
@@ -284,16 +374,19 @@ class BaseResearcher:
             )
 
         # Prepare all search parameters upfront
+        profile = get_profile(state.get("profile"))
         search_params = {
-            "search_depth": "basic",
+            "search_depth": profile.search_depth,
             "include_raw_content": False,
-            "max_results": 5
+            "max_results": profile.max_results
         }
         
         if self.analyst_type == "news_analyst":
             search_params["topic"] = "news"
         elif self.analyst_type == "financial_analyst":
             search_params["topic"] = "finance"
+        if days:
+            search_params.update(topic="news", days=days)
 
         if websocket_manager and job_id:
             await websocket_manager.send_status_update(
@@ -305,22 +398,30 @@ class BaseResearcher:
                     "total_queries": len(queries)
                 }
             )
-        # Create all API calls upfront - direct Tavily client calls without the extra wrapper
+        # Create all API calls upfront; jobs in a batch share identical searches
         search_tasks = [
-            self.tavily_client.search(query, **search_params)
+            shared_call(
+                search_cache_key("tavily.search", query, **search_params),
+                lambda query=query: call_provider(
+                    "tavily.search",
+                    lambda: self.tavily_client.search(query, **search_params),
+                    job_id=job_id,
+                    hedge=True,
+                    trace_attrs={"query": query}
+                )
+            )
             for query in queries
         ]
 
-        # Execute all API calls in parallel
-        try:
-            results = await asyncio.gather(*search_tasks)
-        except Exception as e:
-            logger.error(f"Error during parallel search execution: {e}")
-            return {}
+        # Execute all API calls in parallel; a failed query does not discard the others
+        results = await asyncio.gather(*search_tasks, return_exceptions=True)
 
         # Process results
         merged_docs = {}
         for query, result in zip(queries, results):
+            if isinstance(result, Exception):
+                logger.error(f"Search failed for query '{query}': {result}")
+                continue
             for item in result.get("results", []):
                 if not item.get("content") or not item.get("url"):
                     continue
@@ -342,6 +443,9 @@ class BaseResearcher:
                     "score": item.get("score", 0.0)
                 }
 
+        if prefetcher:
+            prefetcher.consider(merged_docs, self.category, profile.extract_depth, exclude=seen)
+
         # Send completion status
         if websocket_manager and job_id:
             await websocket_manager.send_status_update(
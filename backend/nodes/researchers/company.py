@@ -1,37 +1,48 @@
 from typing import Any, Dict
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ...classes import ResearchState
 from .base import BaseResearcher
 
 
 class CompanyAnalyzer(BaseResearcher):
+    category = "company"
+    query_prompt = """
+        Generate queries on the company fundamentals of {company} in the {industry} industry such as:
+        - Core products and services
+        - Company history and milestones
+        - Leadership team
+        - Business model and strategy
+        """
+    query_templates = [
+        "{company} products and services",
+        "{company} business model and strategy",
+        "{company} leadership team",
+        "{company} company history milestones",
+        "{company} customers and partners",
+        "{company} headquarters and locations",
+    ]
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "company_analyzer"
 
-    async def analyze(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze(self, state: ResearchState, websocket_manager=None, site_pages=None,
+                      prefetcher=None) -> Dict[str, Any]:
         company = state.get('company', 'Unknown Company')
         msg = [f"🏢 Company Analyzer analyzing {company}"]
         
         # Generate search queries using LLM
-        queries = await self.generate_queries(state, """
-        Generate queries on the company fundamentals of {company} in the {industry} industry such as:
-        - Core products and services
-        - Company history and milestones
-        - Leadership team
-        - Business model and strategy
-        """)
+        queries = await self.generate_queries(state, self.query_prompt, websocket_manager)
 
         # Add message to show subqueries with emojis
         subqueries_msg = "🔍 Subqueries for company analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
+        messages = [AIMessage(content=subqueries_msg)]
 
     # Send queries through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -46,28 +57,20 @@ class CompanyAnalyzer(BaseResearcher):
         
         company_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
-            msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            company_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'Company overview and information about {company}'  # Add a default query for site scrape
-            }
         
         # Perform additional research with comprehensive search
         try:
             # Store documents with their respective queries
             for query in queries:
-                documents = await self.search_documents(state, [query])
+                documents = await self.search_documents(state, [query], websocket_manager, site_pages=site_pages,
+                                                         prefetcher=prefetcher)
                 if documents:  # Only process if we got results
                     for url, doc in documents.items():
                         doc['query'] = query  # Associate each document with its query
                         company_data[url] = doc
             
             msg.append(f"\n✓ Found {len(company_data)} documents")
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -82,16 +85,16 @@ class CompanyAnalyzer(BaseResearcher):
         except Exception as e:
             msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
+        # Return only this analyst's additions to the state
         messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['company_data'] = company_data
-        
         return {
-            'message': msg,
+            'messages': messages,
             'company_data': company_data
         }
 
-    async def run(self, state: ResearchState) -> Dict[str, Any]:
-        return await self.analyze(state) 
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        if reused := self.reuse_baseline(state):
+            return reused
+        configurable = config.get("configurable", {})
+        return await self.analyze(state, configurable.get("websocket_manager"), configurable.get("site_pages"),
+                                  configurable.get("prefetcher"))
\ No newline at end of file
@@ -2,6 +2,7 @@ import logging
 from typing import Any, Dict
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ...classes import ResearchState
 from .base import BaseResearcher
@@ -9,31 +10,38 @@ from .base import BaseResearcher
 logger = logging.getLogger(__name__)
 
 class FinancialAnalyst(BaseResearcher):
+    category = "financial"
+    query_prompt = """
+                 Generate queries on the financial analysis of {company} in the {industry} industry such as:
+        - Fundraising history and valuation
+        - Financial statements and key metrics
+        - Revenue and profit sources
+        """
+    query_templates = [
+        "{company} funding rounds valuation {year}",
+        "{company} revenue {year}",
+        "{company} financial results key metrics",
+        "{company} investors",
+        "{company} profitability and margins",
+        "{company} acquisitions {year}",
+    ]
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "financial_analyzer"
 
-    async def analyze(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze(self, state: ResearchState, websocket_manager=None, site_pages=None,
+                      prefetcher=None) -> Dict[str, Any]:
         company = state.get('company', 'Unknown Company')
-        websocket_manager = state.get('websocket_manager')
         job_id = state.get('job_id')
         
         try:
             # Generate search queries
-            queries = await self.generate_queries(
-                state,
-                """
-                 Generate queries on the financial analysis of {company} in the {industry} industry such as:
-        - Fundraising history and valuation
-        - Financial statements and key metrics
-        - Revenue and profit sources
-        """)
+            queries = await self.generate_queries(state, self.query_prompt, websocket_manager)
             
             # Add message to show subqueries with emojis
             subqueries_msg = "🔍 Subqueries for financial analysis:\n" + "\n".join([f"• {query}" for query in queries])
-            messages = state.get('messages', [])
-            messages.append(AIMessage(content=subqueries_msg))
-            state['messages'] = messages
+            messages = [AIMessage(content=subqueries_msg)]
 
             # Send queries through WebSocket
             if websocket_manager:
@@ -49,18 +57,12 @@ class FinancialAnalyst(BaseResearcher):
                         }
                     )
             
-            # Process site scrape data
+            # Collect documents from each query
             financial_data = {}
-            if site_scrape := state.get('site_scrape'):
-                company_url = state.get('company_url', 'company-website')
-                financial_data[company_url] = {
-                    'title': state.get('company', 'Unknown Company'),
-                    'raw_content': site_scrape,
-                    'query': f'Financial information on {company}'
-                }
 
             for query in queries:
-                documents = await self.search_documents(state, [query])
+                documents = await self.search_documents(state, [query], websocket_manager, site_pages=site_pages,
+                                                         prefetcher=prefetcher)
                 for url, doc in documents.items():
                     doc['query'] = query
                     financial_data[url] = doc
@@ -81,10 +83,7 @@ class FinancialAnalyst(BaseResearcher):
                         }
                     )
             
-            # Update state
             messages.append(AIMessage(content=completion_msg))
-            state['messages'] = messages
-            state['financial_data'] = financial_data
 
             # Send completion status with final queries
             if websocket_manager and job_id:
@@ -99,11 +98,10 @@ class FinancialAnalyst(BaseResearcher):
                     }
                 )
 
+            # Return only this analyst's additions to the state
             return {
-                'message': completion_msg,
-                'financial_data': financial_data,
-                'analyst_type': self.analyst_type,
-                'queries': queries
+                'messages': messages,
+                'financial_data': financial_data
             }
 
         except Exception as e:
@@ -122,5 +120,9 @@ class FinancialAnalyst(BaseResearcher):
                     )
             raise  # Re-raise to maintain error flow
 
-    async def run(self, state: ResearchState) -> Dict[str, Any]:
-        return await self.analyze(state)
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        if reused := self.reuse_baseline(state):
+            return reused
+        configurable = config.get("configurable", {})
+        return await self.analyze(state, configurable.get("websocket_manager"), configurable.get("site_pages"),
+                                  configurable.get("prefetcher"))
\ No newline at end of file
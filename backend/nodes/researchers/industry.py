@@ -1,37 +1,70 @@
+from datetime import datetime
 from typing import Any, Dict
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ...classes import ResearchState
+from ...services.document_store import attach_content
+from ...services.industry_cache import get_industry_cache, industry_key
 from .base import BaseResearcher
 
 
 class IndustryAnalyzer(BaseResearcher):
+    category = "industry"
+    query_prompt = """
+        Generate queries on the industry analysis of {company} in the {industry} industry such as:
+        - Market position
+        - Competitors
+        - {industry} industry trends and challenges
+        - Market size and growth
+        """
+    query_templates = [
+        "{company} competitors",
+        "{company} market position {industry}",
+        "{industry} industry trends {year}",
+        "{industry} market size growth",
+        "{company} market share",
+        "{industry} industry challenges {year}",
+    ]
+    # Market-level queries, searched once per industry and shared through the industry cache
+    market_queries = [
+        "{industry} market size growth {year}",
+        "{industry} industry trends {year}",
+        "{industry} industry challenges {year}",
+    ]
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "industry_analyzer"
 
-    async def analyze(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze(self, state: ResearchState, websocket_manager=None, doc_store=None,
+                      site_pages=None, prefetcher=None) -> Dict[str, Any]:
         company = state.get('company', 'Unknown Company')
         industry = state.get('industry', 'Unknown Industry')
         msg = [f"🏭 Industry Analyzer analyzing {company} in {industry}"]
         
         # Generate search queries using LLM
-        queries = await self.generate_queries(state, """
-        Generate queries on the industry analysis of {company} in the {industry} industry such as:
-        - Market position
-        - Competitors
-        - {industry} industry trends and challenges
-        - Market size and growth
-        """)
+        queries = await self.generate_queries(state, self.query_prompt, websocket_manager)
+
+        # Market research is shared by companies in the same industry; this analyst's own
+        # queries then only need to cover the company
+        industry_cache = get_industry_cache()
+        cache_key = industry_key(industry, state.get('hq_location'), state.get('profile')) if industry_cache.enabled else None
+        shared = industry_cache.get(cache_key)
+        market_queries = []
+        if cache_key:
+            queries = [query for query in queries if company.lower() in query.lower()] or queries
+            if not shared:
+                year = datetime.now().year
+                market_queries = [template.format(industry=industry, year=year) for template in self.market_queries]
+                queries += [query for query in market_queries if query not in queries]
 
         subqueries_msg = "🔍 Subqueries for industry analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
+        messages = [AIMessage(content=subqueries_msg)]
 
         # Send queries through WebSocket
-        if websocket_manager := state.get('websocket_manager'):
+        if websocket_manager:
             if job_id := state.get('job_id'):
                 await websocket_manager.send_status_update(
                     job_id=job_id,
@@ -46,28 +79,31 @@ class IndustryAnalyzer(BaseResearcher):
         
         industry_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
-            msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            industry_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'Industry analysis on {company}'  # Add a default query for site scrape
-            }
+
+        if shared:
+            msg.append(f"\n♻️ Reusing {len(shared['documents'])} {industry} market documents")
+            for url, doc in shared['documents'].items():
+                doc = dict(doc)
+                if content := doc.pop('raw_content', None):
+                    attach_content(doc, content, doc_store)
+                industry_data[url] = doc
         
         # Perform additional research with increased search depth
         try:
             # Store documents with their respective queries
             for query in queries:
-                documents = await self.search_documents(state, [query])
+                documents = await self.search_documents(state, [query], websocket_manager, site_pages=site_pages,
+                                                         prefetcher=prefetcher)
                 if documents:  # Only process if we got results
                     for url, doc in documents.items():
                         doc['query'] = query  # Associate each document with its query
+                        if query in market_queries:
+                            # Kept for other companies in the industry once the briefing is written
+                            doc['market_level'] = True
                         industry_data[url] = doc
             
             msg.append(f"\n✓ Found {len(industry_data)} documents")
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -82,16 +118,18 @@ class IndustryAnalyzer(BaseResearcher):
         except Exception as e:
             msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
+        # Return only this analyst's additions to the state
         messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['industry_data'] = industry_data
-        
         return {
-            'message': msg,
+            'messages': messages,
             'industry_data': industry_data
         }
 
-    async def run(self, state: ResearchState) -> Dict[str, Any]:
-        return await self.analyze(state) 
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        if reused := self.reuse_baseline(state):
+            return reused
+        configurable = config.get("configurable", {})
+        return await self.analyze(
+            state, configurable.get("websocket_manager"), configurable.get("doc_store"), configurable.get("site_pages"),
+            configurable.get("prefetcher")
+        )
@@ -1,57 +1,70 @@
 from typing import Any, Dict
 
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from ...classes import ResearchState
+from ...services.snapshots import days_since, seen_urls
 from .base import BaseResearcher
 
 
 class NewsScanner(BaseResearcher):
+    category = "news"
+    refreshed_by_delta = True
+    query_prompt = """
+        Generate queries on the recent news coverage of {company} such as:
+        - Recent company announcements
+        - Press releases
+        - New partnerships
+        """
+    query_templates = [
+        "{company} news {year}",
+        "{company} announcements press release",
+        "{company} partnership {year}",
+        "{company} product launch {year}",
+        "{company} executive hires {year}",
+        "{company} media coverage",
+    ]
+
     def __init__(self) -> None:
         super().__init__()
         self.analyst_type = "news_analyzer"
 
-    async def analyze(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze(self, state: ResearchState, websocket_manager=None, site_pages=None,
+                      prefetcher=None) -> Dict[str, Any]:
         company = state.get('company', 'Unknown Company')
         msg = [f"📰 News Scanner analyzing {company}"]
         
         # Generate search queries using LLM
-        queries = await self.generate_queries(state, """
-        Generate queries on the recent news coverage of {company} such as:
-        - Recent company announcements
-        - Press releases
-        - New partnerships
-        """)
+        queries = await self.generate_queries(state, self.query_prompt, websocket_manager)
 
         subqueries_msg = "🔍 Subqueries for news analysis:\n" + "\n".join([f"• {query}" for query in queries])
-        messages = state.get('messages', [])
-        messages.append(AIMessage(content=subqueries_msg))
-        state['messages'] = messages
+        messages = [AIMessage(content=subqueries_msg)]
         
         news_data = {}
         
-        # If we have site_scrape data, include it first
-        if site_scrape := state.get('site_scrape'):
-            msg.append("\n📊 Including site scrape data in company analysis...")
-            company_url = state.get('company_url', 'company-website')
-            news_data[company_url] = {
-                'title': state.get('company', 'Unknown Company'),
-                'raw_content': site_scrape,
-                'query': f'News and announcements about {company}'  # Add a default query for site scrape
-            }
         
+        # A delta refresh only looks for news since the last report, from sources it has not read
+        days, seen = None, set()
+        if baseline := state.get('baseline'):
+            days, seen = days_since(baseline), seen_urls(baseline)
+            msg.append(f"\n♻️ Searching news from the last {days} day(s)")
+
         # Perform additional research with recent time filter
         try:
             # Store documents with their respective queries
             for query in queries:
-                documents = await self.search_documents(state, [query])
+                documents = await self.search_documents(state, [query], websocket_manager, days=days, site_pages=site_pages,
+                                                         prefetcher=prefetcher, seen=seen)
                 if documents:  # Only process if we got results
                     for url, doc in documents.items():
+                        if url in seen:
+                            continue
                         doc['query'] = query  # Associate each document with its query
                         news_data[url] = doc
             
             msg.append(f"\n✓ Found {len(news_data)} documents")
-            if websocket_manager := state.get('websocket_manager'):
+            if websocket_manager:
                 if job_id := state.get('job_id'):
                     await websocket_manager.send_status_update(
                         job_id=job_id,
@@ -66,16 +79,14 @@ class NewsScanner(BaseResearcher):
         except Exception as e:
             msg.append(f"\n⚠️ Error during research: {str(e)}")
         
-        # Update state with our findings
-        messages = state.get('messages', [])
+        # Return only this analyst's additions to the state
         messages.append(AIMessage(content="\n".join(msg)))
-        state['messages'] = messages
-        state['news_data'] = news_data
-        
         return {
-            'message': msg,
+            'messages': messages,
             'news_data': news_data
         }
 
-    async def run(self, state: ResearchState) -> Dict[str, Any]:
-        return await self.analyze(state) 
\ No newline at end of file
+    async def run(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        configurable = config.get("configurable", {})
+        return await self.analyze(state, configurable.get("websocket_manager"), configurable.get("site_pages"),
+                                  configurable.get("prefetcher"))
\ No newline at end of file
@@ -0,0 +1,378 @@
+"""Record provider traffic from a real job and replay it offline.
+
+A cassette is a gzip-compressed JSON Lines file. The first line describes the
+recorded job (company, URL, industry, HQ); each following line is one provider
+call: the endpoint, a hash of the request, how long the call took, and the
+response, or the error it raised. Streamed completions keep every chunk with
+the delay before it.
+
+Recording wraps the real Tavily, OpenAI and Gemini clients that the nodes get
+from `clients`, so the job runs normally while its traffic is written out:
+
+    with Recorder("acme.jsonl.gz", job={"company": "Acme", ...}).install():
+        ...run the graph...
+
+Replaying serves the recorded responses through the same factories, with the
+original timing scaled by `speed` (0 answers immediately), so CPU-side work such
+as curation, references, PDF rendering and WebSocket fan-out can be profiled on
+real payloads, repeatably and without API keys:
+
+    replayer = Replayer("acme.jsonl.gz", speed=0)
+    with replayer.install():
+        ...run the graph with replayer.job...
+
+Calls are matched by endpoint and a hash of the request, with dates removed so
+a cassette still matches on later days. Prompts built from concurrently fetched
+documents can list them in a different order, so a call with no exact match
+gets the next unused recording whose request starts the same way, or failing
+that the next unused recording for its endpoint.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import types
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from . import clients
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+# Characters of a request that identify what kind of call it is, e.g. which briefing
+PREFIX_CHARS = 400
+
+_DATE_PATTERN = re.compile(
+    r"\b(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+    r" \d{1,2}, \d{4}\b|\b\d{4}-\d{2}-\d{2}\b"
+)
+
+
+def request_keys(endpoint: str, *args: Any, **kwargs: Any) -> tuple:
+    """Hashes of a provider request's arguments, in full and of its opening characters."""
+    payload = _DATE_PATTERN.sub("<date>", json.dumps([endpoint, args, kwargs], sort_keys=True, default=str))
+    return (hashlib.sha1(payload.encode()).hexdigest(),
+            hashlib.sha1(payload[:PREFIX_CHARS].encode()).hexdigest())
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    from .resilience import status_code
+    return status_code(exc)
+
+
+class ReplayedProviderError(Exception):
+    """A provider error recorded on the cassette, raised again on replay."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_error_types: Dict[str, type] = {}
+
+
+def replayed_error(error: Dict[str, Any]) -> ReplayedProviderError:
+    """Rebuild a recorded error under its original class name, so retry rules treat it the same."""
+    name = error["type"]
+    if name not in _error_types:
+        _error_types[name] = type(name, (ReplayedProviderError,), {})
+    return _error_types[name](error["message"], error.get("status_code"))
+
+
+class Recorder:
+    """Writes every provider call made while installed to a cassette."""
+
+    def __init__(self, path: str, job: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.job = job or {}
+        self.calls: Counter = Counter()
+        self._file = None
+        self._start = time.monotonic()
+
+    def write(self, endpoint: str, keys: tuple, started: float, latency: float,
+              response: Any = None, error: Optional[BaseException] = None,
+              chunks: Optional[List[list]] = None) -> None:
+        entry: Dict[str, Any] = {
+            "endpoint": endpoint,
+            "key": keys[0],
+            "prefix": keys[1],
+            "offset": round(started - self._start, 4),
+            "latency": round(latency, 4),
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error)[:500],
+                              "status_code": _status_code(error)}
+        elif chunks is not None:
+            entry["chunks"] = chunks
+        else:
+            entry["response"] = response
+        self.calls[endpoint] += 1
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    async def call(self, endpoint: str, keys: tuple, call, serialize=lambda response: response):
+        """Make a real call and record its response or error."""
+        started = time.monotonic()
+        try:
+            response = await call()
+        except Exception as e:
+            self.write(endpoint, keys, started, time.monotonic() - started, error=e)
+            raise
+        self.write(endpoint, keys, started, time.monotonic() - started, response=serialize(response))
+        return response
+
+    @contextmanager
+    def install(self) -> Iterator["Recorder"]:
+        """Record calls made through the client factories while the block runs."""
+        tavily = clients.get_tavily_client(os.getenv("TAVILY_API_KEY"))
+        openai = clients.get_openai_client(os.getenv("OPENAI_API_KEY"))
+        gemini_key = os.getenv("GEMINI_API_KEY")
+        # Models are created per name, so wrap whatever the factory would have returned
+        gemini = clients._overrides.get("gemini") or (
+            lambda model_name: clients._gemini_model(gemini_key, model_name)
+        )
+
+        self._start = time.monotonic()
+        with gzip.open(self.path, "wt", encoding="utf-8") as self._file:
+            header = {"version": CASSETTE_VERSION, "recorded_at": datetime.now().isoformat(), "job": self.job}
+            self._file.write(json.dumps(header) + "\n")
+            with clients.override_clients(
+                tavily=_RecordingTavily(self, tavily),
+                openai=_RecordingOpenAI(self, openai),
+                gemini=lambda model_name: _RecordingGemini(self, model_name, gemini(model_name)),
+            ):
+                yield self
+        logger.info(f"Recorded {sum(self.calls.values())} provider calls to {self.path}")
+
+
+class _RecordingTavily:
+    def __init__(self, recorder: Recorder, client):
+        self.recorder = recorder
+        self.client = client
+
+    async def search(self, query: str, **kwargs):
+        return await self.recorder.call(
+            "tavily.search", request_keys("tavily.search", query, **kwargs),
+            lambda: self.client.search(query, **kwargs)
+        )
+
+    async def extract(self, urls, **kwargs):
+        return await self.recorder.call(
+            "tavily.extract", request_keys("tavily.extract", urls, **kwargs),
+            lambda: self.client.extract(urls, **kwargs)
+        )
+
+
+class _RecordingCompletions:
+    def __init__(self, recorder: Recorder, completions):
+        self.recorder = recorder
+        self.completions = completions
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **kwargs):
+        endpoint = f"openai.{model}"
+        keys = request_keys(endpoint, messages, stream=stream, **kwargs)
+        call = lambda: self.completions.create(model=model, messages=messages, stream=stream, **kwargs)
+        if not stream:
+            return await self.recorder.call(
+                endpoint, keys, call,
+                lambda response: {"content": response.choices[0].message.content,
+                                  "finish_reason": response.choices[0].finish_reason}
+            )
+
+        started = time.monotonic()
+        try:
+            response = await call()
+        except Exception as e:
+            self.recorder.write(endpoint, keys, started, time.monotonic() - started, error=e)
+            raise
+        return self._record_stream(endpoint, keys, started, response)
+
+    async def _record_stream(self, endpoint: str, keys: tuple, started: float, response):
+        chunks: List[list] = []
+        written = False
+        last = started
+        try:
+            async for chunk in response:
+                if chunk.choices:
+                    now = time.monotonic()
+                    choice = chunk.choices[0]
+                    chunks.append([round(now - last, 4), choice.delta.content, choice.finish_reason])
+                    last = now
+                    # Callers stop reading at the finish chunk, so write it out before yielding
+                    if choice.finish_reason and not written:
+                        self.recorder.write(endpoint, keys, started, chunks[0][0], chunks=chunks)
+                        written = True
+                yield chunk
+        finally:
+            if not written:
+                self.recorder.write(endpoint, keys, started, chunks[0][0] if chunks else 0.0, chunks=chunks)
+
+
+class _RecordingOpenAI:
+    def __init__(self, recorder: Recorder, client):
+        self.chat = types.SimpleNamespace(completions=_RecordingCompletions(recorder, client.chat.completions))
+
+
+class _RecordingGemini:
+    def __init__(self, recorder: Recorder, model_name: str, model):
+        self.recorder = recorder
+        self.endpoint = f"gemini.{model_name}"
+        self.model = model
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self.recorder.call(
+            self.endpoint, request_keys(self.endpoint, prompt, **kwargs),
+            lambda: self.model.generate_content_async(prompt, **kwargs),
+            lambda response: {"text": response.text}
+        )
+
+
+class Replayer:
+    """Serves a cassette's recorded responses in place of the provider clients."""
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        Args:
+            path: Cassette written by Recorder
+            speed: Multiplier on recorded latencies; 0 replays without waiting
+        """
+        self.path = path
+        self.speed = speed
+        self.by_key: Dict[tuple, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.by_prefix: Dict[tuple, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.by_endpoint: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.calls: Counter = Counter()
+        self.inexact: Counter = Counter()
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version {header.get('version')} in {path}")
+            self.header = header
+            for line in f:
+                entry = json.loads(line)
+                entry["used"] = False
+                self.by_key[(entry["endpoint"], entry["key"])].append(entry)
+                self.by_prefix[(entry["endpoint"], entry["prefix"])].append(entry)
+                self.by_endpoint[entry["endpoint"]].append(entry)
+
+    @property
+    def job(self) -> Dict[str, Any]:
+        """Inputs of the recorded job, for building the same Graph."""
+        return self.header.get("job", {})
+
+    def _next(self, queue: Deque[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        while queue:
+            entry = queue.popleft()
+            if not entry["used"]:
+                entry["used"] = True
+                return entry
+        return None
+
+    def take(self, endpoint: str, keys: tuple) -> Dict[str, Any]:
+        """The recording for a call: an exact match, else the closest unused one for the endpoint."""
+        self.calls[endpoint] += 1
+        entry = self._next(self.by_key.get((endpoint, keys[0]), deque()))
+        if entry is None:
+            entry = (self._next(self.by_prefix.get((endpoint, keys[1]), deque()))
+                     or self._next(self.by_endpoint.get(endpoint, deque())))
+            if entry is None:
+                raise LookupError(f"Cassette {self.path} has no more recorded {endpoint} calls")
+            self.inexact[endpoint] += 1
+        return entry
+
+    async def wait(self, seconds: float) -> None:
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds * self.speed)
+
+    async def respond(self, endpoint: str, keys: tuple) -> Dict[str, Any]:
+        """Wait out a recorded call's latency and return its entry, raising its error if it failed."""
+        entry = self.take(endpoint, keys)
+        if "chunks" not in entry:
+            await self.wait(entry["latency"])
+        if error := entry.get("error"):
+            raise replayed_error(error)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(sorted(self.calls.items())),
+            "inexact_matches": dict(sorted(self.inexact.items())),
+            "unused": {endpoint: sum(1 for e in queue if not e["used"])
+                       for endpoint, queue in sorted(self.by_endpoint.items())},
+        }
+
+    @contextmanager
+    def install(self) -> Iterator["Replayer"]:
+        """Serve the cassette from the client factories, with placeholder API keys if none are set."""
+        placeholders = {
+            name: "replay" for name in ("TAVILY_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY")
+            if not os.getenv(name)
+        }
+        os.environ.update(placeholders)
+        try:
+            with clients.override_clients(
+                tavily=_ReplayTavily(self),
+                openai=types.SimpleNamespace(chat=types.SimpleNamespace(completions=_ReplayCompletions(self))),
+                gemini=lambda model_name: _ReplayGemini(self, model_name),
+            ):
+                yield self
+        finally:
+            for name in placeholders:
+                os.environ.pop(name, None)
+
+
+class _ReplayTavily:
+    def __init__(self, replayer: Replayer):
+        self.replayer = replayer
+
+    async def search(self, query: str, **kwargs):
+        entry = await self.replayer.respond("tavily.search", request_keys("tavily.search", query, **kwargs))
+        return entry["response"]
+
+    async def extract(self, urls, **kwargs):
+        entry = await self.replayer.respond("tavily.extract", request_keys("tavily.extract", urls, **kwargs))
+        return entry["response"]
+
+
+def _choice(content: Optional[str], finish_reason: Optional[str]):
+    return types.SimpleNamespace(
+        delta=types.SimpleNamespace(content=content),
+        message=types.SimpleNamespace(content=content),
+        finish_reason=finish_reason,
+    )
+
+
+class _ReplayCompletions:
+    def __init__(self, replayer: Replayer):
+        self.replayer = replayer
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], stream: bool = False, **kwargs):
+        endpoint = f"openai.{model}"
+        entry = await self.replayer.respond(endpoint, request_keys(endpoint, messages, stream=stream, **kwargs))
+        if "chunks" in entry:
+            return self._stream(entry["chunks"])
+        response = entry["response"]
+        return types.SimpleNamespace(choices=[_choice(response["content"], response.get("finish_reason"))])
+
+    async def _stream(self, chunks: List[list]):
+        for delay, content, finish_reason in chunks:
+            await self.replayer.wait(delay)
+            yield types.SimpleNamespace(choices=[_choice(content, finish_reason)])
+
+
+class _ReplayGemini:
+    def __init__(self, replayer: Replayer, model_name: str):
+        self.replayer = replayer
+        self.endpoint = f"gemini.{model_name}"
+
+    async def generate_content_async(self, prompt, **kwargs):
+        entry = await self.replayer.respond(self.endpoint, request_keys(self.endpoint, prompt, **kwargs))
+        return types.SimpleNamespace(text=entry["response"]["text"])
@@ -0,0 +1,367 @@
+"""Durable LangGraph checkpointers so interrupted research jobs can be resumed.
+
+Every completed node is persisted under the job ID, so a job that failed in the
+editor or was cut off by a restart continues from the last good node instead of
+repeating its searches, extracts and briefings.
+
+Backends, chosen with CHECKPOINT_BACKEND:
+    sqlite (default)  local SQLite file at CHECKPOINT_SQLITE_PATH
+    mongo             the `checkpoints` collections of the app's MongoDB database
+    none              checkpointing disabled
+
+A completed job's checkpoints are deleted when it finishes. Those of a job that
+failed and was never resumed expire after CHECKPOINT_TTL_HOURS (default 72; 0
+keeps them): MongoDB drops them with TTL indexes, and prune_checkpoints deletes
+SQLite jobs whose latest checkpoint is older, along with their document directories.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.base.id import UUID
+
+from .document_store import DocumentStore, FileDocumentStore, MongoDocumentStore
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite").lower()
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints/checkpoints.sqlite")
+CHECKPOINT_DOCUMENT_DIR = os.getenv("CHECKPOINT_DOCUMENT_DIR", "checkpoints/documents")
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", 72))
+
+# 100-nanosecond intervals between the UUID epoch (1582) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def _ttl_index(collection, field: str) -> None:
+    """Expire a collection's documents CHECKPOINT_TTL_HOURS after `field`."""
+    if CHECKPOINT_TTL_HOURS <= 0:
+        return
+    try:
+        collection.create_index(field, expireAfterSeconds=int(CHECKPOINT_TTL_HOURS * 3600))
+    except Exception as e:
+        # e.g. an index on the field with a different TTL already exists
+        logger.warning(f"Could not create TTL index on {collection.name}.{field}: {e}")
+
+
+class MongoDBSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver backed by MongoDB.
+
+    Mirrors the layout of the SQLite saver: one collection of checkpoints and one
+    of pending writes, keyed by thread ID, namespace and checkpoint ID. PyMongo is
+    synchronous, so the async methods run it in a worker thread.
+    """
+
+    def __init__(self, db, *, serde=None):
+        super().__init__(serde=serde)
+        self.checkpoints = db.checkpoints
+        self.writes = db.checkpoint_writes
+        self.checkpoints.create_index(
+            [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)], unique=True
+        )
+        self.writes.create_index(
+            [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", 1), ("task_id", 1), ("idx", 1)],
+            unique=True
+        )
+        # Document bodies referenced from checkpoints, see MongoDocumentStore
+        db.checkpoint_documents.create_index([("job_id", 1), ("doc_id", 1)], unique=True)
+        _ttl_index(self.checkpoints, "updated_at")
+        _ttl_index(self.writes, "updated_at")
+        _ttl_index(db.checkpoint_documents, "created_at")
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        cursor = self.writes.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        ).sort([("task_id", 1), ("idx", 1)])
+        return [
+            (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"])))
+            for w in cursor
+        ]
+
+    def _to_tuple(self, doc: Dict[str, Any]) -> CheckpointTuple:
+        thread_id, checkpoint_ns = doc["thread_id"], doc["checkpoint_ns"]
+        parent_id = doc.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            {"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": doc["checkpoint_id"]
+            }},
+            self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            {"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_id
+            }} if parent_id else None,
+            self._load_writes(thread_id, checkpoint_ns, doc["checkpoint_id"])
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get a checkpoint by ID, or the latest one for the thread."""
+        query = {
+            "thread_id": str(config["configurable"]["thread_id"]),
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", "")
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = self.checkpoints.find_one(query, sort=[("checkpoint_id", -1)])
+        return self._to_tuple(doc) if doc else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by metadata."""
+        query: Dict[str, Any] = {}
+        if config is not None:
+            query["thread_id"] = str(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before is not None:
+            query["checkpoint_id"] = {"$lt": get_checkpoint_id(before)}
+
+        returned = 0
+        for doc in self.checkpoints.find(query).sort("checkpoint_id", -1):
+            item = self._to_tuple(doc)
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            returned += 1
+            if limit and returned >= limit:
+                return
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and return the config that points at it."""
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        self.checkpoints.replace_one(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]},
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+                "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                "type": type_,
+                "checkpoint": serialized_checkpoint,
+                "metadata_type": metadata_type,
+                "metadata": serialized_metadata,
+                "updated_at": datetime.now(timezone.utc)
+            },
+            upsert=True
+        )
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store a task's writes against the checkpoint it ran from."""
+        # Special channels (errors, interrupts) overwrite; regular writes are kept once
+        overwrite = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        for idx, (channel, value) in enumerate(writes):
+            key = {
+                "thread_id": str(config["configurable"]["thread_id"]),
+                "checkpoint_ns": str(config["configurable"]["checkpoint_ns"]),
+                "checkpoint_id": str(config["configurable"]["checkpoint_id"]),
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx)
+            }
+            type_, serialized = self.serde.dumps_typed(value)
+            doc = {**key, "channel": channel, "type": type_, "value": serialized,
+                   "updated_at": datetime.now(timezone.utc)}
+            if overwrite:
+                self.writes.replace_one(key, doc, upsert=True)
+            else:
+                self.writes.update_one(key, {"$setOnInsert": doc}, upsert=True)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write stored for a thread."""
+        self.checkpoints.delete_many({"thread_id": str(thread_id)})
+        self.writes.delete_many({"thread_id": str(thread_id)})
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        """Same monotonically increasing version format as the SQLite saver."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{0:016}"
+
+
+@asynccontextmanager
+async def open_checkpointer(mongodb=None) -> AsyncIterator[Optional[BaseCheckpointSaver]]:
+    """Open the configured checkpointer for the lifetime of the app, or yield None."""
+    if CHECKPOINT_BACKEND in ("", "none", "off", "false"):
+        yield None
+        return
+
+    if CHECKPOINT_BACKEND == "mongo":
+        if mongodb is None:
+            logger.warning("CHECKPOINT_BACKEND=mongo but MongoDB is not configured; checkpointing disabled")
+            yield None
+            return
+        saver = await asyncio.to_thread(MongoDBSaver, mongodb.db)
+        logger.info("Checkpointing research jobs to MongoDB")
+        yield saver
+        return
+
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    os.makedirs(os.path.dirname(CHECKPOINT_SQLITE_PATH) or ".", exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_SQLITE_PATH) as saver:
+        logger.info(f"Checkpointing research jobs to {CHECKPOINT_SQLITE_PATH}")
+        yield saver
+
+
+def create_document_store(job_id: str, checkpointer=None, mongodb=None) -> DocumentStore:
+    """Document store for a job that lives as long as its checkpoints do."""
+    if checkpointer is None:
+        return DocumentStore()
+    if isinstance(checkpointer, MongoDBSaver) and mongodb is not None:
+        return MongoDocumentStore(mongodb.db.checkpoint_documents, job_id)
+    return FileDocumentStore(os.path.join(CHECKPOINT_DOCUMENT_DIR, job_id))
+
+
+async def delete_checkpoints(checkpointer, doc_store: DocumentStore, job_id: str) -> None:
+    """Drop a finished job's checkpoints and stored documents."""
+    try:
+        if isinstance(checkpointer, MongoDBSaver):
+            await checkpointer.adelete_thread(job_id)
+        elif checkpointer is not None:
+            async with checkpointer.lock:
+                await checkpointer.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (job_id,))
+                await checkpointer.conn.execute("DELETE FROM writes WHERE thread_id = ?", (job_id,))
+                await checkpointer.conn.commit()
+        await asyncio.to_thread(doc_store.clear)
+    except Exception as e:
+        logger.warning(f"Failed to delete checkpoints for job {job_id}: {e}")
+
+
+def _checkpoint_time(checkpoint_id: str) -> Optional[float]:
+    """Creation time of a checkpoint, from its time-ordered UUID6 ID."""
+    try:
+        return (UUID(checkpoint_id).time - _UUID_EPOCH_OFFSET) / 1e7
+    except ValueError:
+        return None
+
+
+async def prune_checkpoints(checkpointer, active=()) -> int:
+    """Delete the checkpoints and documents of jobs that have not been checkpointed for
+    CHECKPOINT_TTL_HOURS, other than the `active` ones, and return how many were deleted.
+
+    Jobs are found from their latest checkpoint, so one that failed before storing any
+    document is pruned too; document directories left without checkpoints go by mtime.
+    Covers the SQLite backend; MongoDB expires its checkpoints with TTL indexes.
+    """
+    if checkpointer is None or isinstance(checkpointer, MongoDBSaver) or CHECKPOINT_TTL_HOURS <= 0:
+        return 0
+    cutoff = time.time() - CHECKPOINT_TTL_HOURS * 3600
+
+    await checkpointer.setup()
+    async with checkpointer.lock:
+        async with checkpointer.conn.execute(
+            "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+        ) as cursor:
+            latest = {thread_id: _checkpoint_time(checkpoint_id) for thread_id, checkpoint_id in await cursor.fetchall()}
+
+    def orphaned_directories():
+        orphaned = []
+        try:
+            entries = list(os.scandir(CHECKPOINT_DOCUMENT_DIR))
+        except OSError:
+            return orphaned
+        for entry in entries:
+            try:
+                if entry.name not in latest and entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    orphaned.append(entry.name)
+            except OSError:
+                continue
+        return orphaned
+
+    stale = [job_id for job_id, checkpointed_at in latest.items() if checkpointed_at is not None and checkpointed_at < cutoff]
+    stale += await asyncio.to_thread(orphaned_directories)
+    stale = [job_id for job_id in stale if job_id not in active]
+    for job_id in stale:
+        await delete_checkpoints(checkpointer, FileDocumentStore(os.path.join(CHECKPOINT_DOCUMENT_DIR, job_id)), job_id)
+    if stale:
+        logger.info(f"Pruned checkpoints of {len(stale)} jobs older than {CHECKPOINT_TTL_HOURS:g} hours")
+    return len(stale)
@@ -0,0 +1,72 @@
+"""Provider SDK clients, imported and constructed on first use.
+
+The Tavily, OpenAI and Gemini SDKs are slow to import, so they are loaded here
+rather than at module import time. Clients are shared per API key across nodes
+and jobs.
+
+`override_clients()` swaps in stand-in clients, such as the fakes in
+`fake_providers` or the recorders and replayers in `cassette`, so the pipeline
+can run without network access or have its traffic captured.
+"""
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator
+
+# Stand-in clients by provider, set by override_clients()
+_overrides: Dict[str, Any] = {}
+
+
+@contextmanager
+def override_clients(tavily: Any = None, openai: Any = None, gemini: Any = None) -> Iterator[None]:
+    """Serve the given clients instead of the SDK clients while the block runs.
+
+    `gemini` is a function of the model name that returns a model. Nodes fetch
+    clients when they are constructed, so graphs must be built inside the block.
+    """
+    previous = dict(_overrides)
+    _overrides.update({
+        name: client for name, client in (("tavily", tavily), ("openai", openai), ("gemini", gemini))
+        if client is not None
+    })
+    try:
+        yield
+    finally:
+        _overrides.clear()
+        _overrides.update(previous)
+
+
+def get_tavily_client(api_key: str):
+    """Return a shared AsyncTavilyClient for the given API key."""
+    return _overrides.get("tavily") or _tavily_client(api_key)
+
+
+def get_openai_client(api_key: str):
+    """Return a shared AsyncOpenAI client for the given API key."""
+    return _overrides.get("openai") or _openai_client(api_key)
+
+
+def get_gemini_model(api_key: str, model_name: str):
+    """Return a Gemini GenerativeModel configured with the given API key."""
+    if "gemini" in _overrides:
+        return _overrides["gemini"](model_name)
+    return _gemini_model(api_key, model_name)
+
+
+@lru_cache(maxsize=None)
+def _tavily_client(api_key: str):
+    from tavily import AsyncTavilyClient
+    return AsyncTavilyClient(api_key=api_key)
+
+
+@lru_cache(maxsize=None)
+def _openai_client(api_key: str):
+    from openai import AsyncOpenAI
+    # Retries are handled by call_provider; the timeout bounds each streamed chunk
+    return AsyncOpenAI(api_key=api_key, max_retries=0, timeout=180)
+
+
+@lru_cache(maxsize=None)
+def _gemini_model(api_key: str, model_name: str):
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
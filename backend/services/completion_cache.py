@@ -0,0 +1,187 @@
+"""Process-wide cache of LLM completions, keyed by a hash of the request.
+
+Query generation and both editor passes run at temperature 0, so a re-run whose
+curated inputs are unchanged sends the same prompt and would pay for the same
+generation again. The cache key covers the model, the full prompt, the sampling
+parameters and CACHE_VERSION, so a different model, prompt or parameter is
+always a miss. Only temperature-0 requests are cached: a sampled completion,
+such as a Gemini briefing at the model's default temperature, is one random
+draw, and replaying it would pin that draw for every later job.
+
+Entries expire after a TTL and the cache is bounded by entry count and total
+size, evicting least recently used entries first. Streamed completions are
+cached once they finish, and a hit is streamed back in small chunks shaped like
+the provider's, so the UI shows the text arriving as if generated live.
+
+Configuration:
+    COMPLETION_CACHE_TTL       seconds entries are kept; 0 disables the cache (default 86400)
+    COMPLETION_CACHE_SIZE      most entries kept (default 512)
+    COMPLETION_CACHE_MAX_MB    most text kept, in megabytes (default 64)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import types
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import COMPLETION_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the way completions are requested or used changes, to drop old entries
+CACHE_VERSION = 1
+
+COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", 86400))
+COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", 512))
+COMPLETION_CACHE_MAX_MB = float(os.getenv("COMPLETION_CACHE_MAX_MB", 64))
+
+# Characters per chunk when a cached completion is streamed back
+REPLAY_CHUNK_CHARS = 24
+
+
+def completion_key(model: str, prompt: Any, **params: Any) -> Optional[str]:
+    """Cache key for a completion request, or None if it is sampled and must not be cached.
+
+    Args:
+        model: Provider and model, e.g. "openai.gpt-4.1"
+        prompt: The prompt string or chat messages
+        params: Sampling parameters that affect the output; only temperature 0 is cached
+    """
+    if params.get("temperature") != 0:
+        return None
+    payload = json.dumps([CACHE_VERSION, model, prompt, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CompletionCache:
+    """LRU cache of completion text with a TTL and entry and size bounds."""
+
+    def __init__(self, ttl: float = COMPLETION_CACHE_TTL, max_entries: int = COMPLETION_CACHE_SIZE,
+                 max_chars: int = int(COMPLETION_CACHE_MAX_MB * 2 ** 20)):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                COMPLETION_CACHE_REQUESTS.inc(result="hit")
+                return entry[1]
+            if entry:
+                self._remove(key)
+            self.misses += 1
+            COMPLETION_CACHE_REQUESTS.inc(result="miss")
+            return None
+
+    def set(self, key: str, text: str) -> None:
+        if not self.enabled or not text or len(text) > self.max_chars:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, text)
+            self._chars += len(text)
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, text = self._entries.pop(key)
+        self._chars -= len(text)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "chars": self._chars,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_completion_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache() -> CompletionCache:
+    """Return the process-wide completion cache, shared by every job and node."""
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = CompletionCache()
+    return _completion_cache
+
+
+async def cached_completion(key: Optional[str], complete: Callable[[], Awaitable[str]]) -> str:
+    """Return the cached text for a key, or call `complete` and cache what it returns.
+    Without a key, `complete` is always called."""
+    if key is None:
+        return await complete()
+    cache = get_completion_cache()
+    text = cache.get(key)
+    if text is not None:
+        return text
+    text = await complete()
+    cache.set(key, text)
+    return text
+
+
+def _chunk(content: Optional[str], finish_reason: Optional[str] = None):
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(
+        delta=types.SimpleNamespace(content=content), finish_reason=finish_reason
+    )])
+
+
+async def _replay(text: str) -> AsyncIterator[Any]:
+    for start in range(0, len(text), REPLAY_CHUNK_CHARS):
+        yield _chunk(text[start:start + REPLAY_CHUNK_CHARS])
+        # Let status updates for each chunk go out before the next one
+        await asyncio.sleep(0)
+    yield _chunk(None, "stop")
+
+
+async def _record(key: str, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    parts = []
+    async for chunk in stream:
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+            # Callers stop reading at the finish chunk; only complete generations are cached
+            if choice.finish_reason == "stop":
+                get_completion_cache().set(key, "".join(parts))
+        yield chunk
+
+
+async def cached_stream(key: Optional[str],
+                        open_stream: Callable[[], Awaitable[AsyncIterator[Any]]]) -> AsyncIterator[Any]:
+    """Return a chat completion stream for a key: the cached text replayed as chunks,
+    or the live stream from `open_stream`, cached once it finishes. Without a key, the
+    live stream is returned uncached."""
+    if key is None:
+        return await open_stream()
+    cache = get_completion_cache()
+    text = cache.get(key)
+    if text is not None:
+        return _replay(text)
+    return _record(key, await open_stream())
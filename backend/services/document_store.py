@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class DocumentStore:
+    """Per-job store for large document bodies, referenced by ID from the graph state.
+
+    Keeping raw page content out of the LangGraph state means each node's update
+    only carries small document references instead of every extracted page.
+
+    Stores that persist bodies do not write on `put`, which runs inside async nodes;
+    new bodies are written together by `flush`, in a worker thread. The graph flushes
+    after each node, before the node's checkpoint can reference them.
+    """
+
+    # Whether bodies are written anywhere beyond this process's memory
+    persistent = False
+
+    def __init__(self):
+        self._documents: Dict[str, str] = {}
+        self._unsaved: Dict[str, str] = {}
+
+    def put(self, content: str) -> str:
+        """Store a document body and return its content-addressed ID."""
+        doc_id = hashlib.sha256(content.encode('utf-8')).hexdigest()[:24]
+        if doc_id not in self._documents:
+            self._documents[doc_id] = content
+            if self.persistent:
+                self._unsaved[doc_id] = content
+        return doc_id
+
+    async def flush(self) -> None:
+        """Write the bodies stored since the last flush without blocking the event loop."""
+        if not self._unsaved:
+            return
+        unsaved, self._unsaved = self._unsaved, {}
+        try:
+            await asyncio.to_thread(self._save_all, unsaved)
+        except BaseException:
+            # Written with the next flush instead
+            self._unsaved = {**unsaved, **self._unsaved}
+            raise
+
+    async def preload(self, doc_ids: Iterable[str]) -> None:
+        """Load bodies that are only in persistent storage, e.g. on a resumed job.
+
+        Nodes call this before resolving content, so the reads run together in a
+        worker thread instead of one blocking `get` at a time on the event loop.
+        """
+        missing = {doc_id for doc_id in doc_ids if doc_id not in self._documents}
+        if self.persistent and missing:
+            self._documents.update(await asyncio.to_thread(self._load_all, missing))
+
+    def get(self, doc_id: str) -> str:
+        """Return a stored document body, or an empty string if it is unknown.
+
+        Bodies not in memory are read synchronously; call `preload` first from async code.
+        """
+        if doc_id not in self._documents:
+            if (content := self._load(doc_id)) is None:
+                return ''
+            self._documents[doc_id] = content
+        return self._documents[doc_id]
+
+    def clear(self) -> None:
+        """Forget every stored document."""
+        self._documents.clear()
+        self._unsaved.clear()
+
+    def _save_all(self, documents: Dict[str, str]) -> None:
+        """Persist new documents by ID. Runs in a worker thread."""
+        for doc_id, content in documents.items():
+            self._save(doc_id, content)
+
+    def _save(self, doc_id: str, content: str) -> None:
+        """Persist a new document. The in-memory store keeps nothing else."""
+
+    def _load_all(self, doc_ids: Iterable[str]) -> Dict[str, str]:
+        """Load the stored documents among these IDs. Runs in a worker thread."""
+        return {doc_id: content for doc_id in doc_ids if (content := self._load(doc_id)) is not None}
+
+    def _load(self, doc_id: str) -> Optional[str]:
+        """Load a document that is not in memory, e.g. after a restart."""
+        return None
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Whether a body is in memory; `preload` brings in stored ones without blocking."""
+        return doc_id in self._documents
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def total_chars(self) -> int:
+        return sum(len(content) for content in self._documents.values())
+
+
+class FileDocumentStore(DocumentStore):
+    """Document store that also writes each body to a per-job directory.
+
+    Used with checkpointing, so documents referenced from a checkpoint can still
+    be resolved when a job is resumed in a new process.
+    """
+
+    persistent = True
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+
+    def _path(self, doc_id: str) -> str:
+        return os.path.join(self.directory, f"{doc_id}.txt")
+
+    def _save(self, doc_id: str, content: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(doc_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _load(self, doc_id: str) -> Optional[str]:
+        try:
+            with open(self._path(doc_id), encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def clear(self) -> None:
+        super().clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class MongoDocumentStore(DocumentStore):
+    """Document store that also keeps each body in a MongoDB collection.
+
+    Bodies carry a `created_at` time, which a TTL index uses to expire them.
+    """
+
+    persistent = True
+
+    def __init__(self, collection, job_id: str):
+        super().__init__()
+        self.collection = collection
+        self.job_id = job_id
+
+    def _save_all(self, documents: Dict[str, str]) -> None:
+        from pymongo import UpdateOne
+
+        created_at = datetime.now(timezone.utc)
+        self.collection.bulk_write([
+            UpdateOne(
+                {"job_id": self.job_id, "doc_id": doc_id},
+                {"$setOnInsert": {"content": content, "created_at": created_at}},
+                upsert=True
+            )
+            for doc_id, content in documents.items()
+        ], ordered=False)
+
+    def _load_all(self, doc_ids: Iterable[str]) -> Dict[str, str]:
+        docs = self.collection.find(
+            {"job_id": self.job_id, "doc_id": {"$in": list(doc_ids)}},
+            {"doc_id": 1, "content": 1}
+        )
+        return {doc["doc_id"]: doc["content"] for doc in docs}
+
+    def _load(self, doc_id: str) -> Optional[str]:
+        doc = self.collection.find_one({"job_id": self.job_id, "doc_id": doc_id})
+        return doc["content"] if doc else None
+
+    def clear(self) -> None:
+        super().clear()
+        self.collection.delete_many({"job_id": self.job_id})
+
+
+def attach_content(doc: Dict[str, Any], content: str, doc_store: Optional[DocumentStore]) -> None:
+    """Attach raw content to a document, by reference when a store is available."""
+    if doc_store is None:
+        doc['raw_content'] = content
+    else:
+        doc.pop('raw_content', None)
+        doc['raw_content_id'] = doc_store.put(content)
+
+
+def has_content(doc: Dict[str, Any]) -> bool:
+    """Check whether a document already carries raw content, inline or by reference."""
+    return bool(doc.get('raw_content') or doc.get('raw_content_id'))
+
+
+def get_content(doc: Dict[str, Any], doc_store: Optional[DocumentStore]) -> str:
+    """Resolve a document's raw content, whether inline or held in the store."""
+    if content := doc.get('raw_content'):
+        return content
+    if doc_store is not None and (doc_id := doc.get('raw_content_id')):
+        return doc_store.get(doc_id)
+    return ''
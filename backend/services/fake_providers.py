@@ -0,0 +1,314 @@
+"""In-process fake Tavily, OpenAI and Gemini clients for offline runs.
+
+The fakes implement the parts of each SDK the nodes call, with the same response
+shapes, so a full Graph can run with no network and no API keys:
+
+    providers = FakeProviders(seed=1, error_rate=0.02)
+    with providers.install():
+        graph = Graph(company="Acme", url="https://acme.com")
+        ...
+
+Latency, result sizes and error rates are configurable. Responses are drawn
+from a random generator seeded by the request itself, so the same request always
+gets the same answer, whatever order concurrent calls land in. Latency and
+injected errors are also seeded by how many times the request has been sent, so
+a retry can succeed; they look like provider 503s and are retried by
+call_provider.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import types
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .clients import override_clients
+
+_WORDS = (
+    "revenue platform customers growth market funding enterprise product partnership launch "
+    "expansion analytics security regulation pricing acquisition leadership strategy competitor "
+    "segment infrastructure subscription margin investment headcount roadmap integration"
+).split()
+
+# Sites the fake search engine draws URLs from; a small pool means some
+# results repeat across queries, as they do with a real engine
+_DOMAINS = [f"{name}.example.com" for name in (
+    "news", "finance", "industry", "reviews", "blog", "wiki", "press", "analyst",
+    "markets", "tech", "business", "research",
+)]
+
+
+def _filler(length: int, rng: random.Random) -> str:
+    """Deterministic prose of about `length` characters."""
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+class LatencyModel:
+    """Lognormal latency around a median, with occasional much slower stragglers."""
+
+    def __init__(self, median_ms: float, sigma: float = 0.4,
+                 straggler_rate: float = 0.0, straggler_factor: float = 10.0):
+        self.median = median_ms / 1000
+        self.sigma = sigma
+        self.straggler_rate = straggler_rate
+        self.straggler_factor = straggler_factor
+
+    def sample(self, rng: random.Random) -> float:
+        """Latency in seconds."""
+        if self.median <= 0:
+            return 0.0
+        latency = rng.lognormvariate(math.log(self.median), self.sigma)
+        if rng.random() < self.straggler_rate:
+            latency *= self.straggler_factor
+        return latency
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure; its status code makes call_provider retry it."""
+
+    def __init__(self, endpoint: str, status_code: int = 503):
+        super().__init__(f"Injected {status_code} from fake {endpoint}")
+        self.status_code = status_code
+
+
+class FakeProviders:
+    """Shared configuration, randomness and call counts for the fake clients."""
+
+    def __init__(self, seed: int = 0,
+                 search_latency: Optional[LatencyModel] = None,
+                 extract_latency: Optional[LatencyModel] = None,
+                 llm_latency: Optional[LatencyModel] = None,
+                 llm_chars_per_second: float = 4000,
+                 advanced_latency_factor: float = 2.0,
+                 error_rate: float = 0.0,
+                 results_per_search: Optional[int] = None,
+                 content_chars: int = 1500,
+                 raw_content_chars: int = 20000,
+                 queries_per_analyst: int = 4,
+                 briefing_chars: int = 4000,
+                 report_chars: int = 12000):
+        self.seed = seed
+        self.search_latency = search_latency or LatencyModel(400)
+        self.extract_latency = extract_latency or LatencyModel(900)
+        # Time to first token; the rest of the completion streams at llm_chars_per_second
+        self.llm_latency = llm_latency or LatencyModel(600)
+        self.llm_chars_per_second = llm_chars_per_second
+        # Advanced search and extraction are slower than basic
+        self.advanced_latency_factor = advanced_latency_factor
+        self.error_rate = error_rate
+        self.results_per_search = results_per_search
+        self.content_chars = content_chars
+        self.raw_content_chars = raw_content_chars
+        self.queries_per_analyst = queries_per_analyst
+        self.briefing_chars = briefing_chars
+        self.report_chars = report_chars
+
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.chars_returned: Counter = Counter()
+        self.chars_sent: Counter = Counter()
+        # Tavily API credits, billed as Tavily does: 1 per basic search or 5 basic extracts, double for advanced
+        self.tavily_credits = 0.0
+        self._attempts: Counter = Counter()
+
+        self.tavily = FakeTavilyClient(self)
+        self.openai = FakeOpenAIClient(self)
+
+    async def respond(self, endpoint: str, key: str, latency: LatencyModel, slowdown: float = 1.0) -> random.Random:
+        """Count a call, wait out its latency and maybe fail it; returns the generator for its response."""
+        self.calls[endpoint] += 1
+        self._attempts[(endpoint, key)] += 1
+        digest = hashlib.sha256(f"{self.seed}:{endpoint}:{key}".encode()).hexdigest()
+        attempt = random.Random(f"{digest}:{self._attempts[(endpoint, key)]}")
+        await asyncio.sleep(latency.sample(attempt) * slowdown)
+        if attempt.random() < self.error_rate:
+            self.errors[endpoint] += 1
+            raise FakeProviderError(endpoint)
+        return random.Random(digest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(sorted(self.calls.items())),
+            "errors": dict(sorted(self.errors.items())),
+            "chars_returned": dict(sorted(self.chars_returned.items())),
+            "chars_sent": dict(sorted(self.chars_sent.items())),
+            "tavily_credits": self.tavily_credits,
+        }
+
+    @contextmanager
+    def install(self) -> Iterator["FakeProviders"]:
+        """Serve the fakes from the client factories, with placeholder API keys if none are set."""
+        placeholders = {
+            name: "fake" for name in ("TAVILY_API_KEY", "OPENAI_API_KEY", "GEMINI_API_KEY")
+            if not os.getenv(name)
+        }
+        os.environ.update(placeholders)
+        try:
+            with override_clients(tavily=self.tavily, openai=self.openai,
+                                  gemini=lambda model_name: FakeGeminiModel(self, model_name)):
+                yield self
+        finally:
+            for name in placeholders:
+                os.environ.pop(name, None)
+
+
+class FakeTavilyClient:
+    """Stands in for tavily.AsyncTavilyClient."""
+
+    def __init__(self, providers: FakeProviders):
+        self.providers = providers
+
+    async def search(self, query: str, search_depth: str = "basic", topic: str = "general",
+                     max_results: int = 5, include_raw_content: bool = False, **kwargs) -> Dict[str, Any]:
+        p = self.providers
+        advanced = search_depth == "advanced"
+        p.tavily_credits += 2 if advanced else 1
+        rng = await p.respond("tavily.search", f"{query}|{topic}", p.search_latency,
+                              p.advanced_latency_factor if advanced else 1.0)
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:60]
+        results = []
+        for i in range(p.results_per_search or max_results):
+            domain = rng.choice(_DOMAINS)
+            result = {
+                "url": f"https://{domain}/{slug}/{rng.randrange(3)}",
+                "title": f"{query.title()} - {domain.split('.')[0].title()} {i + 1}",
+                "content": _filler(p.content_chars, rng),
+                "score": round(rng.uniform(0.2, 0.95), 4),
+            }
+            if include_raw_content:
+                result["raw_content"] = _filler(p.raw_content_chars, rng)
+            results.append(result)
+        p.chars_returned["tavily.search"] += sum(len(r["content"]) + len(r.get("raw_content", "")) for r in results)
+        return {"query": query, "results": results, "response_time": 0.0}
+
+    async def extract(self, urls, extract_depth: str = "basic", **kwargs) -> Dict[str, Any]:
+        p = self.providers
+        urls = [urls] if isinstance(urls, str) else list(urls)
+        advanced = extract_depth == "advanced"
+        p.tavily_credits += (2 if advanced else 1) * len(urls) / 5
+        rng = await p.respond("tavily.extract", "|".join(urls), p.extract_latency,
+                              p.advanced_latency_factor if advanced else 1.0)
+        results = [{"url": url, "raw_content": _filler(p.raw_content_chars, rng)} for url in urls]
+        p.chars_returned["tavily.extract"] += sum(len(r["raw_content"]) for r in results)
+        return {"results": results, "failed_results": [], "response_time": 0.0}
+
+
+def _chunk(content: Optional[str], finish_reason: Optional[str] = None):
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(
+        delta=types.SimpleNamespace(content=content), finish_reason=finish_reason
+    )])
+
+
+class _FakeCompletions:
+    def __init__(self, providers: FakeProviders):
+        self.providers = providers
+
+    async def create(self, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs):
+        p = self.providers
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        endpoint = f"openai.{model}"
+        p.chars_sent[endpoint] += len(prompt)
+        rng = await p.respond(endpoint, prompt, p.llm_latency)
+        text = self._completion(prompt, rng, json_mode=bool(kwargs.get("response_format")))
+        p.chars_returned[endpoint] += len(text)
+
+        if not stream:
+            await asyncio.sleep(len(text) / p.llm_chars_per_second if p.llm_chars_per_second else 0)
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(
+                message=types.SimpleNamespace(content=text), finish_reason="stop"
+            )])
+        return self._stream(text)
+
+    async def _stream(self, text: str):
+        chunk_size = 24
+        delay = chunk_size / self.providers.llm_chars_per_second if self.providers.llm_chars_per_second else 0
+        for start in range(0, len(text), chunk_size):
+            await asyncio.sleep(delay)
+            yield _chunk(text[start:start + chunk_size])
+        yield _chunk(None, "stop")
+
+    def _completion(self, prompt: str, rng: random.Random, json_mode: bool = False) -> str:
+        p = self.providers
+        company = _company(prompt)
+
+        # Give as many queries as the prompt asks for, like a compliant model
+        requested = re.search(r"exactly (\d+) search queries", prompt)
+        count = int(requested.group(1)) if requested else p.queries_per_analyst
+
+        industry = re.search(r"company in the (.+?) industry", prompt)
+
+        def queries(market: bool = False) -> List[str]:
+            # Industry queries are partly about the market rather than the company, as a real model's are
+            return [f"{industry.group(1) if market and industry and i % 2 else company} "
+                    f"{' '.join(rng.sample(_WORDS, 3))} {rng.randrange(2000, 2030)}"
+                    for i in range(count)]
+
+        if json_mode:
+            # Fill in the keys of the example object the prompt asks for
+            match = re.search(r"(\{[^{}]*\})\s*$", prompt)
+            keys = json.loads(match.group(1)) if match else {"result": None}
+            return json.dumps({key: queries(key == "industry") for key in keys})
+        if "search queries" in prompt.lower():
+            return "\n".join(queries("industry analysis" in prompt))
+        return _report(company, p.report_chars, rng)
+
+
+class FakeOpenAIClient:
+    """Stands in for openai.AsyncOpenAI; only chat completions are implemented."""
+
+    def __init__(self, providers: FakeProviders):
+        self.chat = types.SimpleNamespace(completions=_FakeCompletions(providers))
+
+
+class FakeGeminiModel:
+    """Stands in for google.generativeai.GenerativeModel."""
+
+    def __init__(self, providers: FakeProviders, model_name: str):
+        self.providers = providers
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        p = self.providers
+        endpoint = f"gemini.{self.model_name}"
+        p.chars_sent[endpoint] += len(prompt)
+        rng = await p.respond(endpoint, prompt, p.llm_latency)
+        text = _briefing(p.briefing_chars, rng)
+        await asyncio.sleep(len(text) / p.llm_chars_per_second if p.llm_chars_per_second else 0)
+        p.chars_returned[endpoint] += len(text)
+        return types.SimpleNamespace(text=text)
+
+
+def _company(prompt: str) -> str:
+    match = re.search(r"(?:researching|about|on) ([A-Z][\w&.\- ]{0,40}?)(?:[,.]| a | on |\n)", prompt)
+    return match.group(1).strip() if match else "The company"
+
+
+def _briefing(length: int, rng: random.Random) -> str:
+    lines = []
+    size = 0
+    while size < length:
+        heading = f"### {' '.join(rng.sample(_WORDS, 2)).title()}"
+        bullets = [f"* {_filler(rng.randrange(80, 200), rng).capitalize()}." for _ in range(rng.randrange(3, 7))]
+        lines += [heading, *bullets, ""]
+        size += len(heading) + sum(len(b) for b in bullets)
+    return "\n".join(lines)
+
+
+def _report(company: str, length: int, rng: random.Random) -> str:
+    sections = ["Company Overview", "Industry Overview", "Financial Overview", "News"]
+    per_section = max(1, length // len(sections))
+    parts = [f"# {company} Research Report", ""]
+    for section in sections:
+        parts += [f"## {section}", "", _briefing(per_section, rng)]
+    return "\n".join(parts)
@@ -0,0 +1,141 @@
+"""Hedged requests for idempotent provider calls.
+
+A job waits on its slowest search or extract, so a rare slow response sets the
+job's latency. When hedging is enabled, a call that has not answered by the
+endpoint's recent latency percentile (p90 by default) gets a duplicate request.
+The first successful response wins and the other is cancelled.
+
+Hedges are capped by a budget: every call earns HEDGE_BUDGET of a hedge, so with
+the default of 0.1 at most about one call in ten is duplicated.
+
+Configuration:
+    HEDGE_REQUESTS      enable hedging (default false)
+    HEDGE_PERCENTILE    latency percentile that triggers a hedge (default 90)
+    HEDGE_BUDGET        hedges allowed per call (default 0.1)
+    HEDGE_MIN_SAMPLES   calls observed before hedging starts (default 20)
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .metrics import PROVIDER_HEDGES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGING_ENABLED = os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 90))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", 0.1))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+
+# Recent latencies kept per endpoint, and the most hedges that can be saved up
+LATENCY_WINDOW = 500
+MAX_HEDGE_CREDIT = 10.0
+
+
+class Hedger:
+    """Tracks one endpoint's latency and issues hedges past its percentile, within budget."""
+
+    def __init__(self, key: str, percentile: float = HEDGE_PERCENTILE, budget: float = HEDGE_BUDGET,
+                 min_samples: int = HEDGE_MIN_SAMPLES):
+        self.key = key
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.credit = 0.0
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency after which to hedge, or None until enough calls have been seen."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    async def run(self, call: Callable[[], Awaitable[T]],
+                  before_hedge: Optional[Callable[[], Awaitable[Any]]] = None) -> T:
+        """Run a call, hedging it if it is slower than the endpoint's percentile latency.
+
+        Args:
+            call: Zero-argument function returning a fresh awaitable per request
+            before_hedge: Awaited before the duplicate is sent, e.g. to acquire a rate limit
+        """
+        self.calls += 1
+        self.credit = min(MAX_HEDGE_CREDIT, self.credit + self.budget)
+
+        async def timed() -> T:
+            start = time.monotonic()
+            result = await call()
+            self.record(time.monotonic() - start)
+            return result
+
+        async def hedge() -> T:
+            if before_hedge:
+                await before_hedge()
+            return await timed()
+
+        primary = asyncio.ensure_future(timed())
+        secondary = None
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or self.credit < 1:
+                return await primary
+
+            self.credit -= 1
+            self.hedged += 1
+            PROVIDER_HEDGES.inc(provider=self.key, outcome="issued")
+            secondary = asyncio.ensure_future(hedge())
+            pending = {primary, secondary}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.hedges_won += 1
+                            PROVIDER_HEDGES.inc(provider=self.key, outcome="won")
+                        return task.result()
+            # Both requests failed; surface the original error
+            return primary.result()
+        finally:
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedges_won": self.hedges_won,
+            "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+        }
+
+
+_hedgers: Dict[str, Hedger] = {}
+
+
+def get_hedger(key: str) -> Hedger:
+    if key not in _hedgers:
+        _hedgers[key] = Hedger(key)
+    return _hedgers[key]
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """Hedge counts and current hedge delay per endpoint."""
+    return {key: hedger.stats() for key, hedger in sorted(_hedgers.items())}
@@ -0,0 +1,130 @@
+"""Industry research shared by companies in the same industry.
+
+Companies in one industry are researched against much the same market: size,
+growth, trends and challenges. The industry analyst runs its market-level
+queries once per industry, and the documents they found (with their content, cut
+to the length a briefing reads) are kept together with the market sections of
+the industry briefing written from them. Later companies in the same industry
+reuse both, and search only the queries about the company itself.
+
+Entries are keyed by the normalized industry, the region of the HQ location (its
+last comma-separated part, e.g. "USA" in "Austin, TX, USA") and the research
+profile, which sets how many results a search returns and how much of a
+document a briefing reads.
+
+Configuration:
+    INDUSTRY_CACHE_TTL         seconds industry research is reused; 0 disables the cache (default 86400)
+    INDUSTRY_CACHE_SIZE        most industries kept (default 128)
+    INDUSTRY_CACHE_BY_REGION   key entries by HQ region as well as industry (default true)
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .metrics import INDUSTRY_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+INDUSTRY_CACHE_TTL = float(os.getenv("INDUSTRY_CACHE_TTL", 86400))
+INDUSTRY_CACHE_SIZE = int(os.getenv("INDUSTRY_CACHE_SIZE", 128))
+INDUSTRY_CACHE_BY_REGION = os.getenv("INDUSTRY_CACHE_BY_REGION", "true").lower() in ("1", "true", "yes")
+
+# Sections of the industry briefing that describe the market rather than the company
+MARKET_SECTIONS = ("Market Overview", "Market Challenges")
+
+
+def industry_key(industry: Optional[str], hq_location: Optional[str] = None, profile: Optional[str] = None,
+                 by_region: bool = INDUSTRY_CACHE_BY_REGION) -> Optional[str]:
+    """Key for an industry's shared research, or None when the industry is not known."""
+    def clean(value: Optional[str]) -> str:
+        return " ".join((value or "").lower().split())
+
+    industry = clean(industry)
+    if not industry or industry in ("unknown", "unknown industry"):
+        return None
+    region = clean(hq_location.split(",")[-1]) if by_region and hq_location else ""
+    payload = json.dumps([industry, region, profile or ""])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def market_sections(briefing: str) -> str:
+    """The market-level sections of an industry briefing, or all of it if it has none."""
+    sections = re.split(r"(?m)^(?=### )", briefing)
+    market = [section.strip() for section in sections
+              if section.startswith("### ") and section[4:].strip().startswith(MARKET_SECTIONS)]
+    return "\n\n".join(market) or briefing.strip()
+
+
+class IndustryCache:
+    """Shared market documents and briefing per industry, in an LRU with a TTL."""
+
+    def __init__(self, ttl: float = INDUSTRY_CACHE_TTL, max_entries: int = INDUSTRY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> {"industry", "documents": {url: doc}, "briefing", "expires_at"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Optional[str], count: bool = True) -> Optional[Dict[str, Any]]:
+        """The entry for a key, if fresh. Lookups that only peek at the entry pass count=False."""
+        if not self.enabled or not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+            if count:
+                if entry:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                INDUSTRY_CACHE_REQUESTS.inc(result="hit" if entry else "miss")
+            return entry
+
+    def set(self, key: Optional[str], industry: str, documents: Dict[str, Dict[str, Any]], briefing: str) -> None:
+        if not self.enabled or not key or not documents or not briefing:
+            return
+        with self._lock:
+            self._entries[key] = {
+                "industry": industry,
+                "documents": documents,
+                "briefing": briefing,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"Cached {len(documents)} market documents for the {industry} industry")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_industry_cache: Optional[IndustryCache] = None
+
+
+def get_industry_cache() -> IndustryCache:
+    """Return the process-wide industry cache, shared by every job."""
+    global _industry_cache
+    if _industry_cache is None:
+        _industry_cache = IndustryCache()
+    return _industry_cache
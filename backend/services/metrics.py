@@ -0,0 +1,236 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are registered on a module-level registry and
+served by the API's /metrics endpoint, without a client library dependency.
+Gauges that mirror existing state (active jobs, open WebSockets, queue depth)
+are computed by callbacks when the endpoint is scraped.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds, from a fast search up to a slow editor pass
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    """Monotonically increasing count, e.g. of requests or errors."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """Value that goes up and down, set directly or read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], object]] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], object]) -> None:
+        """Compute the gauge when scraped. The callback returns a number, or
+        {label value tuple: number} for labelled gauges."""
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        if self.callback is not None:
+            value = self.callback()
+            items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        for key, value in items:
+            key = key if isinstance(key, tuple) else (key,)
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Distribution of observations, e.g. durations, in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {count}"
+
+
+class Registry:
+    """Named collection of metrics; registering a name twice returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (),
+              callback: Optional[Callable[[], object]] = None) -> Gauge:
+        return self._register(Gauge, name, help, labels, callback)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Research pipeline
+NODE_DURATION = REGISTRY.histogram(
+    "research_node_duration_seconds", "Time spent in each LangGraph node.", ["node"]
+)
+NODE_ERRORS = REGISTRY.counter(
+    "research_node_errors_total", "LangGraph node runs that raised.", ["node"]
+)
+JOBS = REGISTRY.counter(
+    "research_jobs_total", "Research jobs by final status.", ["status"]
+)
+RESEARCH_REQUESTS = REGISTRY.counter(
+    "research_requests_total", "Research requests by whether they started a job or joined one.", ["outcome"]
+)
+
+# Provider calls, one sample per attempt
+PROVIDER_DURATION = REGISTRY.histogram(
+    "provider_request_duration_seconds", "Latency of provider calls.", ["provider"]
+)
+PROVIDER_REQUESTS = REGISTRY.counter(
+    "provider_requests_total", "Provider call attempts by outcome.", ["provider", "outcome"]
+)
+PROVIDER_RETRIES = REGISTRY.counter(
+    "provider_retries_total", "Provider call attempts that were retried.", ["provider"]
+)
+PROVIDER_HEDGES = REGISTRY.counter(
+    "provider_hedges_total", "Hedged duplicate requests issued, and those that won.", ["provider", "outcome"]
+)
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "rate_limiter_wait_seconds", "Time calls waited for the shared rate limiter.", ["provider"]
+)
+COMPLETION_CACHE_REQUESTS = REGISTRY.counter(
+    "completion_cache_requests_total", "LLM completion cache lookups by result.", ["result"]
+)
+INDUSTRY_CACHE_REQUESTS = REGISTRY.counter(
+    "industry_cache_requests_total", "Shared industry research lookups by result.", ["result"]
+)
+SPECULATIVE_EXTRACTS = REGISTRY.counter(
+    "speculative_extracts_total",
+    "Extractions started before curation, by whether they were started, used by the enricher or discarded.",
+    ["outcome"]
+)
+
+# WebSocket traffic; use rate() for messages per second
+WEBSOCKET_MESSAGES = REGISTRY.counter(
+    "websocket_messages_total", "Messages sent to WebSocket clients.", ["type"]
+)
+
+
+def render() -> str:
+    return REGISTRY.render()
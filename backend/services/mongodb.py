@@ -58,9 +58,38 @@ class MongoDBService:
             "references": report_data.get("references", []),
             "sections": report_data.get("sections_completed", []),
             "analyst_queries": report_data.get("analyst_queries", {}),
+            "company": report_data.get("company"),
+            "cache_key": report_data.get("cache_key"),
             "created_at": datetime.utcnow()
         })
 
+    def update_report(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """Attach additional fields, such as a pre-rendered PDF, to a stored report."""
+        self.reports.update_one(
+            {"job_id": job_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
+
     def get_report(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a report by job ID."""
-        return self.reports.find_one({"job_id": job_id}) 
\ No newline at end of file
+        return self.reports.find_one({"job_id": job_id})
+
+    def find_cached_report(self, cache_key: str, since: datetime) -> Optional[Dict[str, Any]]:
+        """Retrieve the newest report stored under a report cache key since a time."""
+        return self.reports.find_one(
+            {"cache_key": cache_key, "created_at": {"$gte": since}},
+            sort=[("created_at", -1)]
+        )
+
+    def store_snapshot(self, cache_key: str, snapshot: Dict[str, Any]) -> None:
+        """Store the research snapshot behind a company's latest report, replacing the previous one."""
+        self.db.snapshots.replace_one(
+            {"cache_key": cache_key},
+            {"cache_key": cache_key, "snapshot": snapshot, "updated_at": datetime.utcnow()},
+            upsert=True
+        )
+
+    def get_snapshot(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve the research snapshot stored under a report cache key."""
+        doc = self.db.snapshots.find_one({"cache_key": cache_key})
+        return doc["snapshot"] if doc else None 
\ No newline at end of file
@@ -1,65 +1,194 @@
+import hashlib
 import io
 import logging
 import os
 import re
-
-from backend.utils.utils import generate_pdf_from_md
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
 class PDFService:
     def __init__(self, config):
         self.output_dir = config.get("pdf_output_dir", "pdfs")
+        self.cache_max_bytes = config.get("pdf_cache_max_bytes", 200 * 1024 * 1024)
+        self.cache_max_entries = config.get("pdf_cache_max_entries", 500)
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
-        
+
+        # LRU index of cached PDFs: cache key -> file size in bytes
+        self._cache_index: OrderedDict[str, int] = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        self._load_cache_index()
+
     def _sanitize_company_name(self, company_name):
         """Sanitize company name for use in filenames."""
         # Replace spaces with underscores and remove special characters
         sanitized = re.sub(r'[^\w\s-]', '', company_name).strip().replace(' ', '_')
         return sanitized.lower()
-    
+
     def _generate_pdf_filename(self, company_name):
         """Generate a PDF filename based on the company name."""
         sanitized_name = self._sanitize_company_name(company_name)
         return f"{sanitized_name}_report.pdf"
-    
+
+    def _company_name_from_markdown(self, markdown_content):
+        """Extract the company name from the report title line."""
+        first_line = markdown_content.split('\n')[0].strip()
+        if first_line.startswith('# '):
+            return first_line[2:].strip()
+        return "Company Research"
+
+    def cache_key(self, markdown_content):
+        """Content hash of the markdown and the PDF style version."""
+        # ReportLab is imported with the PDF helpers, so defer it to the first PDF request
+        from backend.utils.utils import PDF_STYLE_VERSION
+
+        digest = hashlib.sha256()
+        digest.update(PDF_STYLE_VERSION.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(markdown_content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def cache_path(self, key):
+        """Location of the cached PDF for a cache key."""
+        return os.path.join(self.output_dir, f"{key}.pdf")
+
+    def _load_cache_index(self):
+        """Rebuild the LRU index from PDFs already on disk, oldest access first."""
+        entries = []
+        for name in os.listdir(self.output_dir):
+            key, ext = os.path.splitext(name)
+            if ext != '.pdf' or not re.fullmatch(r'[0-9a-f]{64}', key):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.output_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, key, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._cache_index[key] = size
+            self._cache_bytes += size
+        self._evict()
+
+        if self._cache_index:
+            logger.info(f"Loaded {len(self._cache_index)} cached PDFs ({self._cache_bytes} bytes)")
+
+    def _evict(self, keep=None):
+        """Drop least recently used PDFs until the cache is within its bounds.
+
+        `keep` is never dropped, so a PDF just rendered for a request is still there to
+        serve even if it alone exceeds the bounds; it goes on a later eviction.
+        """
+        while (
+            self._cache_bytes > self.cache_max_bytes
+            or len(self._cache_index) > self.cache_max_entries
+        ):
+            key = next((k for k in self._cache_index if k != keep), None)
+            if key is None:
+                break
+            size = self._cache_index.pop(key)
+            self._cache_bytes -= size
+            try:
+                os.remove(self.cache_path(key))
+            except OSError as e:
+                logger.warning(f"Failed to evict cached PDF {key}: {e}")
+
+    def _touch(self, key):
+        """Mark a cached PDF as recently used. Returns False if it is gone."""
+        path = self.cache_path(key)
+        if key not in self._cache_index:
+            return False
+        try:
+            os.utime(path)
+        except OSError:
+            self._cache_bytes -= self._cache_index.pop(key)
+            return False
+        self._cache_index.move_to_end(key)
+        return True
+
+    def get_cached_pdf(self, key):
+        """Return the path of a cached PDF, or None if it is not cached."""
+        with self._cache_lock:
+            if self._touch(key):
+                return self.cache_path(key)
+        return None
+
+    def render_to_cache(self, markdown_content):
+        """
+        Render markdown to PDF once and keep it in the content-addressed cache.
+
+        Args:
+            markdown_content (str): The markdown content to convert to PDF
+
+        Returns:
+            tuple: (cache key, path of the cached PDF)
+        """
+        key = self.cache_key(markdown_content)
+        if path := self.get_cached_pdf(key):
+            logger.info(f"PDF cache hit for {key}")
+            return key, path
+
+        logger.info(f"PDF cache miss for {key}, rendering")
+        from backend.utils.utils import generate_pdf_from_md
+
+        path = self.cache_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        generate_pdf_from_md(markdown_content, tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._cache_lock:
+            if key not in self._cache_index:
+                size = os.path.getsize(path)
+                self._cache_index[key] = size
+                self._cache_bytes += size
+            self._cache_index.move_to_end(key)
+            self._evict(keep=key)
+        return key, path
+
+    def generate_pdf_file(self, markdown_content, company_name=None):
+        """
+        Generate a PDF from markdown content, reusing a cached render when possible.
+
+        Args:
+            markdown_content (str): The markdown content to convert to PDF
+            company_name (str, optional): The company name to use in the filename
+
+        Returns:
+            tuple: (success status, (PDF path, download filename, ETag) or error message)
+        """
+        try:
+            company_name = company_name or self._company_name_from_markdown(markdown_content)
+            key, path = self.render_to_cache(markdown_content)
+            return True, (path, self._generate_pdf_filename(company_name), f'"{key}"')
+        except Exception as e:
+            error_msg = f"Error generating PDF: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg
+
     def generate_pdf_stream(self, markdown_content, company_name=None):
         """
         Generate a PDF from markdown content and return it as a stream.
-        
+
         Args:
             markdown_content (str): The markdown content to convert to PDF
             company_name (str, optional): The company name to use in the filename
-            
+
         Returns:
             tuple: (success status, PDF stream or error message)
         """
+        success, result = self.generate_pdf_file(markdown_content, company_name)
+        if not success:
+            return False, result
+
+        pdf_path, pdf_filename, _ = result
         try:
-            # Extract company name from the first line if not provided
-            if not company_name:
-                first_line = markdown_content.split('\n')[0].strip()
-                if first_line.startswith('# '):
-                    company_name = first_line[2:].strip()
-                else:
-                    company_name = "Company Research"
-            
-            # Generate the output filename
-            pdf_filename = self._generate_pdf_filename(company_name)
-            
-            # Create a BytesIO object to store the PDF
-            pdf_buffer = io.BytesIO()
-            
-            # Generate the PDF directly to the buffer
-            generate_pdf_from_md(markdown_content, pdf_buffer)
-            
-            # Reset buffer position to start
-            pdf_buffer.seek(0)
-            
-            # Return success and the buffer
+            with open(pdf_path, 'rb') as f:
+                pdf_buffer = io.BytesIO(f.read())
             return True, (pdf_buffer, pdf_filename)
-            
         except Exception as e:
             error_msg = f"Error generating PDF: {str(e)}"
             logger.error(error_msg)
-            return False, error_msg
\ No newline at end of file
+            return False, error_msg
@@ -0,0 +1,98 @@
+"""Speculative extraction of search results the curator is likely to keep.
+
+The curator keeps a search result when its Tavily score reaches its relevance
+threshold, which is known as soon as the search returns. Rather than wait for
+all four analysts and the curator before extracting anything, a job's
+ExtractPrefetcher starts extracting each result at or above the threshold as its
+search returns, so extraction overlaps the remaining searches. The enricher then
+awaits the extraction already under way instead of starting its own. Once the
+curator has chosen, extractions of documents it dropped are cancelled.
+
+Configuration:
+    SPECULATIVE_EXTRACTS   most URLs a job extracts speculatively; 0 disables it (default 60)
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from .metrics import SPECULATIVE_EXTRACTS
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_EXTRACTS_LIMIT = int(os.getenv("SPECULATIVE_EXTRACTS", 60))
+
+
+def document_url(url: str) -> str:
+    """The URL a curated document is filed under, without its query string or fragment."""
+    return urlparse(url)._replace(query='', fragment='').geturl()
+
+
+class ExtractPrefetcher:
+    """A job's speculative extractions by document URL."""
+
+    def __init__(self, fetch: Callable[[str, str, str], Awaitable[Dict[str, Any]]], threshold: float,
+                 max_urls: int = SPECULATIVE_EXTRACTS_LIMIT):
+        """
+        Args:
+            fetch: Extracts a URL, given the URL, its category and the extract depth, and
+                returns the Tavily extract response
+            threshold: The curator's relevance threshold
+            max_urls: Most URLs extracted speculatively
+        """
+        self.fetch = fetch
+        self.threshold = threshold
+        self.max_urls = max_urls
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+
+    def consider(self, docs: Dict[str, Dict[str, Any]], category: str, extract_depth: str,
+                 exclude: Collection[str] = ()) -> None:
+        """Start extracting the search results the curator will likely keep, other than
+        those in `exclude`, which the analyst drops itself."""
+        for url, doc in docs.items():
+            if self.started >= self.max_urls:
+                return
+            if url in exclude or document_url(url) in exclude:
+                continue
+            try:
+                score = float(doc.get('score', 0))
+            except (TypeError, ValueError):
+                continue
+            url = document_url(url)
+            if score >= self.threshold and url not in self._tasks:
+                task = self._tasks[url] = asyncio.create_task(self.fetch(url, category, extract_depth))
+                # A discarded extraction's failure is never awaited; retrieve it so it is not logged
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self.started += 1
+                SPECULATIVE_EXTRACTS.inc(outcome="started")
+
+    def get(self, url: str) -> Optional[asyncio.Task]:
+        """The extraction started for a URL, if any."""
+        task = self._tasks.get(url)
+        if task is not None:
+            self.used += 1
+            SPECULATIVE_EXTRACTS.inc(outcome="used")
+        return task
+
+    def retain(self, urls: Iterable[str]) -> None:
+        """Keep the extractions of the documents the curator kept, and cancel the rest."""
+        keep = set(urls)
+        dropped = [url for url in self._tasks if url not in keep]
+        for url in dropped:
+            # Cancelling a finished extraction does nothing; it was already paid for
+            self._tasks.pop(url).cancel()
+        self.discarded += len(dropped)
+        SPECULATIVE_EXTRACTS.inc(len(dropped), outcome="discarded")
+        logger.info(f"Kept {len(self._tasks)} speculative extractions and discarded {len(dropped)}")
+
+    def cancel_all(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"started": self.started, "used": self.used, "discarded": self.discarded}
@@ -0,0 +1,231 @@
+"""Process-wide rate limiting for provider calls, shared by every research job.
+
+Each provider endpoint or model has a token bucket for requests per minute and,
+for LLMs, one for tokens per minute. Callers wait in per-job queues that are
+served round-robin, so one large job cannot starve the others.
+
+Limits default to the values in DEFAULT_LIMITS and can be overridden with the
+RATE_LIMITS environment variable, e.g.
+
+    RATE_LIMITS="openai.gpt-4.1=rpm:500,tpm:30000;tavily.search=rpm:600"
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+from .metrics import RATE_LIMIT_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Conservative defaults (lowest paid tiers); unknown keys are not limited
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "tavily.search": {"rpm": 1000},
+    "tavily.extract": {"rpm": 1000},
+    "openai.gpt-4.1": {"rpm": 500, "tpm": 30000},
+    "openai.gpt-4.1-mini": {"rpm": 500, "tpm": 200000},
+    "gemini.gemini-2.0-flash": {"rpm": 2000, "tpm": 4000000},
+}
+
+# Waits longer than this are logged
+SLOW_WAIT_SECONDS = 1.0
+
+
+def estimate_tokens(messages: Iterable[Any] = (), max_tokens: int = 0) -> int:
+    """Rough token cost of an LLM call: about four characters per prompt token,
+    plus the completion budget, which OpenAI also counts against the TPM limit."""
+    chars = 0
+    for message in messages:
+        content = message.get("content", "") if isinstance(message, dict) else message
+        chars += len(content or "")
+    return chars // 4 + max_tokens
+
+
+def parse_limits(spec: str) -> Dict[str, Dict[str, int]]:
+    """Parse a RATE_LIMITS string into {key: {"rpm": n, "tpm": n}}."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        key, _, values = entry.partition("=")
+        limit = {}
+        for value in filter(None, (v.strip() for v in values.split(","))):
+            name, _, amount = value.partition(":")
+            if name.strip() in ("rpm", "tpm"):
+                limit[name.strip()] = int(amount)
+        limits[key.strip()] = limit
+    return limits
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate, holding one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """Rate limit for one provider key, granting waiters fairly across jobs."""
+
+    def __init__(self, key: str, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.key = key
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        # job ID -> FIFO of (future, token cost, enqueue time); served round-robin
+        self._queues: OrderedDict[str, Deque] = OrderedDict()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop = None
+
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _delay(self, cost: int) -> float:
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.delay(1))
+        if self.tokens and cost:
+            delay = max(delay, self.tokens.delay(cost))
+        return delay
+
+    def _consume(self, cost: int) -> None:
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens and cost:
+            self.tokens.consume(cost)
+
+    def _record(self, waited: float) -> None:
+        RATE_LIMIT_WAIT.observe(waited, provider=self.key)
+        self.acquired += 1
+        if waited > 0.001:
+            self.waited += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        if waited >= SLOW_WAIT_SECONDS:
+            logger.info(f"Rate limiter {self.key}: waited {waited:.1f}s ({self.queued} still queued)")
+
+    async def acquire(self, job_id: Optional[str] = None, tokens: int = 0) -> None:
+        """Wait until this job may make one call costing `tokens` tokens."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Waiters and the dispatcher belong to the loop that created them
+            self._loop, self._queues, self._dispatcher = loop, OrderedDict(), None
+            self._wakeup = asyncio.Event()
+
+        # Nobody waiting and capacity available: no need to queue
+        if not self._queues and self._delay(tokens) == 0:
+            self._consume(tokens)
+            self._record(0.0)
+            return
+
+        future = loop.create_future()
+        self._queues.setdefault(job_id or "", deque()).append((future, tokens, time.monotonic()))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._wakeup.set()
+            raise
+
+    async def _dispatch(self) -> None:
+        """Grant queued waiters one at a time, rotating between jobs."""
+        while self._queues:
+            job_id, queue = next(iter(self._queues.items()))
+            future, cost, enqueued = queue[0]
+            if future.done():  # cancelled while waiting
+                queue.popleft()
+                if not queue:
+                    del self._queues[job_id]
+                continue
+
+            delay = self._delay(cost)
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    # Wake early if a waiter is cancelled
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            queue.popleft()
+            self._consume(cost)
+            self._record(time.monotonic() - enqueued)
+            future.set_result(None)
+
+            # Next grant goes to the next job in line
+            if queue:
+                self._queues.move_to_end(job_id)
+            else:
+                del self._queues[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rpm": int(self.requests.capacity) if self.requests else None,
+            "tpm": int(self.tokens.capacity) if self.tokens else None,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "wait_seconds_total": round(self.wait_seconds, 3),
+            "wait_seconds_max": round(self.max_wait_seconds, 3),
+            "queued": self.queued,
+        }
+
+
+class RateLimiter:
+    """Registry of per-provider limiters."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._limiters: Dict[str, ProviderLimiter] = {}
+
+    def get(self, key: str) -> ProviderLimiter:
+        if key not in self._limiters:
+            limit = self.limits.get(key, {})
+            self._limiters[key] = ProviderLimiter(key, rpm=limit.get("rpm"), tpm=limit.get("tpm"))
+        return self._limiters[key]
+
+    async def acquire(self, key: str, job_id: Optional[str] = None, tokens: int = 0) -> None:
+        """Wait for capacity on a provider key, e.g. "tavily.search" or "openai.gpt-4.1"."""
+        limiter = self.get(key)
+        if limiter.requests or limiter.tokens:
+            await limiter.acquire(job_id, tokens)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Wait-time statistics per provider key."""
+        return {key: limiter.stats() for key, limiter in sorted(self._limiters.items())}
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, configured from RATE_LIMITS on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(parse_limits(os.getenv("RATE_LIMITS", "")))
+    return _rate_limiter
@@ -0,0 +1,105 @@
+"""Cache of finished research reports, keyed by the normalized company and profile.
+
+Research on a company that was reported on recently is answered from the last
+report instead of running the graph again. Reports are kept in memory and, when
+MongoDB is configured, found again through the reports collection, where each
+stored report carries its cache key. A report older than REPORT_CACHE_REFRESH_AFTER
+is still served, but the caller should start a refresh in the background
+(stale-while-revalidate).
+
+Configuration:
+    REPORT_CACHE_TTL             seconds a report can be served; 0 disables the cache (default 86400)
+    REPORT_CACHE_REFRESH_AFTER   seconds after which a served report is refreshed (default 21600)
+    REPORT_CACHE_SIZE            most reports kept in memory (default 256)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", 86400))
+REPORT_CACHE_REFRESH_AFTER = float(os.getenv("REPORT_CACHE_REFRESH_AFTER", 21600))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 256))
+
+
+def report_key(company: str, url: Optional[str] = None, industry: Optional[str] = None,
+               hq_location: Optional[str] = None, profile: Optional[str] = None) -> str:
+    """Key for a research request, ignoring case, extra whitespace, the URL scheme and www."""
+    def clean(value: Optional[str]) -> str:
+        return " ".join((value or "").lower().split())
+
+    url = clean(url).removeprefix("https://").removeprefix("http://").removeprefix("www.").rstrip("/")
+    payload = json.dumps([clean(company), url, clean(industry), clean(hq_location), profile or ""])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ReportCache:
+    """Recent reports by key, in an in-memory LRU backed by MongoDB when available."""
+
+    def __init__(self, mongodb=None, ttl: float = REPORT_CACHE_TTL,
+                 refresh_after: float = REPORT_CACHE_REFRESH_AFTER, max_entries: int = REPORT_CACHE_SIZE):
+        self.mongodb = mongodb
+        self.ttl = ttl
+        self.refresh_after = refresh_after
+        self.max_entries = max_entries
+        # key -> {"job_id", "company", "report", "created_at"}, created_at in epoch seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The newest report for a key that is younger than the TTL, with its age in seconds."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+        if not entry and self.mongodb:
+            entry = self._load(key)
+        if not entry:
+            return None
+        age = time.time() - entry["created_at"]
+        if age > self.ttl:
+            return None
+        return {**entry, "age_seconds": age, "stale": age > self.refresh_after}
+
+    def set(self, key: str, job_id: str, company: str, report: str) -> None:
+        if self.enabled and report:
+            self._remember(key, {"job_id": job_id, "company": company, "report": report, "created_at": time.time()})
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            since = datetime.utcnow() - timedelta(seconds=self.ttl)
+            stored = self.mongodb.find_cached_report(key, since)
+        except Exception as e:
+            logger.warning(f"Failed to look up cached report: {e}")
+            return None
+        if not stored or not stored.get("report_content"):
+            return None
+        entry = {
+            "job_id": stored["job_id"],
+            "company": stored.get("company"),
+            "report": stored["report_content"],
+            # pymongo returns naive UTC datetimes
+            "created_at": stored["created_at"].replace(tzinfo=timezone.utc).timestamp(),
+        }
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
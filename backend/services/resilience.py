@@ -0,0 +1,268 @@
+"""Timeouts, retries and circuit breakers for provider calls.
+
+Every Tavily, OpenAI and Gemini call goes through `call_provider`, which:
+
+- fails fast while the provider key's circuit breaker is open,
+- waits for the shared rate limiter,
+- bounds the call with a per-key timeout,
+- retries timeouts, connection errors, 429s and 5xx responses with jittered
+  exponential backoff.
+
+Timeouts can be overridden per key with PROVIDER_TIMEOUTS, e.g.
+`PROVIDER_TIMEOUTS="tavily.search=10;openai.gpt-4.1=120"`, and the number of
+retries with PROVIDER_MAX_RETRIES.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from . import hedging
+from .metrics import PROVIDER_DURATION, PROVIDER_REQUESTS, PROVIDER_RETRIES
+from .rate_limiter import get_rate_limiter
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds allowed per attempt. For streaming calls this covers the time to the
+# response headers; the SDK read timeout bounds each chunk after that.
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    "tavily.search": 20,
+    "tavily.extract": 30,
+    "openai.gpt-4.1-mini": 60,
+    "openai.gpt-4.1": 180,
+    "gemini.gemini-2.0-flash": 120,
+}
+FALLBACK_TIMEOUT = 60
+
+MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", 3))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+# Consecutive failures that open a breaker, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+# Exception classes (matched by name, so the SDKs need not be imported) that are
+# worth retrying: timeouts, dropped connections and provider-side throttling.
+RETRYABLE_ERRORS = {
+    "TimeoutError",
+    "ConnectionError",
+    "TransportError",            # httpx connection and read errors
+    "APIConnectionError",        # openai, includes APITimeoutError
+    "RateLimitError",            # openai 429
+    "InternalServerError",       # openai and google 500
+    "UsageLimitExceededError",   # tavily 429
+    "ServiceUnavailable",        # google 503
+    "TooManyRequests",           # google 429
+    "ResourceExhausted",         # google quota
+    "DeadlineExceeded",          # google 504
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """Parse a PROVIDER_TIMEOUTS string into {key: seconds}."""
+    timeouts = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        key, _, seconds = entry.partition("=")
+        timeouts[key.strip()] = float(seconds)
+    return timeouts
+
+
+TIMEOUTS = {**DEFAULT_TIMEOUTS, **parse_timeouts(os.getenv("PROVIDER_TIMEOUTS", ""))}
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, whichever SDK raised it."""
+    for code in (
+        getattr(exc, "status_code", None),                            # openai
+        getattr(getattr(exc, "response", None), "status_code", None),  # httpx
+        getattr(exc, "code", None),                                   # google.api_core
+    ):
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failed provider call may succeed if tried again."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__):
+        return True
+    code = status_code(exc)
+    return code is not None and (code in (408, 429) or code >= 500)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for a 1-based retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after a cool-down."""
+
+    def __init__(self, key: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if a call may not go through; return whether it is the trial call."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_in_flight):
+            raise CircuitOpenError(f"{self.key} is unavailable (circuit open after {self.failures} failures)")
+        if state == "half_open":
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Let another call be the trial after the trial call ended without an outcome, e.g. was cancelled."""
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"Circuit breaker for {self.key} closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit breaker for {self.key} opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(key: str) -> CircuitBreaker:
+    if key not in _breakers:
+        _breakers[key] = CircuitBreaker(key)
+    return _breakers[key]
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Current state and failure count of each provider key's breaker."""
+    return {
+        key: {"state": breaker.state, "failures": breaker.failures}
+        for key, breaker in sorted(_breakers.items())
+    }
+
+
+async def call_provider(
+    key: str,
+    call: Callable[[], Awaitable[T]],
+    *,
+    job_id: Optional[str] = None,
+    tokens: int = 0,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    hedge: bool = False,
+    trace_attrs: Optional[Dict[str, Any]] = None,
+) -> T:
+    """Run a provider call with rate limiting, a timeout, retries and a circuit breaker.
+
+    Args:
+        key: Provider key, e.g. "tavily.search" or "openai.gpt-4.1"
+        call: Zero-argument function returning a fresh awaitable for each attempt
+        job_id: Research job making the call, for fair rate limiting
+        tokens: Estimated token cost of the call, for TPM limits
+        timeout: Seconds allowed per attempt, defaults to the key's configured timeout
+        max_retries: Retries after the first attempt, defaults to PROVIDER_MAX_RETRIES
+        hedge: Whether the call is idempotent and may be hedged when HEDGE_REQUESTS is on
+        trace_attrs: Attributes for the call's span in the job trace, e.g. the query
+
+    Returns:
+        The call's result
+    """
+    breaker = get_breaker(key)
+    timeout = timeout or TIMEOUTS.get(key, FALLBACK_TIMEOUT)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    hedger = hedging.get_hedger(key) if hedge and hedging.HEDGING_ENABLED else None
+
+    with span(key, **(trace_attrs or {})) as attrs:
+        attrs["rate_limit_wait_ms"] = 0.0
+
+        async def acquire():
+            start = time.perf_counter()
+            await get_rate_limiter().acquire(key, job_id, tokens)
+            attrs["rate_limit_wait_ms"] += round((time.perf_counter() - start) * 1000, 1)
+
+        attempt = 0
+        while True:
+            attrs["attempts"] = attempt + 1
+            try:
+                is_trial = breaker.before_call()
+            except CircuitOpenError:
+                PROVIDER_REQUESTS.inc(provider=key, outcome="circuit_open")
+                raise
+            try:
+                await acquire()
+            except BaseException:
+                if is_trial:
+                    breaker.release_trial()
+                raise
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    hedger.run(call, before_hedge=acquire) if hedger else call(),
+                    timeout=timeout
+                )
+            except Exception as e:
+                PROVIDER_DURATION.observe(time.perf_counter() - start, provider=key)
+                PROVIDER_REQUESTS.inc(
+                    provider=key, outcome="timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                )
+                retryable = is_retryable(e)
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    # The provider answered; a bad request says nothing about its health
+                    breaker.record_success()
+                if not retryable or attempt >= max_retries or breaker.state == "open":
+                    raise
+                attempt += 1
+                PROVIDER_RETRIES.inc(provider=key)
+                delay = backoff_delay(attempt)
+                logger.warning(
+                    f"{key} call failed ({type(e).__name__}: {e}), retry {attempt}/{max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled, e.g. a hedge loser or a discarded prefetch: the provider's
+                # health is unknown, so neither a success nor a failure
+                if is_trial:
+                    breaker.release_trial()
+                raise
+            else:
+                PROVIDER_DURATION.observe(time.perf_counter() - start, provider=key)
+                PROVIDER_REQUESTS.inc(provider=key, outcome="success")
+                breaker.record_success()
+                return result
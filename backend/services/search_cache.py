@@ -0,0 +1,112 @@
+"""Search and extract results shared by the jobs of a research batch.
+
+Companies researched together often share searches (templated industry queries
+name the industry, not the company) and pages (industry reports, competitors'
+sites). A batch makes one SearchCache current for all of its member jobs, and
+Tavily calls made through `shared_call` are then answered from it: identical
+requests made at the same time wait for a single provider call, and later ones
+reuse its result. Failed calls are not kept.
+
+Outside a batch there is no current cache and calls go to the provider as usual,
+so a standalone job always gets fresh results.
+
+Configuration:
+    SEARCH_CACHE_SIZE   most results a batch keeps (default 2000)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 2000))
+
+T = TypeVar("T")
+
+current_search_cache: ContextVar[Optional["SearchCache"]] = ContextVar("current_search_cache", default=None)
+
+
+def search_cache_key(endpoint: str, *args: Any, **params: Any) -> str:
+    """Key for a provider request, e.g. search_cache_key("tavily.search", query, **search_params)."""
+    payload = json.dumps([endpoint, args, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SearchCache:
+    """LRU of provider results, with in-flight requests shared between callers."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Any]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_call(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    # The caller making the request was cancelled; make it ourselves
+                    continue
+                raise
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await call()
+        except BaseException as e:
+            # Waiters see the same failure; the next caller tries again
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark it retrieved, so an unawaited failure is not logged as never retrieved
+                future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+        future.set_result(result)
+        self._results[key] = result
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._results), "hits": self.hits, "misses": self.misses}
+
+
+@contextmanager
+def use_search_cache(cache: Optional[SearchCache]) -> Iterator[None]:
+    """Share a search cache with every provider call made in the enclosed block."""
+    token = current_search_cache.set(cache)
+    try:
+        yield
+    finally:
+        current_search_cache.reset(token)
+
+
+async def shared_call(key: str, call: Callable[[], Awaitable[T]]) -> T:
+    """Make a provider call through the current search cache, or directly if there is none."""
+    cache = current_search_cache.get()
+    if cache is None:
+        return await call()
+    return await cache.get_or_call(key, call)
@@ -0,0 +1,153 @@
+"""Choosing, cleaning and using the company website pages grounding crawls.
+
+Grounding extracts the company's homepage, then fetches up to the profile's
+`site_pages` more pages of the same site under a time budget. Pages are chosen
+from the links on the homepage, most valuable first: about, team, pricing,
+press and investor pages. When the homepage links to no page of a kind, its
+usual path (e.g. /pricing) is tried. Lines a page shares with pages read before
+it (navigation, footers, cookie banners) are dropped, as are pages with little
+left.
+
+An analyst skips a query that a crawled page already answers, such as a
+leadership query when the team page was fetched. Pages are crawled while the
+analysts search, so only pages that arrive before a query is sent can answer
+it, and the searches a job runs can differ from run to run.
+
+Configuration:
+    SITE_CRAWL_SECONDS   most seconds spent fetching pages after the homepage (default 10)
+"""
+import hashlib
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+SITE_CRAWL_SECONDS = float(os.getenv("SITE_CRAWL_SECONDS", 10))
+
+# Kinds of page worth crawling, most valuable first: the path words that identify
+# one, its usual path, the research categories it serves, and the words of a
+# search query it answers
+PAGE_TYPES: Dict[str, Dict[str, Any]] = {
+    "about": {
+        "paths": ("about", "company", "who-we-are", "our-story", "mission"),
+        "default": "/about",
+        "categories": ("company_data",),
+        "answers": ("overview", "history", "mission", "founded"),
+    },
+    "team": {
+        "paths": ("team", "leadership", "management", "founders", "people"),
+        "default": "/team",
+        "categories": ("company_data",),
+        "answers": ("leadership", "executive", "executives", "founder", "founders", "ceo", "management"),
+    },
+    "pricing": {
+        "paths": ("pricing", "plans", "price"),
+        "default": "/pricing",
+        "categories": ("company_data", "financial_data"),
+        "answers": ("pricing", "price", "plans"),
+    },
+    "press": {
+        "paths": ("press", "newsroom", "news", "media"),
+        "default": "/press",
+        "categories": ("news_data",),
+        "answers": ("press release", "press releases", "announcements"),
+    },
+    "investors": {
+        "paths": ("investors", "investor-relations", "ir"),
+        "default": "/investors",
+        "categories": ("financial_data",),
+        "answers": ("investor relations",),
+    },
+}
+
+# Links to files rather than pages
+SKIPPED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+                      ".zip", ".mp4", ".mp3", ".xml", ".json")
+
+# Pages with less text than this after removing shared lines are not kept
+MIN_PAGE_CHARS = 200
+
+_LINK = re.compile(r"\]\((\S+?)\)|href=[\"']([^\"']+)[\"']|(https?://[^\s)\]\"'<>]+)")
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower().removeprefix("www.")
+
+
+def _normalize(url: str) -> str:
+    parsed = urlparse(url)
+    return parsed._replace(query="", fragment="", path=parsed.path.rstrip("/") or "/").geturl()
+
+
+def page_type(url: str) -> Optional[str]:
+    """The kind of page a URL is, from its path, or None for any other page."""
+    segments = [s for s in urlparse(url).path.lower().split("/") if s]
+    # The last segment is the most specific, e.g. /company/leadership is a team page
+    for segment in reversed(segments):
+        words = {segment, *re.split(r"[-_.]", segment)}
+        for name, kind in PAGE_TYPES.items():
+            if words & set(kind["paths"]):
+                return name
+    return None
+
+
+def discover_links(base_url: str, content: str) -> List[str]:
+    """Same-site page links in a page's content, normalized and without the page itself."""
+    base = _normalize(base_url)
+    host = _host(base_url)
+    links = []
+    for match in _LINK.finditer(content or ""):
+        href = next(group for group in match.groups() if group)
+        url = _normalize(urljoin(base_url, href.strip("<>")))
+        if (url.startswith(("http://", "https://")) and _host(url) == host and url != base
+                and not urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS) and url not in links):
+            links.append(url)
+    return links
+
+
+def choose_pages(base_url: str, links: Iterable[str], limit: int) -> List[Tuple[str, str]]:
+    """Up to `limit` (url, page type) pairs to fetch: one page per kind, most valuable kind first."""
+    by_type: Dict[str, str] = {}
+    for url in links:
+        kind = page_type(url)
+        # The shallowest link of a kind is usually its main page
+        if kind and (kind not in by_type or url.count("/") < by_type[kind].count("/")):
+            by_type[kind] = url
+    root = f"{urlparse(base_url).scheme or 'https'}://{urlparse(base_url).netloc}"
+    chosen = [(by_type.get(kind) or root + PAGE_TYPES[kind]["default"], kind) for kind in PAGE_TYPES]
+    return [(url, kind) for url, kind in chosen if url != _normalize(base_url)][:limit]
+
+
+def is_error_page(content: str) -> bool:
+    """Whether extracted content is a not-found or error page rather than the page asked for."""
+    head = (content or "")[:300].lower()
+    return len(content or "") < MIN_PAGE_CHARS or bool(
+        re.search(r"\b404\b|page not found|access denied", head)
+    )
+
+
+def dedupe_page(content: str, seen: set) -> str:
+    """A page's content without the lines already read on earlier pages, whose hashes are in `seen`.
+
+    The page's own lines are added to `seen`, so pages deduped in turn share nothing.
+    """
+    lines = []
+    for line in content.splitlines():
+        key = hashlib.sha1(" ".join(line.lower().split()).encode()).hexdigest()
+        if line.strip() and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def answering_page(query: str, pages: Dict[str, Dict[str, Any]], data_field: str) -> Optional[str]:
+    """URL of a crawled page that answers a search query for a research category, if any."""
+    words = " ".join(re.findall(r"[a-z]+", query.lower()))
+    for url, page in pages.items():
+        kind = PAGE_TYPES.get(page.get("page_type"), {})
+        if data_field in kind.get("categories", ()) and any(
+            re.search(rf"\b{re.escape(answer)}\b", words) for answer in kind["answers"]
+        ):
+            return url
+    return None
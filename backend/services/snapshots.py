@@ -0,0 +1,118 @@
+"""Snapshots of the research behind a finished report, for delta refreshes.
+
+A snapshot keeps a job's planned queries, curated documents (with their content,
+cut to the length a briefing reads) and briefings. A delta refresh starts from
+the last snapshot for the same company and profile: only news newer than the
+snapshot is searched, only unseen URLs are extracted, and only briefings whose
+documents changed are generated again before the editor runs.
+
+Snapshots are kept in memory and, when MongoDB is configured, in its `snapshots`
+collection, one per report cache key.
+
+Configuration:
+    SNAPSHOT_CACHE_SIZE   most snapshots kept in memory (default 64)
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .document_store import DocumentStore, attach_content, get_content
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SNAPSHOT_CACHE_SIZE", 64))
+
+CURATED_FIELDS = ("financial_data", "news_data", "industry_data", "company_data")
+BRIEFING_CATEGORIES = ("financial", "news", "industry", "company")
+
+
+def build_snapshot(values: Dict[str, Any], doc_store: Optional[DocumentStore], max_doc_length: int) -> Dict[str, Any]:
+    """Snapshot a finished job from its final state values."""
+    curated = {}
+    for field in CURATED_FIELDS:
+        docs = []
+        for url, source in (values.get(f"curated_{field}") or {}).items():
+            doc = {key: value for key, value in source.items() if key not in ("raw_content", "raw_content_id")}
+            doc["url"] = url
+            # Documents without content are extracted again by the refresh
+            if content := get_content(source, doc_store):
+                doc["raw_content"] = content[:max_doc_length]
+            docs.append(doc)
+        # A list rather than a dict by URL, since MongoDB field names cannot be arbitrary URLs
+        curated[field] = docs
+    return {
+        "completed_at": datetime.now(timezone.utc).isoformat(),
+        "analyst_queries": values.get("analyst_queries") or {},
+        "curated": curated,
+        "briefings": {category: values.get(f"{category}_briefing") or "" for category in BRIEFING_CATEGORIES},
+    }
+
+
+def restore_snapshot(snapshot: Dict[str, Any], doc_store: Optional[DocumentStore]) -> Dict[str, Any]:
+    """Turn a snapshot into a job's baseline, with curated documents by URL and their content in the job's store."""
+    curated = {}
+    for field, docs in snapshot.get("curated", {}).items():
+        curated[field] = {}
+        for doc in docs:
+            doc = dict(doc)
+            if content := doc.pop("raw_content", None):
+                attach_content(doc, content, doc_store)
+            curated[field][doc["url"]] = doc
+    return {**snapshot, "curated": curated}
+
+
+def seen_urls(baseline: Dict[str, Any]) -> set:
+    """Every URL the baseline's report was built from, given a restored baseline."""
+    return {url for docs in baseline.get("curated", {}).values() for url in docs}
+
+
+def days_since(baseline: Dict[str, Any]) -> int:
+    """Whole days since the baseline was taken, at least one, for a news search's `days` window."""
+    completed_at = datetime.fromisoformat(baseline["completed_at"])
+    elapsed = datetime.now(timezone.utc) - completed_at
+    return max(1, elapsed.days + (1 if elapsed.seconds or elapsed.microseconds else 0))
+
+
+class SnapshotStore:
+    """The latest snapshot per report cache key, in an in-memory LRU backed by MongoDB when available."""
+
+    def __init__(self, mongodb=None, max_entries: int = SNAPSHOT_CACHE_SIZE):
+        self.mongodb = mongodb
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot:
+                self._entries.move_to_end(key)
+                return snapshot
+        if not self.mongodb:
+            return None
+        try:
+            snapshot = self.mongodb.get_snapshot(key)
+        except Exception as e:
+            logger.warning(f"Failed to load research snapshot: {e}")
+            return None
+        if snapshot:
+            self._remember(key, snapshot)
+        return snapshot
+
+    def set(self, key: str, snapshot: Dict[str, Any]) -> None:
+        self._remember(key, snapshot)
+        if self.mongodb:
+            try:
+                self.mongodb.store_snapshot(key, snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to store research snapshot: {e}")
+
+    def _remember(self, key: str, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = snapshot
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,108 @@
+"""Per-job timing traces.
+
+A Trace is created for each research job and passed to the graph through
+config["configurable"]["trace"]. Each node makes it current for the duration of
+the node, and `span()` records nested timings under it. Spans cover nodes, query
+generation, each search and extract, each briefing and each editor pass, which
+is enough to draw a waterfall of where a slow job spent its time.
+
+Context variables carry the current trace and span, so concurrent tasks started
+inside a span (e.g. parallel searches) are parented correctly.
+"""
+import asyncio
+import functools
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# Spans kept per trace; a runaway job should not grow the trace without bound
+MAX_SPANS = 5000
+
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Timing spans for one research job, relative to when the job started."""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 1)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Record a span around a block; attributes can be added to the yielded dict."""
+        record = {
+            "id": uuid.uuid4().hex[:12],
+            "parent_id": current_span.get(),
+            "name": name,
+            "start_ms": self._elapsed_ms(),
+            "duration_ms": None,
+            "status": "ok",
+            "attrs": attrs,
+        }
+        token = current_span.set(record["id"])
+        try:
+            yield record["attrs"]
+        except BaseException as e:
+            record["status"] = "cancelled" if isinstance(e, (asyncio.CancelledError, GeneratorExit)) else "error"
+            record["attrs"]["error"] = f"{type(e).__name__}: {e}"[:300]
+            raise
+        finally:
+            current_span.reset(token)
+            record["duration_ms"] = round(self._elapsed_ms() - record["start_ms"], 1)
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(record)
+            else:
+                self.dropped += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The trace as a JSON-serialisable waterfall, spans ordered by start time."""
+        return {
+            "job_id": self.job_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self._elapsed_ms(),
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            "dropped_spans": self.dropped,
+        }
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]) -> Iterator[None]:
+    """Make a trace current for the enclosed block."""
+    token = current_trace.set(trace)
+    try:
+        yield
+    finally:
+        current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Record a span on the current trace, or do nothing if there is none."""
+    trace = current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, **attrs) as span_attrs:
+        yield span_attrs
+
+
+def traced(name: str):
+    """Decorate an async function so each call is recorded as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -5,6 +5,8 @@ from typing import Dict, Set
 
 from fastapi import WebSocket
 
+from .metrics import WEBSOCKET_MESSAGES
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ class WebSocketManager:
     def __init__(self):
         # Store active connections for each job
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Job IDs attached to another job's execution, by the executing job's ID
+        self.followers: Dict[str, Set[str]] = {}
         
     async def connect(self, websocket: WebSocket, job_id: str):
         """Connect a new client to a specific job."""
@@ -32,9 +36,27 @@ class WebSocketManager:
             logger.info(f"Remaining connections for job: {len(self.active_connections.get(job_id, set()))}")
             logger.info(f"Remaining active jobs: {list(self.active_connections.keys())}")
                 
+    def attach(self, job_id: str, execution_id: str):
+        """Subscribe a job's clients to the updates of another job that is doing the work."""
+        self.followers.setdefault(execution_id, set()).add(job_id)
+        logger.info(f"Job {job_id} attached to running job {execution_id}")
+
+    def detach(self, execution_id: str) -> Set[str]:
+        """Stop forwarding an execution's updates and return the job IDs that were attached."""
+        return self.followers.pop(execution_id, set())
+
+    def job_ids(self, execution_id: str) -> Set[str]:
+        """The execution's own job ID and those of the jobs attached to it."""
+        return {execution_id, *self.followers.get(execution_id, ())}
+
     async def broadcast_to_job(self, job_id: str, message: dict):
-        """Send a message to all clients connected to a specific job."""
-        if job_id not in self.active_connections:
+        """Send a message to all clients connected to a job or to a job attached to it."""
+        recipients = [
+            (connection, subscribed_id)
+            for subscribed_id in self.job_ids(job_id)
+            for connection in self.active_connections.get(subscribed_id, ())
+        ]
+        if not recipients:
             logger.warning(f"No active connections for job {job_id}")
             return
             
@@ -45,20 +67,22 @@ class WebSocketManager:
         message_str = json.dumps(message)
         logger.info(f"Message content: {message_str}")
         
+        WEBSOCKET_MESSAGES.inc(type=message.get("type", "unknown"))
+
         # Send to all connected clients for this job
         success_count = 0
         disconnected = set()
-        for connection in self.active_connections[job_id]:
+        for connection, subscribed_id in recipients:
             try:
                 await connection.send_text(message_str)
                 success_count += 1
             except Exception as e:
                 logger.error(f"Error sending message to client: {str(e)}", exc_info=True)
-                disconnected.add(connection)
+                disconnected.add((connection, subscribed_id))
         
         # Clean up disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection, job_id)
+        for connection, subscribed_id in disconnected:
+            self.disconnect(connection, subscribed_id)
             
     async def send_status_update(self, job_id: str, status: str, message: str = None, error: str = None, result: dict = None):
         """Helper method to send formatted status updates."""
@@ -1,4 +1,3 @@
-from .utils import generate_pdf_from_md, clean_text
 from .references import (
     extract_domain_name, 
     extract_title_from_url_path, 
@@ -9,4 +8,12 @@ from .references import (
     format_reference_for_markdown,
     extract_link_info,
     format_references_section
-) 
\ No newline at end of file
+)
+
+
+def __getattr__(name):
+    # The PDF helpers pull in ReportLab, so load them on first use
+    if name in ("generate_pdf_from_md", "clean_text"):
+        from . import utils
+        return getattr(utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
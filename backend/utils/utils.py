@@ -1,6 +1,7 @@
 import logging
 import os
 import re
+from functools import lru_cache
 from typing import Dict, List
 
 from reportlab.lib import colors
@@ -29,6 +30,9 @@ def extract_link_info(markdown_link: str) -> tuple[str, str]:
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the PDF layout or styles change so cached renders are invalidated.
+PDF_STYLE_VERSION = "3"
+
 def clean_text(text: str) -> str:
     """Clean up text by replacing escaped quotes and other special characters."""
     text = re.sub(r'",?\s*"pdf_url":.+$', '', text)
@@ -37,44 +41,29 @@ def clean_text(text: str) -> str:
     text = text.replace('<para>', '').replace('</para>', '')
     return text.strip()
 
-def generate_pdf_from_md(markdown_content: str, output_pdf) -> None:
-    """Convert markdown content to PDF using a simplified ReportLab approach.
-    
-    Args:
-        markdown_content (str): The markdown content to convert to PDF
-        output_pdf: Either a file path string or a BytesIO object
-    """
-    try:
-        # If output_pdf is a string (file path), ensure directory exists
-        if isinstance(output_pdf, str):
-            os.makedirs(os.path.dirname(os.path.abspath(output_pdf)), exist_ok=True)
-            
-        markdown_content = markdown_content.replace('\r\n', '\n')  # Normalize Windows line endings
-        markdown_content = markdown_content.replace('\\n', '\n')   # Convert literal \n to newlines
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(
-            output_pdf,
-            pagesize=letter,
-            rightMargin=40,
-            leftMargin=40,
-            topMargin=40,
-            bottomMargin=40
-        )
-        
-        # Setup styles
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
+# Inline markup patterns, compiled once. They are applied in turn, bold, then italic,
+# then links, so markup inside link text and links inside bold text are converted too.
+_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC = re.compile(r'\*(.*?)\*')
+_LINK_MARKUP = re.compile(r'\[(.*?)\]\((.*?)\)')
+_STRICT_BOLD = re.compile(r'(?<!\*)\*\*(.*?)\*\*(?!\*)')
+
+# Token kinds produced by _tokenize_markdown
+_BLANK, _HEADING, _BULLET, _LINK, _PARAGRAPH = range(5)
+
+@lru_cache(maxsize=None)
+def _pdf_styles() -> Dict[str, ParagraphStyle]:
+    """Build the report styles once per process."""
+    styles = getSampleStyleSheet()
+    return {
+        'Heading1': ParagraphStyle(
             'Title',
             parent=styles['Heading1'],
             fontSize=20,
             textColor=colors.black,
             spaceAfter=12
-        )
-        
-        heading2_style = ParagraphStyle(
+        ),
+        'Heading2': ParagraphStyle(
             'Heading2',
             parent=styles['Heading2'],
             fontSize=16,
@@ -82,27 +71,24 @@ def generate_pdf_from_md(markdown_content: str, output_pdf) -> None:
             spaceBefore=12,
             spaceAfter=6,
             fontName='Helvetica-Bold'
-        )
-        
-        heading3_style = ParagraphStyle(
+        ),
+        'Heading3': ParagraphStyle(
             'Heading3',
             parent=styles['Heading3'],
             fontSize=12,
             textColor=colors.black,
             spaceBefore=10,
             spaceAfter=4
-        )
-        
-        normal_style = ParagraphStyle(
+        ),
+        'BodyText': ParagraphStyle(
             'Normal',
             parent=styles['Normal'],
             fontSize=10,
             textColor=colors.black,
             spaceBefore=2,
             spaceAfter=2
-        )
-        
-        list_item_style = ParagraphStyle(
+        ),
+        'ListItem': ParagraphStyle(
             'ListItem',
             parent=styles['Normal'],
             fontSize=10,
@@ -112,117 +98,140 @@ def generate_pdf_from_md(markdown_content: str, output_pdf) -> None:
             leftIndent=10,
             firstLineIndent=0,
             bulletIndent=0
-        )
-        
-        # Create the story (content)
-        story = []
-        
-        # Process markdown content into PDF elements
-        lines = markdown_content.split('\n')
-        i = 0
-        
-        # Track if we're in a list
-        in_list = False
-        list_items = []
-        
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Skip empty lines
-            if not line:
-                if in_list and list_items:
-                    # Flush list if we were building one
-                    story.append(ListFlowable(
-                        [ListItem(Paragraph(item, list_item_style)) for item in list_items],
-                        bulletType='bullet',
-                        leftIndent=10,
-                        bulletFontName='Helvetica',
-                        bulletFontSize=10,
-                        bulletOffsetY=0,
-                        bulletDedent=10,
-                        spaceAfter=0
-                    ))
-                    list_items = []
-                    in_list = False
-                
-                story.append(Spacer(1, 6))
-                i += 1
-                continue
-            
-            # Headings
-            if line.startswith('# '):
-                story.append(Paragraph(line[2:], title_style))
-            elif line.startswith('## '):
-                story.append(Paragraph(line[3:], heading2_style))
-            elif line.startswith('### '):
-                story.append(Paragraph(line[4:], heading3_style))
-            
-            # Bullet points
-            elif line.startswith('* '):
-                bullet_text = line[2:].strip()  # Remove the '* ' but keep any other asterisks
-                
-                # For links in bullet points
-                if bullet_text.startswith('[') and '](' in bullet_text and bullet_text.endswith(')'):
-                    link_text, link_url = extract_link_info(bullet_text)
-                    # Simplified link format to avoid potential formatting issues
-                    bullet_text = f'<link href="{link_url}" color="blue"><u>{link_text or link_url}</u></link>'
-                
-                list_items.append(bullet_text)
-                in_list = True
-            
-            # Regular paragraphs (including links)
+        ),
+    }
+
+_REPORT_LIST_OPTIONS = {
+    'bulletType': 'bullet',
+    'leftIndent': 10,
+    'bulletFontName': 'Helvetica',
+    'bulletFontSize': 10,
+    'bulletOffsetY': 0,
+    'bulletDedent': 10,
+    'spaceAfter': 0
+}
+
+def _link_markup(text: str, url: str) -> str:
+    return f'<link href="{url}" color="blue"><u>{text}</u></link>'
+
+def _whole_line_link(text: str):
+    """(text, url) of a line that is a single markdown link, or None."""
+    if text.startswith('[') and '](' in text and text.endswith(')'):
+        return extract_link_info(text)
+    return None
+
+def format_inline_markdown(text: str) -> str:
+    """Convert bold, italic and link markdown to ReportLab paragraph markup."""
+    if '*' in text:
+        text = _BOLD.sub(r'<b>\1</b>', text)
+        text = _ITALIC.sub(r'<i>\1</i>', text)
+    if '[' in text and '](' in text:
+        text = _LINK_MARKUP.sub(lambda m: _link_markup(m.group(1), m.group(2)), text)
+    return text
+
+def format_bold_markdown(text: str) -> str:
+    """Convert bold markdown only, dropping unmatched bold markers and keeping single asterisks."""
+    return _STRICT_BOLD.sub(r'<b>\1</b>', text).replace('**', '')
+
+def _tokenize_markdown(markdown_content: str):
+    """Split markdown into (kind, level, text) tokens, one per line."""
+    for raw_line in markdown_content.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            yield _BLANK, 0, ''
+        elif line[0] == '#':
+            marks, _, text = line.partition(' ')
+            if text and marks.count('#') == len(marks):
+                yield _HEADING, len(marks), text.strip()
             else:
-                # Handle bold and italic text
-                line = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', line)  # Bold
-                line = re.sub(r'\*(.*?)\*', r'<i>\1</i>', line)      # Italic
-                
-                # Check for links in the text
-                if '[' in line and '](' in line:
-                    try:
-                        # Process links
-                        parts = []
-                        last_idx = 0
-                        for match in re.finditer(r'\[(.*?)\]\((.*?)\)', line):
-                            # Add text before the link
-                            if match.start() > last_idx:
-                                parts.append(line[last_idx:match.start()])
-                            
-                            # Add the link
-                            link_text = match.group(1)
-                            link_url = match.group(2)
-                            parts.append(f'<link href="{link_url}" color="blue"><u>{link_text}</u></link>')
-                            
-                            last_idx = match.end()
-                        
-                        # Add any remaining text
-                        if last_idx < len(line):
-                            parts.append(line[last_idx:])
-                        
-                        line = ''.join(parts)
-                    except Exception as e:
-                        # If link processing fails, use the original line
-                        logger.error(f"Error processing links: {e}")
-                
-                # Add the paragraph
-                story.append(Paragraph(line, normal_style))
-            
-            i += 1
-        
-        # Flush any remaining list
-        if in_list and list_items:
+                yield _PARAGRAPH, 0, line
+        elif line.startswith('* '):
+            yield _BULLET, 0, line[2:].strip()
+        elif _whole_line_link(line):
+            yield _LINK, 0, line
+        else:
+            yield _PARAGRAPH, 0, line
+
+def markdown_to_flowables(markdown_content: str, styles: Dict[str, ParagraphStyle] = None,
+                          list_options: Dict = None, paragraph_format=format_inline_markdown,
+                          bullet_format=None) -> List:
+    """Convert markdown into ReportLab flowables in a single pass.
+
+    Consecutive '* ' bullet lines are batched into one ListFlowable that is closed
+    by the next non-bullet line, so headings never land inside a list. Headings use the
+    'Heading<level>' style, and a heading without one is kept as a paragraph. Bullets use
+    'ListItem', and standalone links 'Link' when present, otherwise they are paragraphs.
+    Paragraph text goes through `paragraph_format`; bullets that are not a single link
+    keep their markdown unless a `bullet_format` is given.
+    """
+    styles = styles or _pdf_styles()
+    list_options = list_options or _REPORT_LIST_OPTIONS
+    body_style = styles['BodyText']
+    list_style = styles['ListItem']
+
+    story = []
+    list_items = []
+
+    def flush_list():
+        if list_items:
             story.append(ListFlowable(
-                [ListItem(Paragraph(item, list_item_style)) for item in list_items],
-                bulletType='bullet',
-                leftIndent=10,
-                bulletFontName='Helvetica',
-                bulletFontSize=10,
-                bulletOffsetY=0,
-                bulletDedent=10,
-                spaceAfter=0
+                [ListItem(Paragraph(item, list_style)) for item in list_items],
+                **list_options
             ))
+            list_items.clear()
+
+    for kind, level, text in _tokenize_markdown(markdown_content):
+        if kind == _BULLET:
+            if link := _whole_line_link(text):
+                text = _link_markup(link[0] or link[1], link[1])
+            elif bullet_format:
+                text = bullet_format(text)
+            list_items.append(text)
+            continue
+
+        flush_list()
+        if kind == _HEADING and f'Heading{level}' not in styles:
+            kind, text = _PARAGRAPH, f"{'#' * level} {text}"
+        if kind == _LINK and 'Link' in styles:
+            link_text, link_url = _whole_line_link(text)
+            story.append(Paragraph(_link_markup(link_text or link_url, link_url), styles['Link']))
+        elif kind == _BLANK:
+            story.append(Spacer(1, 6))
+        elif kind == _HEADING:
+            story.append(Paragraph(text, styles[f'Heading{level}']))
+        else:
+            story.append(Paragraph(paragraph_format(text), body_style))
+
+    flush_list()
+    return story
+
+def generate_pdf_from_md(markdown_content: str, output_pdf) -> None:
+    """Convert markdown content to PDF using a simplified ReportLab approach.
+    
+    Args:
+        markdown_content (str): The markdown content to convert to PDF
+        output_pdf: Either a file path string or a BytesIO object
+    """
+    try:
+        # If output_pdf is a string (file path), ensure directory exists
+        if isinstance(output_pdf, str):
+            os.makedirs(os.path.dirname(os.path.abspath(output_pdf)), exist_ok=True)
+            
+        markdown_content = markdown_content.replace('\r\n', '\n')  # Normalize Windows line endings
+        markdown_content = markdown_content.replace('\\n', '\n')   # Convert literal \n to newlines
+        
+        # Create the PDF document
+        doc = SimpleDocTemplate(
+            output_pdf,
+            pagesize=letter,
+            rightMargin=40,
+            leftMargin=40,
+            topMargin=40,
+            bottomMargin=40
+        )
         
         # Build the PDF
-        doc.build(story)
+        doc.build(markdown_to_flowables(markdown_content))
         
         logger.info(f"Successfully generated PDF: {output_pdf}")
     
@@ -240,200 +249,32 @@ def generate_pdf_from_md(markdown_content: str, output_pdf) -> None:
 def convert_markdown_to_pdf_elements(markdown_text: str, custom_styles: Dict) -> List:
     """
     Example function that converts a Markdown string into a list of
-    ReportLab Flowable elements. This is separate from generate_pdf_from_md.
+    ReportLab Flowable elements using styles from get_custom_styles().
     """
-    story = []
-    current_list_items = []
-    in_list = False
-
-    lines = markdown_text.split('\n')
-    i = 0
-
-    def process_markdown_formatting(text):
-        # Bold
-        text = re.sub(r'(?<!\*)\*\*(.*?)\*\*(?!\*)', r'<b>\1</b>', text)
-        
-        # Clean up any remaining double asterisks (bold markers) but preserve single asterisks for bullet points
-        text = text.replace('**', '')
-        return text
-
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Blank line
-        if not line:
-            if in_list and current_list_items:
-                story.append(ListFlowable(
-                    [
-                        ListItem(
-                            Paragraph(item, custom_styles['ListItem']),
-                            value='bullet',
-                            leftIndent=20,
-                            bulletColor=colors.HexColor('#2c3e50'),
-                            bulletType='bullet',
-                            bulletFontName='Helvetica',
-                            bulletFontSize=10
-                        ) for item in current_list_items
-                    ],
-                    bulletType='bullet',
-                    leftIndent=20,
-                    bulletOffsetX=10,
-                    bulletOffsetY=2,
-                    start=None,
-                    bulletDedent=20,
-                    bulletFormat='•',
-                    spaceBefore=4,
-                    spaceAfter=4
-                ))
-                current_list_items = []
-                in_list = False
-            story.append(Spacer(1, 6))
-            i += 1
-            continue
-
-        # Headings
-        if line.startswith('#'):
-            if in_list and current_list_items:
-                # Flush the list
-                story.append(ListFlowable(
-                    [
-                        ListItem(
-                            Paragraph(item, custom_styles['ListItem']),
-                            value='bullet',
-                            leftIndent=20,
-                            bulletColor=colors.HexColor('#2c3e50'),
-                            bulletType='bullet',
-                            bulletFontName='Helvetica',
-                            bulletFontSize=10
-                        ) for item in current_list_items
-                    ],
-                    bulletType='bullet',
-                    leftIndent=20,
-                    bulletOffsetX=10,
-                    bulletOffsetY=2,
-                    start=None,
-                    bulletDedent=20,
-                    bulletFormat='•',
-                    spaceBefore=4,
-                    spaceAfter=4
-                ))
-                current_list_items = []
-                in_list = False
-
-            heading_level = len(line.split()[0])  # number of '#' characters
-            heading_text = ' '.join(line.split()[1:])
-            style_name = f'Heading{heading_level}'
-            # Use an existing style or a custom style
-            story.append(Paragraph(heading_text, custom_styles.get(style_name, custom_styles['BodyText'])))
-            i += 1
-            continue
-
-        # Bullets
-        if line.startswith('* '):
-            bullet_text = line[2:].strip()  # Remove the '* ' but keep any other asterisks
-            
-            # For non-references bullet points
-            if bullet_text.startswith('[') and '](' in bullet_text and bullet_text.endswith(')'):
-                # It's a link bullet
-                title, url = extract_link_info(bullet_text)
-                bullet_text = f'<link href="{url}" color="blue" textColor="blue"><u>{title or url}</u></link>'
-            else:
-                # Only process non-link text
-                bullet_text = process_markdown_formatting(bullet_text)
-
-            # Add it immediately as a single bullet item with explicit bullet styling
-            story.append(ListFlowable(
-                [
-                    ListItem(
-                        Paragraph(bullet_text, custom_styles['ListItem']),
-                        value='bullet',
-                        leftIndent=20,
-                        bulletColor=colors.HexColor('#2c3e50'),
-                        bulletType='bullet',
-                        bulletFontName='Helvetica',
-                        bulletFontSize=10,
-                        bulletFormat='•'
-                    )
-                ],
-                bulletType='bullet',
-                leftIndent=20,
-                bulletOffsetX=10,
-                bulletOffsetY=2,
-                start=None,
-                bulletDedent=20,
-                bulletFormat='•',
-                spaceBefore=4,
-                spaceAfter=4
-            ))
-
-        # If we were in a list but found something else
-        if in_list and current_list_items:
-            story.append(ListFlowable(
-                [
-                    ListItem(
-                        Paragraph(item, custom_styles['ListItem']),
-                        value='bullet',
-                        leftIndent=20,
-                        bulletColor=colors.HexColor('#2c3e50'),
-                        bulletType='bullet',
-                        bulletFontName='Helvetica',
-                        bulletFontSize=10
-                    ) for item in current_list_items
-                ],
-                bulletType='bullet',
-                leftIndent=20,
-                bulletOffsetX=10,
-                bulletOffsetY=2,
-                start=None,
-                bulletDedent=20,
-                bulletFormat='•',
-                spaceBefore=4,
-                spaceAfter=4
-            ))
-            current_list_items = []
-            in_list = False
-
-        # Standalone link
-        if line.startswith('[') and '](' in line and line.endswith(')'):
-            link_title, link_url = extract_link_info(line)
-            # Don't process the URL again since it's already a raw URL
-            link_paragraph = f'<link href="{link_url}" color="blue" textColor="blue"><u>{link_title or link_url}</u></link>'
-            story.append(Paragraph(link_paragraph, custom_styles['Link']))
-            i += 1
-            continue
-
-        # Regular paragraph
-        line = clean_text(line)
-        line = process_markdown_formatting(line)
-        story.append(Paragraph(line, custom_styles['BodyText']))
-        i += 1
-
-    # Flush any remaining bullet items at the end
-    if in_list and current_list_items:
-        story.append(ListFlowable(
-            [
-                ListItem(
-                    Paragraph(item, custom_styles['ListItem']),
-                    value='bullet',
-                    leftIndent=20,
-                    bulletColor=colors.HexColor('#2c3e50'),
-                    bulletType='bullet',
-                    bulletFontName='Helvetica',
-                    bulletFontSize=10
-                ) for item in current_list_items
-            ],
-            bulletType='bullet',
-            leftIndent=20,
-            bulletOffsetX=10,
-            bulletOffsetY=2,
-            start=None,
-            bulletDedent=20,
-            bulletFormat='•',
-            spaceBefore=4,
-            spaceAfter=4
-        ))
-
-    return story
+    styles = {
+        name: custom_styles[name]
+        for name in ('BodyText', 'ListItem', 'Link', 'Heading1', 'Heading2', 'Heading3')
+        if name in custom_styles
+    }
+    list_options = {
+        'bulletType': 'bullet',
+        'leftIndent': 20,
+        'bulletOffsetX': 10,
+        'bulletOffsetY': 2,
+        'start': None,
+        'bulletDedent': 20,
+        'bulletFormat': '•',
+        'bulletColor': colors.HexColor('#2c3e50'),
+        'bulletFontName': 'Helvetica',
+        'bulletFontSize': 10,
+        'spaceBefore': 4,
+        'spaceAfter': 4
+    }
+    return markdown_to_flowables(
+        markdown_text, styles, list_options,
+        paragraph_format=lambda text: format_bold_markdown(clean_text(text)),
+        bullet_format=format_bold_markdown
+    )
 
 def get_custom_styles():
     """
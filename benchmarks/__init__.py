@@ -0,0 +1 @@
+"""Performance benchmarks for the company research backend."""
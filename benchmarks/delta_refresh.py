@@ -0,0 +1,99 @@
+"""Compare a delta refresh with full research against fake providers, offline.
+
+Runs full research on each company, snapshots it as the application does, then
+refreshes it in delta mode, and reports job latency, provider calls and the
+estimated cost of each run.
+
+Usage:
+    python -m benchmarks.delta_refresh [--jobs 4] [--latency-scale 0.2] [--profile balanced]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from backend.classes.profiles import PROFILES, get_profile
+from backend.services import completion_cache, rate_limiter
+from backend.services.fake_providers import FakeProviders, LatencyModel
+from backend.services.snapshots import build_snapshot
+
+from .pipeline import COMPANIES, CountingWebSocketManager
+from .profiles import estimate_cost
+
+
+async def run_job(index: int, profile: str, baseline: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    from backend.graph import Graph
+
+    company, url, industry, hq = COMPANIES[index % len(COMPANIES)]
+    graph = Graph(company=company, url=url, industry=industry, hq_location=hq,
+                  websocket_manager=CountingWebSocketManager(), job_id=f"bench-{index}",
+                  profile=profile, baseline=baseline)
+    start = time.perf_counter()
+    values: Dict[str, Any] = {}
+    async for update in graph.run(thread={}):
+        for node_update in update.values():
+            values.update(node_update or {})
+    return {
+        "seconds": time.perf_counter() - start,
+        "snapshot": build_snapshot(values, graph.doc_store, get_profile(profile).max_doc_length),
+    }
+
+
+def summarize(name: str, seconds: list, calls: Counter, stats: Dict[str, Any], jobs: int) -> None:
+    llm_calls = sum(n for key, n in calls.items() if key.startswith(("openai.", "gemini.")))
+    print(f"{name:8} {statistics.median(seconds):6.2f}s {llm_calls / jobs:10.1f} "
+          f"{calls['tavily.search'] / jobs:9.1f} {calls['tavily.extract'] / jobs:9.1f} "
+          f"{estimate_cost(stats)['total'] / jobs:8.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=4, help="companies researched and then refreshed")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--profile", default="balanced", choices=sorted(PROFILES), help="research profile")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every fake latency")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rate_limiter._rate_limiter = rate_limiter.RateLimiter({key: {} for key in rate_limiter.DEFAULT_LIMITS})
+
+    scale = args.latency_scale
+    providers = FakeProviders(
+        seed=args.seed,
+        search_latency=LatencyModel(400 * scale),
+        extract_latency=LatencyModel(900 * scale),
+        llm_latency=LatencyModel(600 * scale),
+        llm_chars_per_second=4000 / scale if scale else 0,
+    )
+
+    async def run() -> None:
+        full = await asyncio.gather(*[run_job(i, args.profile) for i in range(args.jobs)])
+        full_stats = providers.stats()
+        # The refresh must not be served the full run's completions
+        completion_cache.get_completion_cache().clear()
+        before = Counter(full_stats["calls"])
+        delta = await asyncio.gather(*[
+            run_job(i, args.profile, baseline=job["snapshot"]) for i, job in enumerate(full)
+        ])
+        delta_stats = providers.stats()
+        delta_stats = {
+            "tavily_credits": delta_stats["tavily_credits"] - full_stats["tavily_credits"],
+            **{field: Counter(delta_stats[field]) - Counter(full_stats[field])
+               for field in ("calls", "chars_sent", "chars_returned")},
+        }
+
+        print(f"{args.jobs} {args.profile} jobs, latency x{scale:g}, seed {args.seed}")
+        print(f"{'run':8} {'p50':>7} {'LLM calls':>10} {'searches':>9} {'extracts':>9} {'$/job':>8}")
+        summarize("full", [job["seconds"] for job in full], before, full_stats, args.jobs)
+        summarize("delta", [job["seconds"] for job in delta], delta_stats["calls"], delta_stats, args.jobs)
+
+    with providers.install():
+        import backend.graph  # noqa: F401
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
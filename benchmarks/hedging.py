@@ -0,0 +1,119 @@
+"""Benchmark request hedging against a stub provider with heavy-tailed latency.
+
+Each simulated job runs the pipeline's two fan-outs: a round of searches, then a
+round of extracts. A job is as slow as its slowest call in each round. The stub
+answers most calls quickly, but a few percent are stragglers that take tens of
+times longer, as real search and extract endpoints sometimes do.
+
+Usage:
+    python -m benchmarks.hedging [--jobs 200] [--concurrency 10] [--straggler-rate 0.05]
+"""
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+
+from backend.services import hedging, rate_limiter
+from backend.services.resilience import call_provider
+
+
+class StubProvider:
+    """Search and extract endpoints with lognormal latency plus occasional stragglers."""
+
+    def __init__(self, median: float, straggler_rate: float, seed: int):
+        self.median = median
+        self.straggler_rate = straggler_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    def latency(self) -> float:
+        latency = self.rng.lognormvariate(math.log(self.median), 0.4)
+        if self.rng.random() < self.straggler_rate:
+            latency *= self.rng.uniform(10, 40)
+        return latency
+
+    async def search(self, query: str):
+        self.requests += 1
+        await asyncio.sleep(self.latency())
+        return {"results": [{"url": f"https://example.com/{query}", "content": "c"}]}
+
+    async def extract(self, url: str):
+        self.requests += 1
+        await asyncio.sleep(self.latency())
+        return {"results": [{"url": url, "raw_content": "r"}]}
+
+
+async def run_job(provider: StubProvider, job_id: str, searches: int, extracts: int) -> float:
+    start = time.monotonic()
+    await asyncio.gather(*[
+        call_provider("tavily.search", lambda i=i: provider.search(f"{job_id}-{i}"), job_id=job_id, hedge=True)
+        for i in range(searches)
+    ])
+    await asyncio.gather(*[
+        call_provider("tavily.extract", lambda i=i: provider.extract(f"{job_id}/{i}"), job_id=job_id, hedge=True)
+        for i in range(extracts)
+    ])
+    return time.monotonic() - start
+
+
+async def run(args, hedge: bool) -> dict:
+    hedging.HEDGING_ENABLED = hedge
+    hedging._hedgers.clear()
+    provider = StubProvider(args.median_ms / 1000, args.straggler_rate, args.seed)
+
+    # Warm up the latency trackers so hedging is active for every measured job
+    await asyncio.gather(*[run_job(provider, f"warmup-{i}", args.searches, args.extracts) for i in range(2)])
+    provider.requests = 0
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def job(i: int) -> float:
+        async with semaphore:
+            return await run_job(provider, f"job-{i}", args.searches, args.extracts)
+
+    start = time.monotonic()
+    times = sorted(await asyncio.gather(*[job(i) for i in range(args.jobs)]))
+    elapsed = time.monotonic() - start
+    calls = args.jobs * (args.searches + args.extracts)
+    return {
+        "p50": statistics.median(times),
+        "p90": times[int(len(times) * 0.9) - 1],
+        "p99": times[max(0, math.ceil(len(times) * 0.99) - 1)],
+        "elapsed": elapsed,
+        "extra_requests": provider.requests / calls - 1,
+        "stats": hedging.hedging_stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200, help="number of simulated jobs")
+    parser.add_argument("--concurrency", type=int, default=10, help="jobs running at once")
+    parser.add_argument("--searches", type=int, default=16, help="searches per job")
+    parser.add_argument("--extracts", type=int, default=40, help="extracts per job")
+    parser.add_argument("--median-ms", type=float, default=20, help="median stub latency")
+    parser.add_argument("--straggler-rate", type=float, default=0.05, help="share of calls that straggle")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # The stub has no provider limits, so don't pace it
+    rate_limiter._rate_limiter = rate_limiter.RateLimiter({"tavily.search": {}, "tavily.extract": {}})
+
+    results = {mode: asyncio.run(run(args, hedge=mode == "hedged")) for mode in ("baseline", "hedged")}
+
+    print(f"{args.jobs} jobs x ({args.searches} searches + {args.extracts} extracts), "
+          f"{args.concurrency} concurrent, {args.straggler_rate:.0%} stragglers")
+    print(f"{'':10} {'p50':>8} {'p90':>8} {'p99':>8} {'total':>8} {'extra reqs':>11}")
+    for mode, r in results.items():
+        print(f"{mode:10} {r['p50'] * 1000:7.0f}ms {r['p90'] * 1000:7.0f}ms {r['p99'] * 1000:7.0f}ms "
+              f"{r['elapsed']:7.1f}s {r['extra_requests']:10.1%}")
+    for key, stats in results["hedged"]["stats"].items():
+        print(f"  {key}: {stats}")
+    base, hedged = results["baseline"]["p99"], results["hedged"]["p99"]
+    print(f"p99 job time: {base * 1000:.0f}ms -> {hedged * 1000:.0f}ms ({1 - hedged / base:.0%} faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Check the API's import time against a budget using `python -X importtime`.
+
+Exits non-zero if importing the module takes longer than the budget or pulls in
+any of the heavy SDKs that are meant to load on first use.
+
+Usage:
+    python -m benchmarks.import_time [--module application] [--budget-ms 1000] [--runs 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported just to serve health checks
+LAZY_MODULES = (
+    "backend.graph",
+    "langgraph",
+    "langchain_core",
+    "openai",
+    "tavily",
+    "google.generativeai",
+    "reportlab",
+    "pymongo",
+)
+
+
+def measure(module: str) -> dict:
+    """Import a module in a fresh interpreter and return {module: cumulative_us}."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    env.pop("MONGODB_URI", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="application", help="module to import")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="maximum cumulative import time")
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of this many runs")
+    parser.add_argument("--top", type=int, default=10, help="show the slowest top-level imports")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    timings = min(runs, key=lambda t: t.get(args.module, 0))
+    total_ms = timings.get(args.module, 0) / 1000
+
+    print(f"import {args.module}: {total_ms:.0f}ms (budget {args.budget_ms:.0f}ms, best of {args.runs})")
+    for name, us in sorted(timings.items(), key=lambda item: -item[1])[1:args.top + 1]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.0f}ms exceeds budget of {args.budget_ms:.0f}ms")
+    eager = [m for m in LAZY_MODULES if m in timings]
+    if eager:
+        failures.append(f"modules meant to load lazily were imported: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
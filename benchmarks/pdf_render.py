@@ -0,0 +1,73 @@
+"""Benchmark markdown-to-PDF rendering on large synthetic reports.
+
+Usage:
+    python -m benchmarks.pdf_render [--reports 100] [--sections 12]
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+
+from backend.utils.utils import generate_pdf_from_md, markdown_to_flowables
+
+
+def build_report(company: str, sections: int, seed: int) -> str:
+    """Build a report shaped like the editor's output, with many bullets and links."""
+    rng = random.Random(seed)
+    words = ("revenue platform customers growth market funding enterprise product "
+             "partnership launch expansion analytics security regulation pricing").split()
+
+    def sentence(n: int = 18) -> str:
+        text = " ".join(rng.choice(words) for _ in range(n))
+        return text.capitalize() + "."
+
+    lines = [f"# {company} Research Report", ""]
+    headers = ["Company Overview", "Industry Overview", "Financial Overview", "News"]
+    for s in range(sections):
+        lines += [f"## {headers[s % len(headers)]}", ""]
+        for sub in range(3):
+            lines += [f"### Subsection {s}.{sub}", ""]
+            for _ in range(8):
+                lines.append(f"* **{rng.choice(words).title()}**: {sentence()} *{rng.choice(words)}*")
+            lines += ["", sentence(40), ""]
+    lines += ["## References", ""]
+    for r in range(40):
+        lines.append(f"* Source {r}. \"{sentence(6)}\" [example.com/{r}](https://example.com/articles/{r}?ref=report).")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100, help="number of reports to render")
+    parser.add_argument("--sections", type=int, default=12, help="## sections per report")
+    args = parser.parse_args()
+
+    reports = [build_report(f"Company {i}", args.sections, seed=i) for i in range(args.reports)]
+    print(f"Rendering {len(reports)} reports, {statistics.mean(map(len, reports)) / 1024:.1f} KiB markdown each")
+
+    convert_times = []
+    for report in reports:
+        start = time.perf_counter()
+        markdown_to_flowables(report)
+        convert_times.append(time.perf_counter() - start)
+
+    render_times = []
+    pdf_bytes = 0
+    for report in reports:
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        generate_pdf_from_md(report, buffer)
+        render_times.append(time.perf_counter() - start)
+        pdf_bytes += buffer.tell()
+
+    print(f"markdown -> flowables: total {sum(convert_times):.3f}s, "
+          f"mean {statistics.mean(convert_times) * 1000:.2f}ms")
+    print(f"full PDF render:       total {sum(render_times):.3f}s, "
+          f"mean {statistics.mean(render_times) * 1000:.1f}ms, "
+          f"p95 {statistics.quantiles(render_times, n=20)[-1] * 1000:.1f}ms, "
+          f"{pdf_bytes / len(reports) / 1024:.0f} KiB/PDF")
+
+
+if __name__ == "__main__":
+    main()
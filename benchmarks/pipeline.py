@@ -0,0 +1,232 @@
+"""Benchmark the research graph end to end against fake providers, offline.
+
+Runs full Graph jobs with the in-process fakes from backend.services.fake_providers
+in place of Tavily, OpenAI and Gemini, so graph and node changes can be measured
+for regressions without network access or API keys. Fake latencies, result sizes
+and error rates are configurable, and the same seed gives the same responses.
+
+Reports wall time, per-job latency, time per node, peak memory, event-loop lag
+and provider call counts.
+
+Usage:
+    python -m benchmarks.pipeline [--jobs 8] [--concurrency 4] [--error-rate 0.02] [--profile fast]
+    python -m benchmarks.pipeline --latency-scale 0 --json   # CPU cost only
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from backend.classes.profiles import PROFILES
+from backend.services import rate_limiter
+from backend.services.fake_providers import FakeProviders, LatencyModel
+from backend.services.tracing import Trace
+
+COMPANIES = [
+    ("Acme Robotics", "https://acmerobotics.example.com", "Industrial Automation", "Boston, MA"),
+    ("Northwind Foods", "https://northwind.example.com", "Food Distribution", "Seattle, WA"),
+    ("Globex Energy", "https://globex.example.com", "Renewable Energy", "Austin, TX"),
+    ("Initech Software", "https://initech.example.com", "Enterprise Software", "San Jose, CA"),
+]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a task that sleeps on a fixed interval."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "p50_ms": lags[len(lags) // 2] * 1000,
+            "p99_ms": lags[max(0, math.ceil(len(lags) * 0.99) - 1)] * 1000,
+            "max_ms": lags[-1] * 1000,
+        }
+
+
+class CountingWebSocketManager:
+    """Serialises and counts status updates as the real manager would, without sockets."""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def broadcast_to_job(self, job_id: str, message: dict) -> None:
+        json.dumps(message)
+        self.messages += 1
+
+    async def send_status_update(self, job_id: str, status: str, message: str = None,
+                                 error: str = None, result: dict = None) -> None:
+        await self.broadcast_to_job(job_id, {
+            "type": "status_update",
+            "data": {"status": status, "message": message, "error": error, "result": result},
+        })
+
+
+async def run_job(index: int, websocket_manager: CountingWebSocketManager,
+                  profile: str = "balanced") -> Dict[str, Any]:
+    from backend.graph import Graph
+
+    company, url, industry, hq = COMPANIES[index % len(COMPANIES)]
+    job_id = f"bench-{index}"
+    trace = Trace(job_id)
+    graph = Graph(company=company, url=url, industry=industry, hq_location=hq,
+                  websocket_manager=websocket_manager, job_id=job_id, trace=trace, profile=profile)
+    start = time.perf_counter()
+    state: Dict[str, Any] = {}
+    async for update in graph.run(thread={}):
+        state.update(update)
+    report = (state.get("editor") or {}).get("report", "")
+    return {"seconds": time.perf_counter() - start, "report_chars": len(report), "trace": trace.to_dict()}
+
+
+async def run(args, providers: FakeProviders) -> Dict[str, Any]:
+    websocket_manager = CountingWebSocketManager()
+    monitor = LoopLagMonitor()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def job(index: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_job(index, websocket_manager, args.profile)
+
+    monitor.start()
+    start = time.perf_counter()
+    jobs = await asyncio.gather(*[job(i) for i in range(args.jobs)])
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+
+    times = sorted(j["seconds"] for j in jobs)
+    node_ms = defaultdict(list)
+    for j in jobs:
+        for span in j["trace"]["spans"]:
+            if span["attrs"].get("type") == "node":
+                node_ms[span["name"]].append(span["duration_ms"])
+
+    return {
+        "jobs": args.jobs,
+        "concurrency": args.concurrency,
+        "wall_seconds": elapsed,
+        "jobs_per_minute": args.jobs / elapsed * 60,
+        "job_seconds": {
+            "p50": statistics.median(times),
+            "p95": times[max(0, math.ceil(len(times) * 0.95) - 1)],
+            "max": times[-1],
+        },
+        "node_ms_mean": {name: statistics.mean(values) for name, values in node_ms.items()},
+        "loop_lag": monitor.stats(),
+        "websocket_messages": websocket_manager.messages,
+        "reports_missing": sum(1 for j in jobs if not j["report_chars"]),
+        "providers": providers.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=8, help="number of research jobs")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs running at once")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--profile", default="balanced", choices=sorted(PROFILES), help="research profile")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiply every fake latency; 0 measures CPU cost alone")
+    parser.add_argument("--search-ms", type=float, default=400, help="median search latency")
+    parser.add_argument("--extract-ms", type=float, default=900, help="median extract latency")
+    parser.add_argument("--llm-ms", type=float, default=600, help="median LLM time to first token")
+    parser.add_argument("--llm-chars-per-second", type=float, default=4000, help="LLM streaming speed")
+    parser.add_argument("--straggler-rate", type=float, default=0.02, help="share of calls that straggle")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls that fail with a 503")
+    parser.add_argument("--raw-content-chars", type=int, default=20000, help="size of each extracted page")
+    parser.add_argument("--content-chars", type=int, default=1500, help="size of each search snippet")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep the provider rate limits instead of disabling them")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report peak Python heap with tracemalloc (slows the run)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if not args.rate_limits:
+        rate_limiter._rate_limiter = rate_limiter.RateLimiter(
+            {key: {} for key in rate_limiter.DEFAULT_LIMITS}
+        )
+
+    scale = args.latency_scale
+    providers = FakeProviders(
+        seed=args.seed,
+        search_latency=LatencyModel(args.search_ms * scale, straggler_rate=args.straggler_rate),
+        extract_latency=LatencyModel(args.extract_ms * scale, straggler_rate=args.straggler_rate),
+        llm_latency=LatencyModel(args.llm_ms * scale, straggler_rate=args.straggler_rate),
+        llm_chars_per_second=args.llm_chars_per_second / scale if scale else 0,
+        error_rate=args.error_rate,
+        content_chars=args.content_chars,
+        raw_content_chars=args.raw_content_chars,
+    )
+
+    with providers.install():
+        # Import outside the timed region so the first job does not pay for it
+        import backend.graph  # noqa: F401
+
+        if args.trace_memory:
+            tracemalloc.start()
+        results = asyncio.run(run(args, providers))
+        if args.trace_memory:
+            results["peak_heap_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mb"] = maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    r = results
+    print(f"{r['jobs']} {args.profile} jobs, {r['concurrency']} concurrent, latency x{scale:g}, "
+          f"{args.error_rate:.0%} errors, seed {args.seed}")
+    print(f"wall time      {r['wall_seconds']:8.2f}s  ({r['jobs_per_minute']:.1f} jobs/min)")
+    jobs = r["job_seconds"]
+    print(f"job time       p50 {jobs['p50']:.2f}s  p95 {jobs['p95']:.2f}s  max {jobs['max']:.2f}s")
+    lag = r["loop_lag"]
+    print(f"loop lag       p50 {lag['p50_ms']:.1f}ms  p99 {lag['p99_ms']:.1f}ms  max {lag['max_ms']:.1f}ms")
+    memory = f"peak RSS {r['peak_rss_mb']:.0f}MB"
+    if "peak_heap_mb" in r:
+        memory += f"  peak heap {r['peak_heap_mb']:.0f}MB"
+    print(f"memory         {memory}")
+    print(f"ws messages    {r['websocket_messages']}  reports missing {r['reports_missing']}")
+    print("node time (mean per job)")
+    for name, ms in r["node_ms_mean"].items():
+        print(f"  {name:20} {ms:8.0f}ms")
+    print("provider calls (errors)")
+    for key, calls in r["providers"]["calls"].items():
+        print(f"  {key:24} {calls:6} ({r['providers']['errors'].get(key, 0)})")
+
+
+if __name__ == "__main__":
+    main()
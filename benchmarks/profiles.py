@@ -0,0 +1,84 @@
+"""Compare the fast, balanced and deep research profiles against fake providers, offline.
+
+Runs the same jobs under each profile with the fakes from backend.services.fake_providers
+and reports job latency, provider calls, Tavily credits and an estimated cost per job.
+LLM cost is estimated from the characters sent and returned at four characters per
+token, using the list prices below; update them if the providers' prices change.
+
+Usage:
+    python -m benchmarks.profiles [--jobs 4] [--latency-scale 0.2]
+"""
+import argparse
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from backend.classes.profiles import PROFILES
+from backend.services import completion_cache, rate_limiter
+from backend.services.fake_providers import FakeProviders, LatencyModel
+
+from .pipeline import run
+
+# USD per million tokens (input, output), and per Tavily API credit
+LLM_PRICES = {
+    "openai.gpt-4.1": (2.00, 8.00),
+    "openai.gpt-4.1-mini": (0.40, 1.60),
+    "gemini.gemini-2.0-flash": (0.10, 0.40),
+}
+TAVILY_CREDIT_PRICE = 0.008
+CHARS_PER_TOKEN = 4
+
+
+def estimate_cost(stats: Dict[str, Any]) -> Dict[str, float]:
+    llm = 0.0
+    for endpoint, (input_price, output_price) in LLM_PRICES.items():
+        tokens_in = stats["chars_sent"].get(endpoint, 0) / CHARS_PER_TOKEN
+        tokens_out = stats["chars_returned"].get(endpoint, 0) / CHARS_PER_TOKEN
+        llm += (tokens_in * input_price + tokens_out * output_price) / 1e6
+    tavily = stats["tavily_credits"] * TAVILY_CREDIT_PRICE
+    return {"llm": llm, "tavily": tavily, "total": llm + tavily}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=4, help="jobs per profile")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs running at once")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every fake latency")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rate_limiter._rate_limiter = rate_limiter.RateLimiter({key: {} for key in rate_limiter.DEFAULT_LIMITS})
+
+    scale = args.latency_scale
+    print(f"{args.jobs} jobs per profile, {args.concurrency} concurrent, latency x{scale:g}, seed {args.seed}")
+    print(f"{'profile':10} {'p50':>7} {'p95':>7} {'LLM calls':>10} {'searches':>9} {'extracts':>9} "
+          f"{'credits':>8} {'$/job':>8}")
+    for name in PROFILES:
+        providers = FakeProviders(
+            seed=args.seed,
+            search_latency=LatencyModel(400 * scale),
+            extract_latency=LatencyModel(900 * scale),
+            llm_latency=LatencyModel(600 * scale),
+            llm_chars_per_second=4000 / scale if scale else 0,
+        )
+        # Each profile starts cold so no profile is served another's completions
+        completion_cache._completion_cache = None
+        with providers.install():
+            results = asyncio.run(run(
+                SimpleNamespace(jobs=args.jobs, concurrency=args.concurrency, profile=name), providers
+            ))
+
+        stats = results["providers"]
+        calls = stats["calls"]
+        llm_calls = sum(n for key, n in calls.items() if key.startswith(("openai.", "gemini.")))
+        cost = estimate_cost(stats)
+        jobs = results["job_seconds"]
+        print(f"{name:10} {jobs['p50']:6.2f}s {jobs['p95']:6.2f}s {llm_calls / args.jobs:10.1f} "
+              f"{calls.get('tavily.search', 0) / args.jobs:9.1f} {calls.get('tavily.extract', 0) / args.jobs:9.1f} "
+              f"{stats['tavily_credits'] / args.jobs:8.1f} {cost['total'] / args.jobs:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Record a real research job's provider traffic, then replay it offline for profiling.
+
+`record` runs one job against the live providers (API keys required) and writes
+every search, extract and completion to a cassette. `replay` drives the same job
+from the cassette with no network, at the recorded timing scaled by --speed, and
+reports time per node. Use --speed 0 with --profile to see CPU-side hot paths on
+real payloads, and --pdf to include report rendering.
+
+Usage:
+    python -m benchmarks.replay record --company "Acme" --url https://acme.com --out acme.jsonl.gz
+    python -m benchmarks.replay replay acme.jsonl.gz [--speed 0] [--repeat 5] [--profile] [--pdf]
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import statistics
+import time
+from collections import defaultdict
+from typing import Any, Dict
+
+from backend.services import rate_limiter
+from backend.services.cassette import Recorder, Replayer
+from backend.services.tracing import Trace
+
+from .pipeline import CountingWebSocketManager
+
+
+async def run_graph(job: Dict[str, Any], job_id: str, websocket_manager=None) -> Dict[str, Any]:
+    from backend.graph import Graph
+
+    trace = Trace(job_id)
+    graph = Graph(company=job.get("company"), url=job.get("url"), industry=job.get("industry"),
+                  hq_location=job.get("hq_location"), websocket_manager=websocket_manager,
+                  job_id=job_id, trace=trace)
+    state: Dict[str, Any] = {}
+    async for update in graph.run(thread={}):
+        state.update(update)
+    return {"report": (state.get("editor") or {}).get("report", ""), "trace": trace.to_dict()}
+
+
+def record(args) -> None:
+    job = {"company": args.company, "url": args.url, "industry": args.industry, "hq_location": args.hq}
+    recorder = Recorder(args.out, job=job)
+    start = time.perf_counter()
+    with recorder.install():
+        result = asyncio.run(run_graph(job, "record"))
+    print(f"Recorded {sum(recorder.calls.values())} calls in {time.perf_counter() - start:.1f}s to {args.out}")
+    for endpoint, calls in sorted(recorder.calls.items()):
+        print(f"  {endpoint:24} {calls}")
+    print(f"Report: {len(result['report'])} chars")
+
+
+def replay(args) -> None:
+    # Recorded latencies already include any rate limiting, so don't pace twice
+    rate_limiter._rate_limiter = rate_limiter.RateLimiter({key: {} for key in rate_limiter.DEFAULT_LIMITS})
+
+    # Load the graph and PDF renderer up front so the profile shows the job, not imports
+    import backend.graph  # noqa: F401
+    from backend.utils.utils import generate_pdf_from_md
+
+    profiler = cProfile.Profile() if args.profile else None
+    times, pdf_times = [], []
+    node_ms = defaultdict(list)
+    websocket_manager = CountingWebSocketManager()
+    for i in range(args.repeat):
+        replayer = Replayer(args.cassette, speed=args.speed)
+        with replayer.install():
+            if profiler:
+                profiler.enable()
+            start = time.perf_counter()
+            result = asyncio.run(run_graph(replayer.job, f"replay-{i}", websocket_manager))
+            times.append(time.perf_counter() - start)
+            if args.pdf:
+                start = time.perf_counter()
+                generate_pdf_from_md(result["report"], io.BytesIO())
+                pdf_times.append(time.perf_counter() - start)
+            if profiler:
+                profiler.disable()
+        for span in result["trace"]["spans"]:
+            if span["attrs"].get("type") == "node":
+                node_ms[span["name"]].append(span["duration_ms"])
+
+    job = replayer.job
+    print(f"Replayed {job.get('company')} x{args.repeat} at speed {args.speed:g}")
+    print(f"job time      median {statistics.median(times):.3f}s  min {min(times):.3f}s")
+    if pdf_times:
+        print(f"pdf render    median {statistics.median(pdf_times):.3f}s")
+    print(f"ws messages   {websocket_manager.messages // args.repeat} per job")
+    print(f"report        {len(result['report'])} chars")
+    print("node time (median)")
+    for name, values in node_ms.items():
+        print(f"  {name:20} {statistics.median(values):8.1f}ms")
+    stats = replayer.stats()
+    print(f"provider calls {stats['calls']}")
+    if any(stats["inexact_matches"].values()) or any(stats["unused"].values()):
+        print(f"  inexact matches {stats['inexact_matches']}, unused recordings {stats['unused']}")
+
+    if profiler:
+        print()
+        pstats.Stats(profiler).sort_stats(args.sort).print_stats(args.top)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="run a live job and write its provider traffic to a cassette")
+    rec.add_argument("--company", required=True)
+    rec.add_argument("--url")
+    rec.add_argument("--industry")
+    rec.add_argument("--hq")
+    rec.add_argument("--out", required=True, help="cassette path, e.g. acme.jsonl.gz")
+
+    rep = commands.add_parser("replay", help="run the recorded job from a cassette, offline")
+    rep.add_argument("cassette")
+    rep.add_argument("--speed", type=float, default=1.0, help="multiply recorded latencies; 0 for none")
+    rep.add_argument("--repeat", type=int, default=1, help="number of replays")
+    rep.add_argument("--pdf", action="store_true", help="also render the report to PDF")
+    rep.add_argument("--profile", action="store_true", help="print a cProfile summary")
+    rep.add_argument("--sort", default="tottime", help="cProfile sort key")
+    rep.add_argument("--top", type=int, default=30, help="functions to show in the profile")
+
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    if args.command == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
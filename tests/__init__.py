@@ -0,0 +1 @@
+"""Tests for the company research backend."""
@@ -0,0 +1,58 @@
+"""Markdown-to-PDF conversion of a report shaped like the editor's output."""
+import io
+
+from reportlab.platypus import ListFlowable, Paragraph
+
+from backend.utils.utils import markdown_to_flowables, generate_pdf_from_md
+
+REPORT = """# Acme Robotics Research Report
+
+## Company Overview
+Acme builds **warehouse robots** for *mid-size* retailers, see [the site](https://acme.example.com).
+A [**bold link**](https://example.com/a) and **a [link](https://example.com/b) in bold**.
+
+* **Founded**: 2015 in Boston
+* [Press release](https://example.com/press)
+- Dashes are not bullets
+### Funding
+Raised $40M.
+
+## References
+* Acme. "About" [acme.example.com](https://acme.example.com/about).
+"""
+
+
+def paragraph_texts(flowables):
+    return [flowable.text for flowable in flowables if isinstance(flowable, Paragraph)]
+
+
+def test_inline_markup_in_paragraphs():
+    texts = paragraph_texts(markdown_to_flowables(REPORT))
+    assert ('Acme builds <b>warehouse robots</b> for <i>mid-size</i> retailers, see '
+            '<link href="https://acme.example.com" color="blue"><u>the site</u></link>.') in texts
+    # Markup nested inside link text, and links nested inside bold text, are converted
+    assert ('A <link href="https://example.com/a" color="blue"><u><b>bold link</b></u></link> and '
+            '<b>a <link href="https://example.com/b" color="blue"><u>link</u></link> in bold</b>.') in texts
+
+
+def test_only_asterisk_bullets_are_lists():
+    flowables = markdown_to_flowables(REPORT)
+    lists = [flowable for flowable in flowables if isinstance(flowable, ListFlowable)]
+    assert len(lists) == 2
+    items = [item._flowables[0].text for item in lists[0]._flowables]
+    # Bullets keep their markdown, except a bullet that is a single link
+    assert items == ['**Founded**: 2015 in Boston',
+                     '<link href="https://example.com/press" color="blue"><u>Press release</u></link>']
+    assert '- Dashes are not bullets' in paragraph_texts(flowables)
+
+
+def test_list_closes_before_next_heading():
+    flowables = markdown_to_flowables(REPORT)
+    first_list = next(i for i, flowable in enumerate(flowables) if isinstance(flowable, ListFlowable))
+    assert flowables[first_list + 2].text == 'Funding'
+
+
+def test_report_renders_to_pdf():
+    output = io.BytesIO()
+    generate_pdf_from_md(REPORT, output)
+    assert output.getvalue().startswith(b'%PDF')
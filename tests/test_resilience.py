@@ -0,0 +1,74 @@
+"""Circuit breaker behaviour of provider calls."""
+import asyncio
+import time
+
+import pytest
+
+from backend.services.resilience import CircuitOpenError, call_provider, get_breaker
+
+
+def half_open(key: str):
+    breaker = get_breaker(key)
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_at = time.monotonic() - breaker.reset_seconds
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def test_cancelled_trial_lets_next_call_through():
+    key = "test.cancelled_trial"
+    breaker = half_open(key)
+
+    async def scenario():
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def ok():
+            return "ok"
+
+        trial = asyncio.create_task(call_provider(key, slow, max_retries=0))
+        await asyncio.sleep(0.05)
+        assert breaker.trial_in_flight
+        # Another call fails fast while the trial is in flight
+        with pytest.raises(CircuitOpenError):
+            await call_provider(key, ok, max_retries=0)
+
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # A cancellation is neither a success nor a failure
+        assert not breaker.trial_in_flight
+        assert breaker.state == "half_open"
+
+        assert await call_provider(key, ok, max_retries=0) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_call_does_not_release_another_calls_trial():
+    key = "test.cancelled_non_trial"
+    breaker = get_breaker(key)
+
+    async def scenario():
+        async def slow():
+            await asyncio.sleep(10)
+
+        # Started while closed, so it is not the trial
+        earlier = asyncio.create_task(call_provider(key, slow, max_retries=0))
+        await asyncio.sleep(0.05)
+        half_open(key)
+        trial = asyncio.create_task(call_provider(key, slow, max_retries=0))
+        await asyncio.sleep(0.05)
+
+        earlier.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await earlier
+        assert breaker.trial_in_flight
+
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert not breaker.trial_in_flight
+
+    asyncio.run(scenario())